@@ -0,0 +1,42 @@
+import rich_click as click
+import sys
+import os
+
+@click.command(help='This command scores the parasitic interactions (worst match, mean log score, similarity score and '
+                    'match histogram) of a library of design files in parallel, writing one row per design to a CSV or '
+                    'Parquet file.  Scores are cached by file contents, so unchanged designs are not re-scored.')
+@click.argument('design_files', nargs=-1, required=True)
+@click.option('--output_file', '-o', default='design_scores.csv', type=str,
+              help='Output file (.csv or .parquet).')
+@click.option('--cache_file', '-c', default=None, type=str,
+              help='Score cache file (defaults to design_score_cache.jsonl in the output folder).')
+@click.option('--no_cache', is_flag=True,
+              help='Set this flag to score all designs from scratch without reading or updating the cache.')
+@click.option('--process_count', '-p', default=None, type=int,
+              help='Number of worker processes (defaults to 67% of the available cores).')
+@click.option('--max_tasks_per_worker', default=10, type=int,
+              help='Number of designs each worker scores before being restarted (keeps memory use bounded).')
+def score_designs(design_files, output_file, cache_file, no_cache, process_count, max_tasks_per_worker):
+    from crisscross.core_functions.design_scoring import expand_design_file_patterns, batch_score_designs
+    from crisscross.helper_functions import create_dir_if_empty
+
+    files = expand_design_file_patterns(design_files)
+    if len(files) == 0:
+        raise click.UsageError('No design files (.xlsx or .hcad) found matching the provided paths.')
+
+    create_dir_if_empty(os.path.dirname(os.path.abspath(output_file)))
+
+    if no_cache:
+        cache_file = None
+    elif cache_file is None:
+        cache_file = os.path.join(os.path.dirname(os.path.abspath(output_file)), 'design_score_cache.jsonl')
+
+    summary = batch_score_designs(files, output_file, cache_file=cache_file, process_count=process_count,
+                                  max_tasks_per_worker=max_tasks_per_worker)
+
+    click.echo(f'Scored {summary["scored"]} designs ({summary["cached"]} more taken from the cache, '
+               f'{summary["failed"]} failed).  Results saved to {output_file}.')
+
+
+if __name__ == '__main__':
+    score_designs(sys.argv[1:])  # for use when debugging with pycharm
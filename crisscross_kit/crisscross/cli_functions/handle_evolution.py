@@ -12,7 +12,8 @@ def handle_evolve(config_file):
 
     evolution_params = toml.load(config_file)
 
-    megastructure = Megastructure(import_design_file=evolution_params['slat_array'])
+    # cargo and seed handles play no part in handle evolution, so their sheets are only read in if needed later on
+    megastructure = Megastructure(import_design_file=evolution_params['slat_array'], defer_cargo_and_seeds=True)
     del evolution_params['slat_array']
 
     if 'logging_interval' in evolution_params:
@@ -0,0 +1,235 @@
+import json
+import os
+import zipfile
+from collections import defaultdict
+
+import numpy as np
+
+from crisscross.core_functions.handle_link_manager import HandleLinkManager
+from crisscross.core_functions.slats import get_slat_key, Slat
+from crisscross.helper_functions import natural_sort_key
+
+BINARY_DESIGN_EXTENSION = '.hcad'
+BINARY_DESIGN_FORMAT = 'hashcad-binary-design'
+BINARY_DESIGN_VERSION = 1
+
+# columns of the slat position table
+SLAT_POSITION_COLUMNS = ['layer', 'slat_id', 'phantom_id', 'position', 'y', 'x']
+
+
+def is_binary_design_file(file):
+    """
+    Checks whether a design file is in the binary (.hcad) format rather than an Excel workbook.
+    Both are zip containers, so the check is made on the presence of the binary manifest.
+    :param file: Path to design file
+    :return: True if the file is a binary design file
+    """
+    if not zipfile.is_zipfile(file):
+        return False
+    with zipfile.ZipFile(file) as zf:
+        return 'manifest.json' in zf.namelist()
+
+
+class BinaryDesignFile:
+    """
+    Read-only access to a binary design file.  Only the manifest is read on opening; each array is read in on first access.
+    """
+    def __init__(self, file):
+        """
+        :param file: Path to the binary design file
+        """
+        self.file = file
+        self._arrays = {}
+        with zipfile.ZipFile(file) as zf:
+            self.manifest = json.loads(zf.read('manifest.json'))
+            self._members = {info.filename: info for info in zf.infolist()}
+
+        if self.manifest.get('format') != BINARY_DESIGN_FORMAT:
+            raise ValueError(f'{file} is not a #-CAD binary design file.')
+        if self.manifest.get('version', 0) > BINARY_DESIGN_VERSION:
+            raise ValueError(f'{file} uses binary design format version {self.manifest["version"]}, '
+                             f'but only versions up to {BINARY_DESIGN_VERSION} are supported.  Please update crisscross.')
+
+    def has_array(self, name):
+        return f'{name}.npy' in self._members
+
+    def array(self, name):
+        """
+        Returns one of the arrays stored in the design file (read in on first access, then kept in memory).
+        """
+        if name not in self._arrays:
+            with zipfile.ZipFile(self.file) as zf, zf.open(self._members[f'{name}.npy']) as f:
+                self._arrays[name] = np.lib.format.read_array(f)
+        return self._arrays[name]
+
+
+def export_binary_design(megastructure, filepath):
+    """
+    Exports a megastructure to the binary design format.  This holds exactly the same information as the Excel export
+    (slat layouts, handle interfaces, cargo, seeds, slat types, handle links and metadata), but is much faster to read and write.
+    :param megastructure: Megastructure to export
+    :param filepath: Output file path (.hcad)
+    :return: N/A
+    """
+    slat_array = megastructure.generate_slat_occupancy_grid()
+    handle_array = megastructure.generate_assembly_handle_grid()
+    layer_palette = megastructure.layer_palette
+
+    # slat layouts (non-assembly slats are not exported, as with the Excel format)
+    slat_positions = []
+    for key, slat in megastructure.slats.items():
+        if slat.non_assembly_slat:
+            continue
+        if slat.phantom_parent is None:
+            slat_id, phantom_id = int(slat.ID.split('slat')[-1]), 0
+        else:
+            slat_id, phantom_id = map(int, slat.ID.split('slat')[-1].split('-phantom'))
+        for posn, (y, x) in slat.slat_position_to_coordinate.items():
+            slat_positions.append((slat.layer, slat_id, phantom_id, posn, y, x))
+
+    # cargo and seed handles, sorted in the order the Excel sheets are read back (layer, then side, then row-major)
+    cargo_entries, seed_entries = [], []
+    for key, slat in megastructure.slats.items():
+        if slat.phantom_parent is not None:
+            continue
+        for side in [2, 5]:
+            for handle_position, handle_data in slat.get_sorted_handles('h%s' % side):
+                y, x = slat.slat_position_to_coordinate[handle_position]
+                if handle_data['category'] == 'CARGO':
+                    value = handle_data['value']
+                    cargo_entries.append([slat.layer, side, int(y), int(x), value.item() if isinstance(value, np.generic) else value])
+                elif handle_data['category'] == 'SEED':
+                    seed_id = handle_data['descriptor'].split('|')[-1]
+                    seed_entries.append([seed_id, slat.layer, side, int(y), int(x), handle_data['value'].replace('-', '_')])
+    cargo_entries.sort(key=lambda c: (c[0], c[1], c[2], c[3]))
+    seed_entries.sort(key=lambda s: (s[1], s[2], s[3], s[4]))
+
+    # handle links, in the same form as the slat_handle_links sheet (blocks take precedence over groups)
+    link_manager = megastructure.link_manager
+    link_entries = []
+    for slat_id, slat in megastructure.slats.items():
+        if slat.phantom_parent is not None:
+            continue
+        for side in [5, 2]:
+            for pos in range(1, slat.max_length + 1):
+                key = (slat_id, pos, side)
+                if key in link_manager.handle_blocks:
+                    link_entries.append([slat_id, pos, side, 0, None])
+                elif key in link_manager.handle_link_to_group:
+                    group = link_manager.handle_link_to_group[key]
+                    value = link_manager.handle_group_to_value.get(group)
+                    link_entries.append([slat_id, pos, side, None if value is None else int(value), int(group)])
+
+    manifest = {
+        'format': BINARY_DESIGN_FORMAT,
+        'version': BINARY_DESIGN_VERSION,
+        'file_format': '#-CAD',
+        'connection_angle': megastructure.connection_angle,
+        'slat_grid_coords': [int(slat_array.shape[0]), int(slat_array.shape[1])],
+        'layer_palette': {str(layer): {k: (v.item() if isinstance(v, np.generic) else v) for k, v in info.items()}
+                          for layer, info in layer_palette.items()},
+        'cargo_palette': megastructure.cargo_palette,
+        'canvas_metadata': {k: list(v) for k, v in megastructure.hashcad_canvas_metadata.items()},
+        'unique_slat_colors': {key: slat.unique_color for key, slat in megastructure.slats.items()
+                               if slat.phantom_parent is None and slat.unique_color is not None},
+        'slat_types': [[slat.layer, int(slat.ID.split('slat')[-1]), slat.slat_type] for slat in megastructure.slats.values()
+                       if slat.phantom_parent is None],
+        'handle_links': link_entries,
+        'cargo': cargo_entries,
+        'seeds': seed_entries,
+        'arrays': ['slat_positions'] + (['handle_array'] if np.sum(handle_array) > 0 else []),
+    }
+
+    # arrays are stored uncompressed so that they can be read back without decompressing them
+    temp_file = filepath + '.tmp'
+    with zipfile.ZipFile(temp_file, 'w', compression=zipfile.ZIP_STORED) as zf:
+        zf.writestr('manifest.json', json.dumps(manifest))
+        with zf.open('slat_positions.npy', 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.array(slat_positions, dtype=np.int32).reshape(-1, len(SLAT_POSITION_COLUMNS)))
+        if 'handle_array' in manifest['arrays']:
+            with zf.open('handle_array.npy', 'w', force_zip64=True) as f:
+                np.lib.format.write_array(f, np.ascontiguousarray(handle_array, dtype=np.int32))
+    os.replace(temp_file, filepath)
+
+
+def import_binary_design(file):
+    """
+    Reads in a complete megastructure from a binary design file.  The slats are rebuilt as Slat objects and the
+    handle array is returned as a regular (writable) array, so all arrays are read into memory in full.
+    :param file: Path to binary design file (.hcad)
+    :return: All arrays and metadata necessary to regenerate the design (same output as Megastructure.import_design)
+    """
+    design = BinaryDesignFile(file)
+    manifest = design.manifest
+
+    layer_palette = {int(layer): dict(info) for layer, info in manifest['layer_palette'].items()}
+    cargo_palette = manifest['cargo_palette']
+    if 'SEED' not in cargo_palette:
+        cargo_palette['SEED'] = {'short name': 'S1', 'color': '#FF0000'}
+    slat_grid_coords = tuple(manifest['slat_grid_coords'])
+    slat_type_dict = {(layer, slat_id): slat_type for layer, slat_id, slat_type in manifest['slat_types']}
+
+    # slats are rebuilt by grouping the position table by (layer, slat, phantom)
+    slat_positions = design.array('slat_positions')
+    slat_coords = defaultdict(dict)
+    for layer, slat_id, phantom_id, position, y, x in slat_positions.tolist():
+        slat_coords[(layer, slat_id, phantom_id)][position] = (y, x)
+
+    slats = {}
+    for (layer, slat_id, phantom_id), coords in slat_coords.items():
+        slat_type = slat_type_dict.get((layer, slat_id), 'tube')
+        if phantom_id == 0:
+            slat_key = get_slat_key(layer, slat_id)
+            slats[slat_key] = Slat(slat_key, layer, coords, slat_type=slat_type)
+        else:
+            slat_key = get_slat_key(layer, slat_id, phantom_id)
+            slats[slat_key] = Slat(slat_key, layer, coords, slat_type=slat_type, phantom_parent=get_slat_key(layer, slat_id))
+    slats = {k: v for k, v in sorted(slats.items(), key=lambda item: natural_sort_key(item[0]))}
+
+    for slat in slats.values():
+        slat.layer_color = layer_palette[slat.layer]['color']
+        slat.unique_color = manifest['unique_slat_colors'].get(slat.ID if slat.phantom_parent is None else slat.phantom_parent)
+
+    if design.has_array('handle_array'):
+        handle_array = design.array('handle_array')
+    else:
+        handle_array = None
+
+    cargo_dict = {((y, x), layer, side): value for layer, side, y, x, value in manifest['cargo']}
+    seed_dict = defaultdict(list)
+    for seed_id, layer, side, y, x, seed_handle in manifest['seeds']:
+        seed_dict[(seed_id, layer, side)].append((y, x, seed_handle))
+
+    # handle links are applied with the same rules as when reading the slat_handle_links sheet
+    link_manager = HandleLinkManager()
+    link_manager.max_group_id = max([group for *_, group in manifest['handle_links'] if group is not None], default=0)
+    for slat_id, position, side, value, group in manifest['handle_links']:
+        key = (slat_id, position, side)
+        if value == 0:
+            link_manager.handle_blocks.append(key)
+            continue
+        if group is None:
+            link_manager.max_group_id += 1
+            group = link_manager.max_group_id
+        link_manager.handle_link_to_group[key] = group
+        link_manager.handle_group_to_link[group].append(key)
+        if value is not None:
+            link_manager.handle_group_to_value[group] = value
+
+    canvas_metadata = {k: tuple(v) for k, v in manifest['canvas_metadata'].items()}
+
+    return (slats, handle_array, seed_dict, cargo_dict, manifest['connection_angle'], layer_palette, cargo_palette,
+            canvas_metadata, slat_grid_coords, link_manager)
+
+
+def convert_design_file(input_file, output_file):
+    """
+    Converts a design between the Excel (.xlsx) and binary (.hcad) formats (the output format is chosen from the file extension).
+    :param input_file: Path to the design to convert
+    :param output_file: Path of the converted design
+    :return: N/A
+    """
+    from crisscross.core_functions.megastructures import Megastructure  # imported here to avoid a circular import
+
+    megastructure = Megastructure(import_design_file=input_file)
+    megastructure.export_design(os.path.basename(output_file), os.path.dirname(os.path.abspath(output_file)))
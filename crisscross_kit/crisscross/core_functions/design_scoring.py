@@ -0,0 +1,213 @@
+import csv
+import glob
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import time
+
+from colorama import Fore
+from tqdm import tqdm
+
+from crisscross.core_functions.binary_design_format import BINARY_DESIGN_EXTENSION
+
+pyarrow_spec = importlib.util.find_spec("pyarrow")  # only required for parquet output
+if pyarrow_spec is not None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+DESIGN_FILE_EXTENSIONS = ('.xlsx', BINARY_DESIGN_EXTENSION)
+SCORE_CACHE_VERSION = 1  # increase whenever the scoring changes, to invalidate previously cached results
+
+# columns of the output table (one row per design)
+SCORE_COLUMNS = ['file', 'content_hash', 'worst_match_score', 'mean_log_score', 'similarity_score', 'match_histogram',
+                 'slat_count', 'score_time', 'cached', 'error']
+
+
+def expand_design_file_patterns(patterns):
+    """
+    Expands a set of file paths and/or glob patterns (recursive ** patterns are allowed) into a sorted list of design files.
+    Directories are expanded into all the design files they contain.
+    :param patterns: Iterable of paths or glob patterns
+    :return: List of unique design file paths (.xlsx or .hcad)
+    """
+    design_files = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            pattern = os.path.join(pattern, '*')
+        for file in glob.glob(pattern, recursive=True):
+            # temporary Excel lock files (~$design.xlsx) are never valid designs
+            if os.path.isfile(file) and file.lower().endswith(DESIGN_FILE_EXTENSIONS) and not os.path.basename(file).startswith('~$'):
+                design_files.add(os.path.abspath(file))
+    return sorted(design_files)
+
+
+def compute_file_hash(file, chunk_size=1 << 20):
+    """
+    Computes the SHA-256 hash of a file's contents (read in chunks, so memory use is independent of file size).
+    """
+    hasher = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def score_design_file(file):
+    """
+    Imports a design file and computes its parasitic interaction scores (see Megastructure.get_parasitic_interactions).
+    Errors are caught and reported in the output row, so that a single broken design does not stop a batch.
+    :param file: Path to the design file
+    :return: Dictionary with the score columns of the design (see SCORE_COLUMNS)
+    """
+    from crisscross.core_functions.megastructures import Megastructure  # imported here to avoid a circular import
+
+    start_time = time.perf_counter()
+    row = {'file': file, 'worst_match_score': None, 'mean_log_score': None, 'similarity_score': None,
+           'match_histogram': None, 'slat_count': None, 'error': None}
+    try:
+        megastructure = Megastructure(import_design_file=file, defer_cargo_and_seeds=True)
+        scores = megastructure.get_parasitic_interactions()
+        row['worst_match_score'] = int(scores['worst_match_score'])
+        row['mean_log_score'] = float(scores['mean_log_score'])
+        row['similarity_score'] = None if scores.get('similarity_score') is None else int(scores['similarity_score'])
+        row['match_histogram'] = json.dumps([int(count) for count in scores['match_histogram']])
+        row['slat_count'] = sum(1 for slat in megastructure.slats.values() if slat.phantom_parent is None)
+    except Exception as e:
+        row['error'] = f'{type(e).__name__}: {e}'
+    row['score_time'] = time.perf_counter() - start_time
+    return row
+
+
+def _score_hashed_design_file(file_and_hash):
+    file, content_hash = file_and_hash
+    row = score_design_file(file)
+    row['content_hash'] = content_hash
+    return row
+
+
+def load_score_cache(cache_file):
+    """
+    Reads in all previously computed design scores from a cache file (JSON lines, one design per line).
+    Entries from older versions of the scoring system are ignored.
+    :param cache_file: Path to the cache file
+    :return: Dictionary of content hash to score row
+    """
+    cache = {}
+    if cache_file is None or not os.path.isfile(cache_file):
+        return cache
+    with open(cache_file, 'r') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:  # e.g. a partially written line from an interrupted run
+                continue
+            if entry.get('version') == SCORE_CACHE_VERSION:
+                cache[entry['content_hash']] = entry['row']
+    return cache
+
+
+class _ScoreWriter:
+    """
+    Streams score rows to a CSV or Parquet file (selected from the file extension) as they are computed.
+    """
+    def __init__(self, output_file, parquet_batch_size=256):
+        self.output_file = output_file
+        self.parquet = output_file.lower().endswith('.parquet')
+        if self.parquet and pyarrow_spec is None:
+            raise RuntimeError('Parquet output requires pyarrow to be installed (pip install pyarrow).  '
+                               'Alternatively, use a .csv output file.')
+        self.parquet_batch_size = parquet_batch_size
+        self._pending_rows = []
+        if self.parquet:
+            self._schema = pa.schema([('file', pa.string()), ('content_hash', pa.string()), ('worst_match_score', pa.int64()),
+                                      ('mean_log_score', pa.float64()), ('similarity_score', pa.int64()),
+                                      ('match_histogram', pa.string()), ('slat_count', pa.int64()),
+                                      ('score_time', pa.float64()), ('cached', pa.bool_()), ('error', pa.string())])
+            self._writer = pq.ParquetWriter(output_file, self._schema)
+        else:
+            self._file = open(output_file, 'w', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=SCORE_COLUMNS)
+            self._writer.writeheader()
+
+    def write(self, row):
+        if self.parquet:
+            self._pending_rows.append(row)
+            if len(self._pending_rows) >= self.parquet_batch_size:
+                self._flush_parquet()
+        else:
+            self._writer.writerow({column: row.get(column) for column in SCORE_COLUMNS})
+            self._file.flush()
+
+    def _flush_parquet(self):
+        if len(self._pending_rows) > 0:
+            columns = {column: [row.get(column) for row in self._pending_rows] for column in SCORE_COLUMNS}
+            self._writer.write_table(pa.Table.from_pydict(columns, schema=self._schema))
+            self._pending_rows = []
+
+    def close(self):
+        if self.parquet:
+            self._flush_parquet()
+            self._writer.close()
+        else:
+            self._file.close()
+
+
+def batch_score_designs(design_files, output_file, cache_file=None, process_count=None, max_tasks_per_worker=10):
+    """
+    Scores the parasitic interactions of a set of design files in parallel, streaming one result row per design
+    (worst match, mean log score, similarity score and match histogram) to a CSV or Parquet file.
+    Results are cached by the hash of each design file's contents, so unchanged designs are never re-scored.
+    :param design_files: List of design file paths (see expand_design_file_patterns)
+    :param output_file: Output path (.csv or .parquet).  Rows are written in the order designs finish scoring.
+    :param cache_file: Path to the score cache (JSON lines).  Set to None to disable caching.
+    :param process_count: Number of worker processes (if set to default, will use 67% of available cores)
+    :param max_tasks_per_worker: Number of designs each worker process scores before being replaced, which keeps memory
+    use bounded when scoring large design libraries
+    :return: Dictionary with the number of designs scored, taken from the cache and failed
+    """
+    if process_count is None:
+        process_count = max(1, int(multiprocessing.cpu_count() / 1.5))
+
+    cache = load_score_cache(cache_file)
+    summary = {'scored': 0, 'cached': 0, 'failed': 0}
+
+    writer = _ScoreWriter(output_file)
+    cache_writer = open(cache_file, 'a') if cache_file is not None else None
+    try:
+        designs_to_score = []
+        for file in design_files:
+            content_hash = compute_file_hash(file)
+            if content_hash in cache:
+                writer.write({**cache[content_hash], 'file': file, 'content_hash': content_hash, 'cached': True})
+                summary['cached'] += 1
+            else:
+                designs_to_score.append((file, content_hash))
+
+        if len(designs_to_score) > 0:
+            # same as in the EvolveManager, spawned processes reduce memory leaks on linux systems
+            mp_ctx = multiprocessing.get_context('spawn') if platform.system() == 'Linux' else multiprocessing
+            with mp_ctx.Pool(processes=min(process_count, len(designs_to_score)), maxtasksperchild=max_tasks_per_worker) as pool:
+                # results are consumed as soon as they are ready, so only one design per worker is held in memory at any time
+                for row in tqdm(pool.imap_unordered(_score_hashed_design_file, designs_to_score),
+                                total=len(designs_to_score), desc='Scoring designs'):
+                    row['cached'] = False
+                    writer.write(row)
+                    if row['error'] is not None:
+                        summary['failed'] += 1
+                        print(Fore.RED + f'Could not score {row["file"]} - {row["error"]}' + Fore.RESET)
+                        continue
+                    summary['scored'] += 1
+                    if cache_writer is not None:
+                        cached_row = {k: v for k, v in row.items() if k not in ('file', 'content_hash', 'cached')}
+                        cache_writer.write(json.dumps({'version': SCORE_CACHE_VERSION, 'content_hash': row['content_hash'],
+                                                       'row': cached_row}) + '\n')
+                        cache_writer.flush()
+    finally:
+        writer.close()
+        if cache_writer is not None:
+            cache_writer.close()
+
+    return summary
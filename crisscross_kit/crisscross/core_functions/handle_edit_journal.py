@@ -0,0 +1,245 @@
+from bisect import bisect_right
+from contextlib import contextmanager
+
+
+def _snapshot_handles(slats, handle_keys, snapshots):
+    """
+    Captures the current state of a set of handles: a copy of each handle's data (None if unassigned) and whether it is a placeholder.
+    :param slats: Dictionary of Slat objects
+    :param handle_keys: Iterable of (slat_key, position, side) tuples
+    :param snapshots: Dictionary to add the states to (handles already present are skipped)
+    """
+    placeholder_sets = {}
+    for key in handle_keys:
+        if key in snapshots:
+            continue
+        slat_key, position, side = key
+        slat = slats[slat_key]
+        if slat_key not in placeholder_sets:
+            placeholder_sets[slat_key] = set(slat.placeholder_list)
+        handles = slat.H2_handles if side == 2 else slat.H5_handles
+        handle_data = dict(handles[position]) if position in handles else None
+        snapshots[key] = (handle_data, f'handle|{position}|h{side}' in placeholder_sets[slat_key])
+    return snapshots
+
+
+def _restore_handle(slat, position, side, state):
+    """
+    Returns a single handle to a state previously captured with _snapshot_handles.
+    """
+    handle_data, is_placeholder = state
+    handles = slat.H2_handles if side == 2 else slat.H5_handles
+    if handle_data is None:
+        handles.pop(position, None)
+    else:
+        handles[position] = dict(handle_data)
+
+    placeholder_id = f'handle|{position}|h{side}'
+    if is_placeholder and placeholder_id not in slat.placeholder_list:
+        slat.placeholder_list.append(placeholder_id)
+    elif not is_placeholder and placeholder_id in slat.placeholder_list:
+        slat.placeholder_list.remove(placeholder_id)
+
+
+class HandleEdit:
+    """
+    A single (undoable) edit to a megastructure's handles, stored as the before/after state of every handle that changed.
+    """
+    def __init__(self, description, changes):
+        """
+        :param description: Short description of the edit (e.g. the method that made it)
+        :param changes: List of ((slat_key, position, side), state before, state after) tuples
+        """
+        self.description = description
+        self.changes = changes
+
+    @property
+    def handle_keys(self):
+        return [key for key, _, _ in self.changes]
+
+
+class HandleEditJournal:
+    """
+    Records the handle edits made to a megastructure (via its handle-setting methods), allowing edits to be undone/redone and
+    allowing downstream systems to find out which handles/slats changed since a given version of the design.
+
+    Each applied, undone or redone edit increases the journal version by one.  The handles changed at each version are
+    logged, so any state derived from the design (e.g. handle grids or slat scores) can be patched rather than rebuilt.
+    Only the last max_log_entries versions are kept in the log, unless an older version is held by a consumer (see hold).
+    """
+    def __init__(self, max_undo_steps=1000, max_log_entries=1000):
+        """
+        :param max_undo_steps: Maximum number of edits that can be undone (unlimited if None)
+        :param max_log_entries: Number of versions kept in the change log for consumers that do not hold a version (unlimited if None)
+        """
+        self.max_undo_steps = max_undo_steps
+        self.max_log_entries = max_log_entries
+        self.enabled = True
+        self.version = 0
+        self.undo_stack = []
+        self.redo_stack = []
+        self._log_versions = []  # version reached by each logged change
+        self._log_handle_keys = []  # handles changed to reach that version
+        self._log_start = 0  # changes from before this version are no longer available
+        self._held_versions = {}  # oldest version each registered consumer still needs changes from
+        self._open_snapshots = None  # states of the handles being edited, while an edit is in progress
+        self._open_undoable = True
+
+    def reset(self):
+        """
+        Clears the undo/redo history and the change log (the current state of the design becomes the new baseline).
+        """
+        self.undo_stack = []
+        self.redo_stack = []
+        self._log_versions = []
+        self._log_handle_keys = []
+        self._log_start = self.version
+
+    @property
+    def recording(self):
+        """
+        True while an edit is being recorded (i.e. its changes are not yet reflected in the journal version).
+        """
+        return self._open_snapshots is not None
+
+    @contextmanager
+    def record(self, description, slats, handle_keys, undoable=True):
+        """
+        Records all changes made to the provided handles within the context as a single edit.
+        Nested recordings are merged into the outermost one.  Nothing is recorded while the journal is disabled.
+        :param description: Short description of the edit
+        :param slats: Dictionary of Slat objects (as stored in Megastructure.slats)
+        :param handle_keys: Iterable of (slat_key, position, side) tuples for all handles that could be changed by the edit
+        :param undoable: If False, the changes are still logged (so that derived state can be updated) but cannot be undone
+        """
+        if not self.enabled:
+            yield
+            return
+        outermost = self._open_snapshots is None
+        if outermost:
+            self._open_snapshots = {}
+            self._open_undoable = undoable
+        self.capture(slats, handle_keys)
+        if not outermost:
+            yield
+            return
+
+        try:
+            yield
+        finally:
+            # changes are committed even if the edit fails part-way through, so that they can be undone
+            snapshots, self._open_snapshots = self._open_snapshots, None
+            after_snapshots = _snapshot_handles(slats, snapshots.keys(), {})
+            changes = [(key, before, after_snapshots[key]) for key, before in snapshots.items() if after_snapshots[key] != before]
+            if len(changes) > 0:
+                if self._open_undoable:
+                    self.undo_stack.append(HandleEdit(description, changes))
+                    if self.max_undo_steps is not None and len(self.undo_stack) > self.max_undo_steps:
+                        self.undo_stack.pop(0)
+                    self.redo_stack = []
+                self._log([key for key, _, _ in changes])
+
+    def capture(self, slats, handle_keys):
+        """
+        Adds handles to the edit currently being recorded, capturing their state before they are changed.  This allows
+        editing methods to register handles as they reach them, rather than collecting them all before the edit.
+        Does nothing if no edit is being recorded (e.g. if the journal is disabled).
+        :param slats: Dictionary of Slat objects
+        :param handle_keys: Iterable of (slat_key, position, side) tuples
+        """
+        if self._open_snapshots is not None:
+            _snapshot_handles(slats, handle_keys, self._open_snapshots)
+
+    def undo(self, slats):
+        """
+        Reverts the last recorded edit.
+        :param slats: Dictionary of Slat objects the edit was applied to
+        :return: The reverted edit (or None if there is nothing to undo)
+        """
+        if len(self.undo_stack) == 0:
+            return None
+        edit = self.undo_stack.pop()
+        for (slat_key, position, side), before, _ in reversed(edit.changes):
+            _restore_handle(slats[slat_key], position, side, before)
+        self.redo_stack.append(edit)
+        self._log(edit.handle_keys)
+        return edit
+
+    def redo(self, slats):
+        """
+        Re-applies the last undone edit.
+        :param slats: Dictionary of Slat objects the edit was applied to
+        :return: The re-applied edit (or None if there is nothing to redo)
+        """
+        if len(self.redo_stack) == 0:
+            return None
+        edit = self.redo_stack.pop()
+        for (slat_key, position, side), _, after in edit.changes:
+            _restore_handle(slats[slat_key], position, side, after)
+        self.undo_stack.append(edit)
+        self._log(edit.handle_keys)
+        return edit
+
+    def _log(self, handle_keys):
+        self.version += 1
+        self._log_versions.append(self.version)
+        self._log_handle_keys.append(handle_keys)
+        self._trim_log()
+
+    def _trim_log(self):
+        """
+        Drops logged changes that no consumer can still ask for (i.e. those older than both the log window and every held version).
+        """
+        floor = self._log_start if self.max_log_entries is None else self.version - self.max_log_entries
+        if len(self._held_versions) > 0:
+            floor = min(floor, min(self._held_versions.values()))
+        if floor <= self._log_start:
+            return
+        drop = bisect_right(self._log_versions, floor)
+        del self._log_versions[:drop]
+        del self._log_handle_keys[:drop]
+        self._log_start = floor
+
+    def hold(self, consumer, version=None):
+        """
+        Keeps the changes made after the provided version in the log until the consumer releases it or holds a newer version.
+        :param consumer: Any hashable ID for the consumer (e.g. a cache key)
+        :param version: Version the consumer will next compare against (the current version if None)
+        """
+        self._held_versions[consumer] = self.version if version is None else version
+        self._trim_log()
+
+    def release(self, consumer):
+        """
+        Releases the version held by a consumer (see hold), allowing older changes to be dropped from the log.
+        :param consumer: ID the version was held with
+        """
+        if self._held_versions.pop(consumer, None) is not None:
+            self._trim_log()
+
+    def changed_handles_since(self, version):
+        """
+        Returns all handles changed after the provided version of the design.
+        :param version: Journal version to compare against
+        :return: Set of (slat_key, position, side) tuples, or None if the changes from that version are no longer logged
+        """
+        if version < self._log_start or version > self.version:
+            return None
+        changed = set()
+        for handle_keys in self._log_handle_keys[bisect_right(self._log_versions, version):]:
+            changed.update(handle_keys)
+        return changed
+
+    def dirty_slats_since(self, version, consumer=None):
+        """
+        Returns the IDs of all slats with handles changed after the provided version of the design.
+        :param version: Journal version to compare against
+        :param consumer: If provided, the current version is held for this consumer (see hold) so that it can be compared against next
+        :return: Set of slat IDs, or None if the changes from that version are no longer logged
+        """
+        changed = self.changed_handles_since(version)
+        if consumer is not None:
+            self.hold(consumer)
+        if changed is None:
+            return None
+        return {slat_key for slat_key, _, _ in changed}
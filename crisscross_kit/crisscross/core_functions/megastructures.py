@@ -1,4 +1,3 @@
-import copy
 from collections import defaultdict, OrderedDict
 import numpy as np
 import matplotlib.pyplot as plt
@@ -9,9 +8,13 @@ import pandas as pd
 import platform
 import ast
 import re
+import time
 
 from crisscross.core_functions.handle_link_manager import HandleLinkManager
 from crisscross.core_functions.slats import get_slat_key, convert_slat_array_into_slat_objects, Slat
+from crisscross.core_functions.slat_tables import SlatTables, HandleTable, GridWindow, smallest_unsigned_dtype
+from crisscross.core_functions.handle_edit_journal import HandleEditJournal
+from crisscross.core_functions.binary_design_format import BINARY_DESIGN_EXTENSION, is_binary_design_file, export_binary_design, import_binary_design
 from crisscross.helper_functions import create_dir_if_empty, natural_sort_key
 from crisscross.helper_functions.slat_salient_quantities import connection_angles
 from crisscross.graphics.static_plots import create_graphical_slat_view, create_graphical_assembly_handle_view
@@ -68,13 +71,61 @@ def export_layer_orientations_to_list_format(layer_palette):
     return layer_interface_orientations
 
 
+def read_cargo_and_seed_sheets(design_df):
+    """
+    Extracts cargo and seed placements from the cargo/seed sheets of a design file.
+    :param design_df: Dictionary of design sheets (sheet name -> dataframe), as read by pd.read_excel
+    :return: Cargo dictionary (key = ((y, x), layer, orientation), value = cargo ID) and
+    seed dictionary (key = (seed ID, layer, orientation), value = list of (y, x, seed handle))
+    """
+    cargo_dict = {}
+    seed_dict = defaultdict(list)
+    for i, key in enumerate(design_df.keys()):
+        if 'cargo' in key:
+            layer = int(key.split('_')[2]) # e.g. cargo_layer_1_upper_h2
+            orientation = int(key.split('_')[4][-1])
+            cargo_array = design_df[key].values
+            cargo_coords = np.where(cargo_array != 0)  # only extracts a value if there is cargo present, reducing clutter
+            for y, x in zip(cargo_coords[0], cargo_coords[1]):
+                cargo_dict[((int(y), int(x)), layer, orientation)] = cargo_array[y, x]
+        if 'seed' in key:
+            if 'h' not in key:
+                print(Fore.RED + f'WARNING: Seed from imported file was not read in - please check format.')
+                break
+            layer = int(key.split('_')[2])  # e.g. seed_layer_1_upper_h2
+            orientation = int(key.split('_')[4][-1])
+            seed_coords = np.where(design_df[key].values != 0)  # only extracts a value if there is seed present, reducing clutter
+            for y, x in zip(seed_coords[0], seed_coords[1]):
+                position_id = design_df[key].values[y, x]
+                if isinstance(position_id, int):
+                    print(Fore.RED + f'WARNING: Seed from imported file was not read in - please check format.')
+                    break
+                seed_id = position_id.split('-')[0]
+                seed_handle = position_id.split('-', 1)[1].replace('-', '_')
+                seed_dict[(seed_id, layer, orientation)].append((y, x, seed_handle))
+
+    # warn if any seed has fewer than expected handles (5x16 = 80)
+    MINIMUM_SEED_HANDLES = 80
+    seed_handle_counts = {}
+    for (seed_id, layer, orientation), seed_data in seed_dict.items():
+        if seed_id not in seed_handle_counts:
+            seed_handle_counts[seed_id] = 0
+        seed_handle_counts[seed_id] += len(seed_data)
+    for seed_id, count in seed_handle_counts.items():
+        if count < MINIMUM_SEED_HANDLES:
+            print(Fore.YELLOW + f'WARNING: Seed "{seed_id}" has only {count} handles '
+                  f'(recommended: {MINIMUM_SEED_HANDLES}).' + Style.RESET_ALL)
+
+    return cargo_dict, seed_dict
+
+
 class Megastructure:
     """
     Convenience class that bundles the entire details of a megastructure including slat positions, seed handles and cargo.
     """
 
     def __init__(self, slat_array=None, slat_coordinate_dict=None, layer_interface_orientations=None,
-                 connection_angle='90', slat_type_dict=None, import_design_file=None):
+                 connection_angle='90', slat_type_dict=None, import_design_file=None, defer_cargo_and_seeds=False, parse_profile=False):
         """
         :param slat_array: Array of slat positions (3D - X,Y, layer ID) containing the positions of all slats in the design.
         :param slat_coordinate_dict: Dictionary of slat coordinates (key = (layer, slat ID), value = list of (y,x) coordinates).
@@ -85,14 +136,36 @@ class Megastructure:
         :param connection_angle: The angle at which the slats will be connected.  For now, only 90 and 60 grids are supported.
         :param slat_type_dict: Dictionary of slat types (key = (layer, slat ID), value = slat type string)
         :param import_design_file: If provided, the design will be imported from the specified file instead of being built from scratch.
+        Both Excel (.xlsx) and binary (.hcad) design files are accepted (the format is detected automatically).
+        :param defer_cargo_and_seeds: If True, cargo and seed sheets of an imported Excel design are only read in and applied when first needed
+        (e.g. for export, graphics or placeholder patching).  This speeds up loading for workflows that only require assembly handles (e.g. scoring or evolution).
+        :param parse_profile: If True, prints out the time taken to read each sheet of an imported design (also available in self.import_parse_profile).
         """
 
         if slat_coordinate_dict is None:
             slat_coordinate_dict = {}
 
+        # compiled handle link equivalence classes (see _compile_link_index), rebuilt whenever the link topology changes
+        self._link_index = {}
+        self._link_index_signature = None
+        self._slat_tables = None  # columnar slat/position tables (see get_slat_tables)
+        self._slat_tables_signature = None
+        self._handle_table = None  # columnar handle table (see get_handle_table)
+        self._handle_table_signature = None
+        self._deferred_handle_sheets = None  # (design file, sheet names) of cargo/seed sheets yet to be applied
+        self.import_parse_profile = {}
+
+        # all handle edits are recorded here (see undo/redo and get_dirty_slats)
+        self.edit_journal = HandleEditJournal()
+        self.edit_journal.enabled = False  # enabled once the initial design has been set up
+        # if enabled, grids are kept in memory and patched with each handle edit instead of being rebuilt (see materialise_grids)
+        self.materialise_handle_grids = False
+        self._grid_cache = {}
+        self._handle_cell_index = None
+
         # reads in all design details from file if available
         if import_design_file is not None:
-            slats, handle_arrays, seed_dict, cargo_dict, connection_angle, layer_palette, cargo_palette, hashcad_canvas_metadata, slat_grid_coords, link_manager = self.import_design(import_design_file)
+            slats, handle_arrays, seed_dict, cargo_dict, connection_angle, layer_palette, cargo_palette, hashcad_canvas_metadata, slat_grid_coords, link_manager = self.import_design(import_design_file, defer_cargo_and_seeds, parse_profile)
             self.layer_palette = layer_palette
             self.cargo_palette = cargo_palette
             self.hashcad_canvas_metadata = hashcad_canvas_metadata
@@ -169,6 +242,10 @@ class Megastructure:
         if len(cargo_dict) > 0:
             self.assign_cargo_handles_with_dict(cargo_dict)
 
+        # the initial handle assignments form the baseline of the edit history
+        self.edit_journal.reset()
+        self.edit_journal.enabled = True
+
     def assign_colormap_for_cargo(self, colormap='Dark2'):
         color_list = mpl.colormaps[colormap].colors
         for ind, cargo_key in enumerate(self.cargo_palette.keys()):
@@ -359,6 +436,8 @@ class Megastructure:
         # Set handle on the targeted slat if requested
         if not traverse_only:
             if handle_array is None:
+                # any handle edited here (or in the enforcement phase below) is added to the edit being recorded, if any
+                self.edit_journal.capture(self.slats, (access_key,))
                 if handle_val == 0:  # i.e. delete
                     slat.remove_handle(position, side)
                 else:
@@ -442,9 +521,11 @@ class Megastructure:
         if coordinate_to_slats is None:
             coordinate_to_slats = self._get_coordinate_to_slat_lookup()
 
-        self._recursive_propagate_handle(slat_key, position, side, handle_val, category, descriptor,
-                                        slats_updated, coordinate_to_slats=coordinate_to_slats,
-                                        dna_plates=sel_plates, suppress_warnings=suppress_warnings, root_entry=True)
+        # the propagated handles are captured by _recursive_propagate_handle as it reaches them
+        with self.edit_journal.record('smart_set_slat_handle', self.slats, []):
+            self._recursive_propagate_handle(slat_key, position, side, handle_val, category, descriptor,
+                                            slats_updated, coordinate_to_slats=coordinate_to_slats,
+                                            dna_plates=sel_plates, suppress_warnings=suppress_warnings, root_entry=True)
 
     def smart_handle_delete(self, slat_key, slat_position, slat_side, coordinate_to_slats=None):
         """
@@ -469,10 +550,398 @@ class Megastructure:
 
         target_category = slat.H2_handles[slat_position]['category'] if slat_side == 2 else slat.H5_handles[slat_position]['category']
 
-        self._recursive_propagate_handle(slat_key, slat_position, slat_side, 0, target_category, 'N/A',
-                                        slats_updated, coordinate_to_slats=coordinate_to_slats, root_entry=True)
+        with self.edit_journal.record('smart_handle_delete', self.slats, []):
+            self._recursive_propagate_handle(slat_key, slat_position, slat_side, 0, target_category, 'N/A',
+                                            slats_updated, coordinate_to_slats=coordinate_to_slats, root_entry=True)
+
+    def undo(self):
+        """
+        Reverts the last handle edit made to the design (via smart_set_slat_handle, smart_handle_delete,
+        batch_set_slat_handles or any of the methods that call these, placeholder patching or handle clearing).
+        :return: Description of the edit that was reverted, or None if there are no edits to undo
+        """
+        edit = self.edit_journal.undo(self.slats)
+        return None if edit is None else edit.description
+
+    def redo(self):
+        """
+        Re-applies the last handle edit reverted with undo.
+        :return: Description of the edit that was re-applied, or None if there are no edits to redo
+        """
+        edit = self.edit_journal.redo(self.slats)
+        return None if edit is None else edit.description
+
+    @property
+    def handle_edit_version(self):
+        """
+        Current version of the design's handles (increases by one with every handle edit, undo or redo).
+        """
+        return self.edit_journal.version
+
+    def get_dirty_slats(self, since_version, consumer=None):
+        """
+        Returns all slats with handles that changed after the provided version of the design (see handle_edit_version).
+        This allows downstream systems (e.g. scorers) to only update the slats that were edited.
+        Only a limited number of versions are kept by default, unless a consumer ID is provided.
+        :param since_version: Handle edit version to compare against
+        :param consumer: If provided, changes made after the current version are kept available to this consumer until its
+        next call (release with edit_journal.release(consumer) when no longer needed)
+        :return: Set of slat IDs, or None if changes from that version are not available (i.e. everything should be treated as dirty)
+        """
+        return self.edit_journal.dirty_slats_since(since_version, consumer=consumer)
+
+    def _get_handle_equivalence_class(self, slat_key, position, side, category, descriptor, coordinate_to_slats):
+        """
+        Collects all handles that receive the same value as the given handle (i.e. the set of handles
+        _recursive_propagate_handle would visit), with the category and descriptor each should receive.
+        :return: List of (slat_key, position, side, category, descriptor) tuples, starting with the given handle
+        """
+        members = [(slat_key, position, side, category, descriptor)]
+        visited = {(slat_key, position, side)}
+        index = 0
+        while index < len(members):
+            related_handles = self._get_related_handles(*members[index], coordinate_to_slats)
+            for rel_slat_key, rel_position, rel_side, rel_category, rel_descriptor in related_handles:
+                if (rel_slat_key, rel_position, rel_side) not in visited:
+                    visited.add((rel_slat_key, rel_position, rel_side))
+                    members.append((rel_slat_key, rel_position, rel_side, rel_category, rel_descriptor))
+            index += 1
+        return members
+
+    @staticmethod
+    def _resolve_plate_handle_data(handle_keys, plates):
+        """
+        Looks up the plate data of a set of handles, with each unique handle only looked up once.
+        :param handle_keys: Iterable of (category, position, side, value) tuples
+        :param plates: Plate object, or list of plates (searched in order, with the first plate containing the handle selected)
+        :return: Dictionary mapping each key to its (sequence, well, plate name, concentration), or None if the handle is unavailable
+        """
+        plate_list = plates if isinstance(plates, (list, tuple)) else [plates]
+        resolved = {}
+        for key in handle_keys:
+            if key in resolved:
+                continue
+            resolved[key] = None
+            for plate in plate_list:
+                if not isinstance(plate.get_sequence(*key), bool):
+                    resolved[key] = (plate.get_sequence(*key), plate.get_well(*key), plate.get_plate_name(*key), plate.get_concentration(*key))
+                    break
+        return resolved
+
+    def batch_set_slat_handles(self, slat_keys, positions, sides, handle_vals, categories, descriptors=None, sel_plates=None,
+                               propagate=True, suppress_warnings=False, coordinate_to_slats=None):
+        """
+        Sets a batch of handles in one go.  This gives the same result as calling smart_set_slat_handle
+        (or direct_handle_assign if propagate is False) for each handle in turn, but each equivalence class of linked handles
+        is only traversed once, each unique handle is only looked up in the plates once and overwrite warnings are summarised.
+        :param slat_keys: Slat ID of each handle
+        :param positions: Position of each handle on its slat (1-based)
+        :param sides: Side of each handle (2 or 5)
+        :param handle_vals: Value of each handle (a value of 0 deletes the handle)
+        :param categories: Category of each handle, or a single category for all handles
+        :param descriptors: Descriptor of each handle.  If not provided, the standard descriptor of each category is used
+        (not possible for seed handles, which need their seed ID in the descriptor).
+        :param sel_plates: Optional plate object to extract handle sequences from (otherwise, placeholders are set)
+        :param propagate: Set to True to propagate handles through phantom slats, handle links and layer attachments
+        :param suppress_warnings: If True, suppresses overwrite warnings
+        :param coordinate_to_slats: Dictionary mapping (y, x, layer) to (slat_key, position) (if not provided will be computed on-the-fly).
+        :return: N/A
+        """
+        if isinstance(categories, str):
+            categories = [categories] * len(slat_keys)
+        if not (len(slat_keys) == len(positions) == len(sides) == len(handle_vals) == len(categories)):
+            raise ValueError('All handle batch inputs need to be of the same length.')
+        if descriptors is None:
+            descriptor_lookup = {}
+            for handle_val, category in set(zip(handle_vals, categories)):
+                if category == 'SEED':
+                    raise ValueError('Seed handles require a descriptor containing their seed ID.')
+                elif category == 'FLAT':
+                    descriptor_lookup[(handle_val, category)] = 'Flat'
+                elif 'ASSEMBLY' in category:
+                    descriptor_lookup[(handle_val, category)] = 'Assembly|%s|%s' % (category.split('_')[-1].capitalize(), handle_val)
+                else:
+                    descriptor_lookup[(handle_val, category)] = '%s|%s' % (category.capitalize(), handle_val)
+            descriptors = [descriptor_lookup[key] for key in zip(handle_vals, categories)]
+
+        handle_batch = [(slat_key, int(position), int(side), handle_val, category, descriptor) for
+                        slat_key, position, side, handle_val, category, descriptor in
+                        zip(slat_keys, positions, sides, handle_vals, categories, descriptors)]
+        missing_slats = set(slat_keys) - self.slats.keys()
+        if len(missing_slats) > 0:
+            raise RuntimeError(f'Slat {missing_slats.pop()} not found in design.')
+
+        # expands the batch into the full list of handle updates
+        if not propagate:
+            updates = handle_batch
+        else:
+            for slat_key, position, side, _, category, _ in handle_batch:
+                if self.slats[slat_key].phantom_parent is not None and 'ASSEMBLY' not in category:
+                    raise RuntimeError('Cannot directly apply cargo/seed handle changes to phantom slats. '
+                                       'Apply changes to the reference slat instead.')
+
+            if coordinate_to_slats is None and any('ASSEMBLY' in category for category in categories):
+                coordinate_to_slats = self._get_coordinate_to_slat_lookup()
+
+            # a handle set later in the batch overwrites its entire class, so each class only needs to be traversed
+            # for the last handle assigned to it (classes differ depending on the propagation rules of the category)
+            def propagation_rules(category):
+                return 'physical' if 'ASSEMBLY' in category else ('phantom' if category in ('SEED', 'CARGO') else 'linked')
+
+            covered_handles = set()
+            class_updates = []
+            for slat_key, position, side, handle_val, category, descriptor in reversed(handle_batch):
+                rules = propagation_rules(category)
+                if (slat_key, position, side, rules) in covered_handles:
+                    continue
+                members = self._get_handle_equivalence_class(slat_key, position, side, category, descriptor, coordinate_to_slats)
+                covered_handles.update((m[0], m[1], m[2], rules) for m in members)
+
+                # enforced link values take precedence over the value being assigned
+                if category not in ('SEED', 'CARGO'):
+                    enforce_order = None
+                    for member in members:
+                        enforce_value = self.link_manager.get_enforce_value(member[:3])
+                        if enforce_value is not None:
+                            if enforce_order is not None and enforce_order != enforce_value:
+                                raise RuntimeError(f'Conflicting handle link enforcement values detected during propagation (check {member[:3]}).')
+                            enforce_order = enforce_value
+                    if enforce_order is not None and enforce_order != handle_val:
+                        members = [(m_key, m_position, m_side, m_category, m_descriptor.replace('|%s' % handle_val, '|%s' % enforce_order))
+                                   for m_key, m_position, m_side, m_category, m_descriptor in members]
+                        handle_val = enforce_order
+
+                class_updates.append([(m[0], m[1], m[2], handle_val, m[3], m[4]) for m in members])
+
+            updates = [update for class_update in reversed(class_updates) for update in class_update]
+
+        if sel_plates is not None:
+            plate_data = self._resolve_plate_handle_data([(u[4], u[1], u[2], u[3]) for u in updates if u[3] != 0], sel_plates)
+            missing_handles = [key for key, data in plate_data.items() if data is None]
+            if len(missing_handles) > 0:
+                raise RuntimeError(f'{len(missing_handles)} handles are not available in the plates provided (e.g. {missing_handles[0]}).')
+
+        # writes all handles directly into the slats' handle stores, slat by slat
+        updates_by_slat = defaultdict(list)
+        for slat_key, position, side, handle_val, category, descriptor in updates:
+            updates_by_slat[slat_key].append((position, side, handle_val, category, descriptor))
+
+        overwrite_count = 0
+        with self.edit_journal.record('batch_set_slat_handles', self.slats, [update[:3] for update in updates]):
+            for slat_key, slat_updates in updates_by_slat.items():
+                slat = self.slats[slat_key]
+                placeholders = set(slat.placeholder_list)
+                for position, side, handle_val, category, descriptor in slat_updates:
+                    if handle_val == 0:  # i.e. delete
+                        slat.remove_handle(position, side)
+                        placeholders.discard(f'handle|{position}|h{side}')
+                        continue
+                    if position < 1 or position > slat.max_length:
+                        raise RuntimeError('Handle ID out of range')
+                    if side == 2:
+                        handles = slat.H2_handles
+                    elif side == 5:
+                        handles = slat.H5_handles
+                    else:
+                        raise RuntimeError('Wrong slat side specified (only 2 or 5 available)')
+
+                    if position in handles:
+                        overwrite_count += 1
+                    if sel_plates is None:
+                        handles[position] = {'category': category, 'value': handle_val, 'descriptor': 'Placeholder|%s' % descriptor}
+                        placeholder_id = f'handle|{position}|h{side}'
+                        if placeholder_id not in placeholders:
+                            placeholders.add(placeholder_id)
+                            slat.placeholder_list.append(placeholder_id)
+                    else:
+                        sequence, well, plate_name, concentration = plate_data[(category, position, side, handle_val)]
+                        handles[position] = {'sequence': sequence, 'well': well, 'plate': plate_name, 'category': category,
+                                             'value': handle_val, 'concentration': concentration, 'descriptor': descriptor}
+
+        if overwrite_count > 0 and not suppress_warnings:
+            print(Fore.RED + f'WARNING: Overwrote {overwrite_count} existing handles.' + Fore.RESET)
 
-    def enforce_phantom_links_on_assembly_handle_array(self, handle_array, modify_in_place=True):
+    def _link_topology_signature(self):
+        """
+        Cheap fingerprint of everything that defines the handle link topology (slats, phantoms, link manager groups,
+        enforced values and blocks).  Used to detect when the compiled link index needs to be rebuilt.
+        """
+        link_manager = self.link_manager
+        return (tuple(map(id, self.slats.values())), id(link_manager),
+                hash(frozenset(link_manager.handle_link_to_group.items())),
+                hash(frozenset(link_manager.handle_group_to_value.items())),
+                hash(tuple(link_manager.handle_blocks)),
+                sum(len(phantoms) for phantoms in self.phantom_map.values()),
+                tuple((layer, info['top'], info['bottom']) for layer, info in sorted(self.layer_palette.items())))
+
+    def invalidate_link_index(self):
+        """
+        Discards the compiled handle link index, slat/handle tables and materialised grids.  Changes to slats, phantoms or the link manager are
+        detected automatically, but this must be called if slats are moved in-place (i.e. their coordinates are edited directly)
+        or if existing handles are overwritten directly on the slats (see get_handle_table and materialise_grids).
+        """
+        self._link_index = {}
+        self._link_index_signature = None
+        self._slat_tables = None
+        self._slat_tables_signature = None
+        self._handle_table = None
+        self._handle_table_signature = None
+        self._clear_grid_cache()
+        self._handle_cell_index = None
+
+    def materialise_grids(self, enable=True):
+        """
+        Keeps the slat occupancy and assembly handle grids of the design in memory.  Handle grids are then patched in place
+        with the handles changed by each edit (as recorded in the edit journal) instead of being rebuilt from all slats, which keeps
+        repeated grid/score requests fast when making small edits to large designs (e.g. in interactive design sessions).
+        While enabled, handles should only be edited through the Megastructure's methods (otherwise, call invalidate_link_index()).
+        :param enable: Set to False to stop materialising grids (and discard those in memory)
+        :return: N/A
+        """
+        self.materialise_handle_grids = enable
+        self._clear_grid_cache()
+        self._handle_cell_index = None
+
+    def _clear_grid_cache(self):
+        """
+        Discards all materialised grids, releasing the edit journal versions held by the handle grids.
+        """
+        for cache_key in self._grid_cache:
+            if cache_key[0] == 'handles':
+                self.edit_journal.release(cache_key)
+        self._grid_cache = {}
+
+    def get_slat_tables(self):
+        """
+        Returns the columnar slat and position tables of the design (see SlatTables), rebuilding them if slats have
+        been added, removed, replaced or re-oriented since the last call.
+        """
+        signature = tuple((id(slat), id(slat.slat_position_to_coordinate), len(slat.slat_position_to_coordinate),
+                           slat.layer, slat.phantom_parent, slat.non_assembly_slat, slat.slat_type) for slat in self.slats.values())
+        if signature != self._slat_tables_signature:
+            self._slat_tables = SlatTables(self.slats)
+            self._slat_tables_signature = signature
+        return self._slat_tables
+
+    def get_handle_table(self):
+        """
+        Returns a columnar snapshot of all handles currently assigned to the design's slats (see HandleTable).
+        The table is cached and rebuilt after any handle edit made through the Megastructure (as tracked by the edit journal),
+        or if handles are added to/removed from a slat or a slat's handle dictionaries are replaced.  Existing handles
+        that are overwritten directly on the slats are not detected (call invalidate_link_index() after doing so).
+        The returned table is shared, so should not be modified.
+        """
+        if not self.edit_journal.enabled or self.edit_journal.recording:
+            return HandleTable(self.slats)  # edits are not being versioned (yet)
+        signature = (self.edit_journal.version,
+                     tuple((id(slat), id(slat.H2_handles), len(slat.H2_handles), id(slat.H5_handles), len(slat.H5_handles))
+                           for slat in self.slats.values()))
+        if signature != self._handle_table_signature:
+            self._handle_table = HandleTable(self.slats)
+            self._handle_table_signature = signature
+        return self._handle_table
+
+    def _compile_link_index(self, handle_array_shape, window=None):
+        """
+        Compiles the handle link topology (phantom networks, physical layer attachments and link manager groups)
+        into equivalence classes over handle array cells, using a union-find pass over all slat handle positions.
+        :param handle_array_shape: Shape of the handle arrays the index will be applied to (y, x, layer_interface)
+        :param window: GridWindow the handle arrays cover (None if they cover the full canvas)
+        :return: Dictionary with the cell coordinates of all linked positions (sorted in the order positions are scanned
+        by the propagation algorithm), their class IDs and each class's enforced value (-1 if none, -2 if conflicting).
+        The class ID and flat cell index (-1 if not on the handle array) of every handle position are also provided, in
+        position table order with the H2 and H5 sides interleaved (i.e. 2 * position row + (side == 5)).
+        """
+        coordinate_to_slats = self._get_coordinate_to_slat_lookup()
+
+        # every handle position (on both sides of each slat) is a node in the link graph
+        node_ids = {}
+        for slat_key, slat in self.slats.items():
+            for position in slat.slat_position_to_coordinate:
+                for side in (2, 5):
+                    node_ids[(slat_key, position, side)] = len(node_ids)
+
+        parents = list(range(len(node_ids)))
+
+        def find(node):
+            while parents[node] != node:
+                parents[node] = parents[parents[node]]
+                node = parents[node]
+            return node
+
+        for access_key, node in node_ids.items():
+            related_handles = self._get_related_handles(*access_key, 'ASSEMBLY_HANDLE', 'N/A', coordinate_to_slats)
+            for rel_slat_key, rel_position, rel_side, _, _ in related_handles:
+                rel_node = node_ids.get((rel_slat_key, rel_position, rel_side))
+                if rel_node is not None:
+                    root_a, root_b = find(node), find(rel_node)
+                    if root_a != root_b:
+                        parents[root_b] = root_a
+
+        # each class takes on the enforced value of any of its members
+        class_enforced_values = {}
+        for access_key, node in node_ids.items():
+            enforce_value = self.link_manager.get_enforce_value(access_key)
+            if enforce_value is None:
+                continue
+            root = find(node)
+            if class_enforced_values.get(root, enforce_value) != enforce_value:
+                class_enforced_values[root] = -2  # conflicting values only raise an error if the class is actually used
+            else:
+                class_enforced_values[root] = enforce_value
+
+        node_roots = [find(node) for node in range(len(parents))]
+        roots = sorted(set(node_roots))
+        root_to_class = {root: index for index, root in enumerate(roots)}
+        node_classes = np.array([root_to_class[root] for root in node_roots], dtype=np.intp)
+        node_cells = np.full(len(node_ids), -1, dtype=np.intp)
+
+        # maps the nodes onto handle array cells
+        cell_classes = {}
+        for (slat_key, position, side), node in node_ids.items():
+            slat = self.slats[slat_key]
+            if side == self.layer_palette[slat.layer]['top']:
+                interface_idx = slat.layer - 1
+            elif side == self.layer_palette[slat.layer]['bottom']:
+                interface_idx = slat.layer - 2
+            else:
+                continue
+            if 0 <= interface_idx < handle_array_shape[2]:
+                coord = slat.slat_position_to_coordinate[position]
+                if window is not None:
+                    coord = (coord[0] - window.y_offset, coord[1] - window.x_offset)
+                    if not (0 <= coord[0] < handle_array_shape[0] and 0 <= coord[1] < handle_array_shape[1]):
+                        continue
+                cell_classes[(coord[0], coord[1], interface_idx)] = node_classes[node]
+                node_cells[node] = np.ravel_multi_index((coord[0], coord[1], interface_idx), handle_array_shape)
+
+        # cells are sorted in the order they are scanned (interface, then y, then x), which decides the propagated values
+        cells = sorted(cell_classes.keys(), key=lambda c: (c[2], c[0], c[1]))
+
+        return {'cells': tuple(np.array([c[i] for c in cells], dtype=np.intp) for i in range(3)),
+                'cell_classes': np.array([cell_classes[c] for c in cells], dtype=np.intp),
+                'class_enforced_values': np.array([class_enforced_values.get(root, -1) for root in roots], dtype=np.int64),
+                'node_classes': node_classes,
+                'node_cells': node_cells}
+
+    def get_link_index(self, handle_array_shape, window=None):
+        """
+        Returns the compiled handle link index of the design (see _compile_link_index).  This is cached on the megastructure
+        for each handle array shape (and window), and only recompiled when the link topology changes (see _link_topology_signature),
+        so it can be re-used by all handle arrays, mutation masks and evolution runs on the same design geometry.
+        :param handle_array_shape: Shape of the handle arrays the index will be applied to (y, x, layer_interface)
+        :param window: GridWindow the handle arrays cover (None if they cover the full canvas)
+        """
+        signature = self._link_topology_signature()
+        if signature != self._link_index_signature:
+            self._link_index = {}
+            self._link_index_signature = signature
+        index_key = (tuple(handle_array_shape), None if window is None else window.key)
+        if index_key not in self._link_index:
+            self._link_index[index_key] = self._compile_link_index(handle_array_shape, window)
+        return self._link_index[index_key]
+
+    def enforce_phantom_links_on_assembly_handle_array(self, handle_array, modify_in_place=True, window=None):
         """
         Synchronizes handle values across all linked positions in an assembly handle array.
 
@@ -486,61 +955,57 @@ class Megastructure:
         to ensure the handle array respects all linking constraints.
 
         Algorithm:
-        - Iterates through every non-zero position in the 3D handle array
-        - For each position, triggers _recursive_propagate_handle to propagate the value
-          through all linked handles (phantoms, physical attachments, explicit links)
-        - The recursion handles phantom networks, physical attachments, and explicit links
+        - The link topology is compiled once into equivalence classes of handle array cells (see _compile_link_index)
+          and only recompiled when the design's links change
+        - Each class takes on the value of its first non-zero cell (scanning by layer interface, then y, then x),
+          or its enforced value if it has one
+        - This is applied with a single vectorised gather/scatter over the array, producing the same result as
+          propagating each handle through _recursive_propagate_handle
 
         :param handle_array: 3D numpy array of handle values with shape (y, x, layer_interface)
         :param modify_in_place: If True, modifies the input array; if False, creates a copy
+        :param window: GridWindow covered by the handle array, if it has been cropped from the full canvas (see get_design_window)
         :return: Modified handle array with all links enforced
         """
 
         if not modify_in_place:
             handle_array = handle_array.copy()
 
-        handle_update_tracker = set()
-        coordinate_to_slats = self._get_coordinate_to_slat_lookup()
+        link_index = self.get_link_index(handle_array.shape, window)
 
-        # Iterate through all non-zero handles in the array
-        for layer_interface in range(handle_array.shape[2]):
-            for y in range(handle_array.shape[0]):
-                for x in range(handle_array.shape[1]):
-                    handle_value = int(handle_array[y, x, layer_interface])
+        cells, cell_classes = link_index['cells'], link_index['cell_classes']
+        if len(cell_classes) == 0:
+            return handle_array
 
-                    if handle_value == 0:
-                        continue
+        # gather: the first non-zero cell of each class (in scan order) decides its value
+        cell_values = handle_array[cells]
+        non_zero = cell_values != 0
+        active_classes, first_cells = np.unique(cell_classes[non_zero], return_index=True)
+        class_values = cell_values[non_zero][first_cells].astype(np.int64)
+
+        enforced_values = link_index['class_enforced_values'][active_classes]
+        if np.any(enforced_values == -2):
+            raise RuntimeError('Conflicting handle link enforcement values detected during propagation.')
+        class_values = np.where(enforced_values >= 0, enforced_values, class_values)
 
-                    # Interface N connects layer N+1 and layer N+2
-                    # Try both layers to find which slats this coordinate belongs to
-                    for layer in [layer_interface + 1, layer_interface + 2]:
-                        if (y, x, layer) in coordinate_to_slats:
-                            slat_key, position = coordinate_to_slats[(y, x, layer)]
-
-                            # Determine side
-                            if layer == layer_interface + 1:
-                                # Interface is above this layer -> top side
-                                side = self.layer_palette[layer]['top']
-                                category = 'ASSEMBLY_HANDLE' # Default category, will be flipped if needed during recursion (and isn't even used in handle array enforcement)
-                            else:
-                                # Interface is below this layer -> bottom side
-                                side = self.layer_palette[layer]['bottom']
-                                category = 'ASSEMBLY_ANTIHANDLE'
-
-                            descriptor = 'N/A'
-                            if (slat_key, position, side) not in handle_update_tracker:
-                                self._recursive_propagate_handle(slat_key, position, side, handle_value, category, descriptor,
-                                                                handle_update_tracker, coordinate_to_slats=coordinate_to_slats,
-                                                                handle_array=handle_array, root_entry=True)
+        # scatter: every cell in an active class is set to its class value
+        class_lookup = np.full(len(link_index['class_enforced_values']), -1, dtype=np.int64)
+        class_lookup[active_classes] = class_values
+        new_values = class_lookup[cell_classes]
+        update_mask = new_values >= 0
+        handle_array[tuple(c[update_mask] for c in cells)] = new_values[update_mask]
 
         return handle_array
 
-    def assign_assembly_handles(self, handle_arrays, crisscross_handle_plates=None, crisscross_antihandle_plates=None, suppress_warnings=False):
+    def assign_assembly_handles(self, handle_arrays, crisscross_handle_plates=None, crisscross_antihandle_plates=None, suppress_warnings=False,
+                                window=None):
         """
         Assigns crisscross handles to the slats based on the handle arrays provided. V.IMP - NO PHANTOM HANDLE VALIDATION OCCURS HERE, MAKE SURE TO DO THIS BEFORE RUNNING THIS FUNCTION.
         :param handle_arrays: 3D array of handle values (X, Y, layer) where each value corresponds to a handle ID.
         :param crisscross_handle_plates: Crisscross handle plates.  If not supplied, a placeholder will be added to the slat instead.
         :param crisscross_antihandle_plates: Crisscross anti-handle plates.  If not supplied, a placeholder will be added to the slat instead.
+        :param window: GridWindow covered by the handle arrays, if they have been cropped from the full canvas.
+        Slat positions outside the window are left unassigned.
         TODO: this function assumes the pattern is always handle -> antihandle -> handle -> antihandle etc. Can we make this customizable?
         :return: N/A
         """
@@ -548,54 +1013,53 @@ class Megastructure:
         if handle_arrays.shape[2] != len(self.layer_palette) - 1:
             raise RuntimeError('Need to specify the correct number of layers when assigning crisscross handles.')
 
-        for key, slat in self.slats.items():
-            sides = []
-            if slat.layer == 1:
-                sides.append('top')
-            elif slat.layer == len(self.layer_palette):
-                sides.append('bottom')
-            else:
-                sides.extend(['top', 'bottom'])
-
-            for slat_position_index in range(slat.max_length):
-                coords = slat.slat_position_to_coordinate[slat_position_index + 1]
-                for side in sides:
-                    slat_side = self.layer_palette[slat.layer][side]
-                    if side == 'top':
-                        handle_val = int(handle_arrays[coords[0], coords[1], slat.layer-1])
-                        sel_plates = crisscross_handle_plates
-                        category = 'HANDLE'
-                    else:
-                        handle_val = int(handle_arrays[coords[0], coords[1], slat.layer-2])
-                        sel_plates = crisscross_antihandle_plates
-                        category = 'ANTIHANDLE'
-                    if handle_val > 0:
-                        self.direct_handle_assign(slat, slat_position_index + 1, slat_side, str(handle_val), 'ASSEMBLY_%s' % category, 'Assembly|%s|%s' % (category.capitalize(), handle_val), sel_plates, suppress_warnings=suppress_warnings)
+        # handle values for all slat positions are gathered directly from the position table, layer by layer
+        tables = self.get_slat_tables()
+        position_layers = tables.slat_layers[tables.position_slat_index]
+        layer_count = len(self.layer_palette)
+        ys, xs, in_window = self._window_coordinates(tables, window)
+
+        for side, category, sel_plates in [('top', 'HANDLE', crisscross_handle_plates), ('bottom', 'ANTIHANDLE', crisscross_antihandle_plates)]:
+            slat_keys, positions, sides, handle_vals = [], [], [], []
+            for layer in range(1, layer_count + 1):
+                # the bottom layer only has handles on top, and the top layer only has antihandles below
+                if (side == 'top' and layer == layer_count and layer != 1) or (side == 'bottom' and layer == 1):
+                    continue
+                rows = np.flatnonzero((position_layers == layer) & in_window)
+                layer_values = handle_arrays[ys[rows], xs[rows], layer - 1 if side == 'top' else layer - 2].astype(int)
+                rows, layer_values = rows[layer_values > 0], layer_values[layer_values > 0]
+                slat_keys.extend(tables.slat_keys[i] for i in tables.position_slat_index[rows])
+                positions.extend(tables.positions[rows].tolist())
+                sides.extend([self.layer_palette[layer][side]] * len(rows))
+                handle_vals.extend(str(value) for value in layer_values.tolist())
+
+            self.batch_set_slat_handles(slat_keys, positions, sides, handle_vals, 'ASSEMBLY_%s' % category, sel_plates=sel_plates,
+                                        propagate=False, suppress_warnings=suppress_warnings)
 
     def clear_all_assembly_handles(self):
-        for slat in self.slats.values():
+        marked_for_deletion = []
+        for key, slat in self.slats.items():
             for side in [2,5]:
                 if side == 2:
                     handles = slat.H2_handles
                 else:
                     handles = slat.H5_handles
-                marked_for_deletion = []
-                for key, val in handles.items():
+                for position, val in handles.items():
                     if 'ASSEMBLY' in val['category']:
-                        marked_for_deletion.append(key)
-                for key in marked_for_deletion:
-                    slat.remove_handle(key, side)
+                        marked_for_deletion.append((key, position, side))
+
+        with self.edit_journal.record('clear_all_assembly_handles', self.slats, marked_for_deletion):
+            for key, position, side in marked_for_deletion:
+                self.slats[key].remove_handle(position, side)
 
     def clear_all_handles(self):
-        for slat in self.slats.values():
-            for side in [2,5]:
-                if side == 2:
-                    handles = slat.H2_handles
-                else:
-                    handles = slat.H5_handles
+        self._deferred_handle_sheets = None  # deferred cargo/seed handles would be cleared too
+        all_handles = [(key, position, side) for key, slat in self.slats.items()
+                       for side, handles in ((2, slat.H2_handles), (5, slat.H5_handles)) for position in handles.keys()]
 
-                for key in list(handles.keys()):
-                    slat.remove_handle(key, side)
+        with self.edit_journal.record('clear_all_handles', self.slats, all_handles):
+            for key, position, side in all_handles:
+                self.slats[key].remove_handle(position, side)
 
     def assign_seed_handles(self, seed_dict, seed_plate=None):
         """
@@ -603,7 +1067,7 @@ class Megastructure:
         """
 
         slat_occupancy_grid = self.generate_slat_occupancy_grid()
-        slat_lookup = self._get_coordinate_to_slat_lookup()
+        slat_keys, positions, sides, handle_ids, descriptors = [], [], [], [], []
 
         for (seed_id, layer, side), seed_data in seed_dict.items():
             for (y, x, handle_id) in seed_data:
@@ -620,140 +1084,314 @@ class Megastructure:
                         if not isinstance(seed_plate.get_sequence(slat_position, side, handle_id), str):
                             raise RuntimeError('Seed plate selected cannot support placement on canvas.')
 
-                    self.smart_set_slat_handle(selected_slat.ID, slat_position, side, handle_id, 'SEED', 'Seed|%s|%s' % (handle_id, seed_id), sel_plates=seed_plate, coordinate_to_slats=slat_lookup)
+                    slat_keys.append(selected_slat.ID)
+                    positions.append(slat_position)
+                    sides.append(side)
+                    handle_ids.append(handle_id)
+                    descriptors.append('Seed|%s|%s' % (handle_id, seed_id))
+
+        self.batch_set_slat_handles(slat_keys, positions, sides, handle_ids, 'SEED', descriptors, sel_plates=seed_plate)
+
+    def get_design_window(self, padding=0):
+        """
+        Returns the bounding box of all slats in the design as a GridWindow.  Grids generated within this window
+        (see the window argument of generate_slat_occupancy_grid, generate_assembly_handle_grid etc.) contain the
+        same information as full canvas grids, but their size scales with the area taken up by the slats rather than the canvas.
+        :param padding: Number of extra rows/columns to include on each side of the bounding box (clipped to the canvas)
+        :return: GridWindow (covering the full canvas if the design has no slats)
+        """
+        slat_tables = self.get_slat_tables()
+        canvas_shape = (self.slat_grid_coords[0], self.slat_grid_coords[1])
+        if len(slat_tables.ys) == 0:
+            return GridWindow(0, 0, canvas_shape[0], canvas_shape[1], canvas_shape)
+        y_min = max(int(slat_tables.ys.min()) - padding, 0)
+        x_min = max(int(slat_tables.xs.min()) - padding, 0)
+        y_max = min(int(slat_tables.ys.max()) + padding + 1, canvas_shape[0])
+        x_max = min(int(slat_tables.xs.max()) + padding + 1, canvas_shape[1])
+        return GridWindow(y_min, x_min, y_max - y_min, x_max - x_min, canvas_shape)
+
+    def _grid_shape(self, layer_count, window=None):
+        if window is None:
+            return self.slat_grid_coords[0], self.slat_grid_coords[1], layer_count
+        return window.height, window.width, layer_count
+
+    @staticmethod
+    def _window_coordinates(slat_tables, window=None):
+        """
+        Returns the coordinates of all slat table positions within a window, and a mask of the positions that fall inside it.
+        """
+        if window is None:
+            return slat_tables.ys, slat_tables.xs, np.ones(len(slat_tables.ys), dtype=bool)
+        in_window = window.contains(slat_tables.ys, slat_tables.xs)
+        ys, xs = window.to_window(slat_tables.ys.astype(np.intp), slat_tables.xs.astype(np.intp))
+        return np.where(in_window, ys, 0), np.where(in_window, xs, 0), in_window
 
-    def generate_slat_occupancy_grid(self, use_original_slat_array=False, category='original_slats'):
+    def generate_slat_occupancy_grid(self, use_original_slat_array=False, category='original_slats', window=None, compact=False):
         """
         Generates a 3D occupancy grid of the slats in the design.
         :param use_original_slat_array: If True, uses the original slat array instead of the current slat state.
         :param category: 'original_slats', 'phantom_slats' or 'all_slats' - for phantoms, the phantom parent IDs are used.
+        :param window: If provided, the grid only covers this GridWindow of the canvas (see get_design_window).
+        :param compact: If True, the grid uses the smallest unsigned integer dtype that can hold all slat IDs (at least uint16).
         :return: 3D numpy array with slat IDs at each position (X, Y, layer)
         """
 
         if use_original_slat_array and category == 'original_slats':
-            return self.original_slat_array
-        if use_original_slat_array and category == 'phantom_slats':
-            return self.original_phantom_array
+            occupancy_grid = self.original_slat_array
+        elif use_original_slat_array and category == 'phantom_slats':
+            occupancy_grid = self.original_phantom_array
         elif use_original_slat_array:
             raise RuntimeError('use_original_slat_array can only be True when category is original_slats or phantom_slats.')
-
-        occupancy_grid = np.zeros((self.slat_grid_coords[0], self.slat_grid_coords[1], len(self.layer_palette)), dtype=int)
-
-        for key, slat in self.slats.items():
-            if not slat.non_assembly_slat:
-
-                if category == 'original_slats' and slat.phantom_parent is not None:
-                    continue
-                if category == 'phantom_slats' and slat.phantom_parent is None:
-                    continue
-
-                for y, x in slat.slat_coordinate_to_position.keys():
-                    if slat.phantom_parent is not None:
-                        occupancy_grid[y, x, slat.layer - 1] = int(slat.phantom_parent.split('slat')[-1])
-                    else:
-                        occupancy_grid[y, x, slat.layer - 1] = int(slat.ID.split('slat')[-1])
-
+        if use_original_slat_array:
+            if window is not None:
+                occupancy_grid = window.crop(occupancy_grid)
+            if compact:
+                occupancy_grid = occupancy_grid.astype(smallest_unsigned_dtype(int(occupancy_grid.max(initial=0))))
+            return occupancy_grid
+
+        slat_tables = self.get_slat_tables()
+        if compact:
+            dtype = smallest_unsigned_dtype(int(slat_tables.slat_numbers.max(initial=0)))
+        else:
+            dtype = int
+        occupancy_grid = np.zeros(self._grid_shape(len(self.layer_palette), window), dtype=dtype)
+
+        cache_key = ('occupancy', category, None if window is None else window.key)
+        if self.materialise_handle_grids:
+            # the occupancy grid only changes with the slat tables, so can be re-used until these are rebuilt
+            cached_grid = self._grid_cache.get(cache_key)
+            if cached_grid is not None and cached_grid[0] is slat_tables and cached_grid[1].shape == occupancy_grid.shape:
+                return cached_grid[1].astype(dtype)
+        selected_slats = slat_tables.slat_selection(category, assembly_only=True)
+        if np.any(slat_tables.slat_numbers[selected_slats] < 0):
+            bad_key = slat_tables.slat_keys[int(np.argmax(selected_slats & (slat_tables.slat_numbers < 0)))]
+            raise ValueError(f'Slat {bad_key} does not have a numeric slat ID and cannot be placed in an occupancy grid.')
+
+        # all positions are placed with a single scatter (phantoms take on the ID of their parent)
+        ys, xs, in_window = self._window_coordinates(slat_tables, window)
+        selected_positions = selected_slats[slat_tables.position_slat_index] & in_window
+        position_slats = slat_tables.position_slat_index[selected_positions]
+        occupancy_grid[ys[selected_positions], xs[selected_positions],
+                       slat_tables.slat_layers[position_slats] - 1] = slat_tables.slat_numbers[position_slats]
+
+        if self.materialise_handle_grids:
+            self._grid_cache[cache_key] = (slat_tables, occupancy_grid.copy())
         return occupancy_grid
 
-    def generate_assembly_handle_grid(self, category='original_slats', create_mutation_mask=False):
+    def generate_assembly_handle_grid(self, category='original_slats', create_mutation_mask=False, window=None, compact=False):
         """
         Generates a 3D occupancy grid of the assembly handles in the design.
         :param category: 'original_slats', 'phantom_slats' or 'all_slats'
         :param create_mutation_mask: If True, creates an integer mask indicating positions that can be mutated.
         Areas with linked handles are given the same integers.  These integers have nothing to do with handle IDs.
+        :param window: If provided, the grid only covers this GridWindow of the canvas (see get_design_window).
+        :param compact: If True, handle grids are returned as uint16 arrays (the dtype used for handle arrays during evolution).
         :return: 3D numpy array with handle IDs at each position (X, Y, layer)
         """
 
-        handle_grid = np.zeros((self.slat_grid_coords[0], self.slat_grid_coords[1], len(self.layer_palette)-1), dtype=int)
+        handle_grid = np.zeros(self._grid_shape(len(self.layer_palette) - 1, window), dtype=int)
 
-        if create_mutation_mask:
-            handle_update_tracker = set()
-            coordinate_to_slats = self._get_coordinate_to_slat_lookup()
-            next_integer = 1
+        if not create_mutation_mask:
+            if self.materialise_handle_grids and self.edit_journal.enabled and window is None:
+                handle_grid = self._get_materialised_handle_grid(category).copy()
+            else:
+                handle_grid = self._scatter_assembly_handles(handle_grid, category, window)
+            return handle_grid.astype(np.uint16) if compact else handle_grid
 
-        for key, slat in self.slats.items():
+        return self._build_mutation_mask(handle_grid, category, window)
 
-            if category == 'original_slats' and slat.phantom_parent is not None:
-                continue
-            if category == 'phantom_slats' and slat.phantom_parent is None:
-                continue
+    def _build_mutation_mask(self, handle_grid, category, window=None):
+        """
+        Builds the mutation mask of the selected slats in a single pass over the compiled handle link classes
+        (see get_link_index).  Each class containing an assembly handle is numbered in the order its first handle is
+        found (slat order, then H2 before H5, then position), and all positions in the class are given that number
+        (or 0 if the class has an enforced value, as these positions cannot be mutated).
+        """
+        link_index = self.get_link_index(handle_grid.shape, window)
+        slat_tables = self.get_slat_tables()
+        handle_table = self.get_handle_table()
+        selected_slats = slat_tables.slat_selection(category)
+
+        selected = (handle_table.category_mask('ASSEMBLY') & (handle_table.values != 0) &
+                    selected_slats[handle_table.slat_index])
+        rows = slat_tables.lookup_rows(handle_table.slat_index[selected], handle_table.positions[selected])
+        handle_classes = link_index['node_classes'][2 * rows + (handle_table.sides[selected] == 5)]
+
+        # classes are numbered by first encounter, with blocked/enforced classes still using up a number
+        active_classes, first_seen = np.unique(handle_classes, return_index=True)
+        class_numbers = np.zeros(len(link_index['class_enforced_values']), dtype=int)
+        class_numbers[active_classes[np.argsort(first_seen)]] = np.arange(1, len(active_classes) + 1)
+        class_numbers[link_index['class_enforced_values'] != -1] = 0
+        active = np.zeros(len(class_numbers), dtype=bool)
+        active[active_classes] = True
+
+        node_classes, node_cells = link_index['node_classes'], link_index['node_cells']
+        node_selected = active[node_classes] & (node_cells >= 0) & np.repeat(selected_slats[slat_tables.position_slat_index], 2)
+        handle_grid.reshape(-1)[node_cells[node_selected]] = class_numbers[node_classes[node_selected]]
+        return handle_grid
 
-            for side in [2, 5]:
-                for handle_position, handle_data in slat.get_sorted_handles('h%s' % side):
-                    if 'ASSEMBLY' in handle_data['category']:
-                        y, x = slat.slat_position_to_coordinate[handle_position]
-                        if self.layer_palette[slat.layer]['top'] == side:
-                            handle_layer = slat.layer - 1
-                        else:
-                            handle_layer = slat.layer - 2
-
-                        # this still allows the export of designs with handles that aren't shared between two layers
-                        if not create_mutation_mask:
-                            if handle_grid[y, x, handle_layer] != 0 and int(handle_data['value']) != 0 and handle_grid[y, x, handle_layer] != int(handle_data['value']):
-                                raise RuntimeError('There is a handle conflict at position (%d, %d) on assembly handle layer %d. '
-                                                   'Handle %s conflicts with existing handle %s.' %
-                                                   (y, x, handle_layer, handle_data['value'], handle_grid[y, x, handle_layer]))
-
-                        if int(handle_data['value']) != 0:
-                            if create_mutation_mask:
-                                if (key, handle_position, side) not in handle_update_tracker:
-
-                                    # here, the recursive search tree is traversed to find out which handles will be linked together (crossovers, links, phantoms, etc.)
-                                    traversal_tree = set()
-                                    self._recursive_propagate_handle(key, handle_position, side, int(handle_data['value']),
-                                                                     handle_data['category'],
-                                                                     handle_data['descriptor'],
-                                                                     handle_update_tracker,
-                                                                     coordinate_to_slats=coordinate_to_slats,
-                                                                     root_entry=True, traversal_tree=traversal_tree,
-                                                                     traverse_only=True)
-
-                                    # next, assign the same integer to all linked handles in the traversal tree, which will notify mutation systems that these handles will all end up with the same value
-                                    blank_op = False
-                                    for access_key in traversal_tree:
-                                        traverse_slat_key, traverse_position, traverse_side = access_key
-                                        slat_ref = self.slats[traverse_slat_key]
-
-                                        if self.link_manager.get_enforce_value(access_key) is not None:
-                                            blank_op = True
-                                            break
-
-                                        if category == 'original_slats' and slat_ref.phantom_parent is not None:
-                                            continue
-                                        if category == 'phantom_slats' and slat_ref.phantom_parent is None:
-                                            continue
-
-                                        coord = slat_ref.slat_position_to_coordinate[traverse_position]
-                                        if self.layer_palette[slat_ref.layer]['top'] == traverse_side:
-                                            layer_idx = slat_ref.layer - 1
-                                        else:
-                                            layer_idx = slat_ref.layer - 2
-                                        handle_grid[coord[0], coord[1], layer_idx] = next_integer
-
-                                    if blank_op:
-                                        handle_grid[handle_grid == next_integer] = 0
-
-                                    next_integer += 1
-                            else:
-                                handle_grid[y, x, handle_layer] = int(handle_data['value'])
+    def _scatter_assembly_handles(self, handle_grid, category, window=None):
+        """
+        Places all assembly handles of the selected slats into a handle grid with a single scatter (using the slat/handle tables).
+        """
+        slat_tables = self.get_slat_tables()
+        handle_table = self.get_handle_table()
+
+        selected = handle_table.category_mask('ASSEMBLY') & slat_tables.slat_selection(category)[handle_table.slat_index]
+        if window is not None:
+            ys, xs = slat_tables.lookup_coordinates(handle_table.slat_index[selected], handle_table.positions[selected])
+            selected[selected] = window.contains(ys, xs)
+        slat_index = handle_table.slat_index[selected]
+        sides = handle_table.sides[selected]
+        values = handle_table.values[selected]
+
+        ys, xs = slat_tables.lookup_coordinates(slat_index, handle_table.positions[selected])
+        if window is not None:
+            ys, xs = window.to_window(ys.astype(np.intp), xs.astype(np.intp))
+        top_sides = np.array([self.layer_palette[layer]['top'] for layer in slat_tables.slat_layers[slat_index]], dtype=np.int8)
+        handle_layers = np.where(sides == top_sides, slat_tables.slat_layers[slat_index] - 1, slat_tables.slat_layers[slat_index] - 2)
+
+        # handles that aren't shared between two layers are still allowed, but two different non-zero values on the same position are not
+        non_zero = values != 0
+        handle_layers = np.where(handle_layers < 0, handle_layers + handle_grid.shape[2], handle_layers)  # mirrors numpy's negative indexing
+        cells = np.ravel_multi_index((ys[non_zero], xs[non_zero], handle_layers[non_zero]), handle_grid.shape)
+        cell_values = values[non_zero]
+        _, first_rows, cell_groups = np.unique(cells, return_index=True, return_inverse=True)
+        conflicts = np.nonzero(cell_values != cell_values[first_rows][cell_groups])[0]
+        if len(conflicts) > 0:
+            y, x, handle_layer = np.unravel_index(cells[conflicts[0]], handle_grid.shape)
+            raise RuntimeError('There is a handle conflict at position (%d, %d) on assembly handle layer %d. '
+                               'Handle %s conflicts with existing handle %s.' %
+                               (y, x, handle_layer, cell_values[conflicts[0]], cell_values[first_rows][cell_groups[conflicts[0]]]))
+
+        handle_grid.reshape(-1)[cells] = cell_values
+        return handle_grid
 
+    def _get_materialised_handle_grid(self, category):
+        """
+        Returns the in-memory assembly handle grid of the selected slats, patching it with all handles edited since it was
+        last requested (or building it from scratch if the slats have changed since).
+        """
+        slat_tables = self.get_slat_tables()
+        shape = (self.slat_grid_coords[0], self.slat_grid_coords[1], len(self.layer_palette) - 1)
+        layer_sides = tuple((layer, info['top']) for layer, info in sorted(self.layer_palette.items()))
+
+        # removed from the cache while being patched, in case patching fails (e.g. due to a handle conflict)
+        cached_grid = self._grid_cache.pop(('handles', category), None)
+        handle_grid = None
+        if cached_grid is not None and cached_grid[0] is slat_tables and cached_grid[1] == layer_sides and cached_grid[3].shape == shape:
+            changed_handles = self.edit_journal.changed_handles_since(cached_grid[2])
+            if changed_handles is not None and self._patch_handle_grid(cached_grid[3], category, changed_handles, layer_sides):
+                handle_grid = cached_grid[3]
+
+        if handle_grid is None:
+            handle_grid = self._scatter_assembly_handles(np.zeros(shape, dtype=int), category)
+        self._grid_cache[('handles', category)] = (slat_tables, layer_sides, self.edit_journal.version, handle_grid)
+        self.edit_journal.hold(('handles', category))  # keeps the changes needed to patch this grid next time
         return handle_grid
 
+    def _get_handle_cell_index(self, shape, layer_sides):
+        """
+        Sorted index of the slat handles that map onto each cell of an assembly handle grid (up to one handle from the layer
+        below and one from the layer above), following the same layer rules as _scatter_assembly_handles.
+        """
+        slat_tables = self.get_slat_tables()
+        if self._handle_cell_index is not None and self._handle_cell_index[0] is slat_tables and self._handle_cell_index[1] == (shape, layer_sides):
+            return self._handle_cell_index[2]
+
+        top_side_lookup = dict(layer_sides)
+        position_layers = slat_tables.slat_layers[slat_tables.position_slat_index].astype(np.int64)
+        top_sides = np.array([top_side_lookup.get(layer, -1) for layer in slat_tables.slat_layers.tolist()],
+                             dtype=np.int64)[slat_tables.position_slat_index]
+        in_grid = (slat_tables.ys < shape[0]) & (slat_tables.xs < shape[1])
+
+        cells, slat_indices, positions, sides = [], [], [], []
+        for handle_sides, handle_layers in ((top_sides, position_layers - 1), (7 - top_sides, position_layers - 2)):
+            handle_layers = np.where(handle_layers < 0, handle_layers + shape[2], handle_layers)
+            valid = in_grid & (handle_layers >= 0) & (handle_layers < shape[2])
+            cells.append(np.ravel_multi_index((slat_tables.ys[valid], slat_tables.xs[valid], handle_layers[valid]), shape))
+            slat_indices.append(slat_tables.position_slat_index[valid])
+            positions.append(slat_tables.positions[valid])
+            sides.append(handle_sides[valid])
+        cells, slat_indices, positions, sides = (np.concatenate(column) for column in (cells, slat_indices, positions, sides))
+
+        # within each cell, handles are ordered as in the handle table (slat, then side, then position)
+        order = np.lexsort((positions, sides, slat_indices, cells))
+        cell_index = {'cells': cells[order], 'slat_indices': slat_indices[order], 'positions': positions[order], 'sides': sides[order],
+                      'key_to_index': {key: index for index, key in enumerate(slat_tables.slat_keys)}}
+        self._handle_cell_index = (slat_tables, (shape, layer_sides), cell_index)
+        return cell_index
+
+    def _patch_handle_grid(self, handle_grid, category, changed_handles, layer_sides):
+        """
+        Updates an assembly handle grid in place with the current value of all the cells affected by a set of handle changes.
+        :return: True if the grid was patched, False if it needs to be rebuilt instead
+        """
+        slat_tables = self.get_slat_tables()
+        cell_index = self._get_handle_cell_index(handle_grid.shape, layer_sides)
+        top_side_lookup = dict(layer_sides)
+
+        affected_cells = set()
+        for slat_key, position, side in changed_handles:
+            if slat_key not in cell_index['key_to_index']:
+                return False
+            slat = self.slats[slat_key]
+            handle_layer = slat.layer - 1 if side == top_side_lookup.get(slat.layer) else slat.layer - 2
+            if handle_layer < 0:
+                handle_layer += handle_grid.shape[2]
+            if position not in slat.slat_position_to_coordinate or not 0 <= handle_layer < handle_grid.shape[2]:
+                return False
+            y, x = slat.slat_position_to_coordinate[position]
+            if y >= handle_grid.shape[0] or x >= handle_grid.shape[1]:
+                return False
+            affected_cells.add(int(np.ravel_multi_index((y, x, handle_layer), handle_grid.shape)))
+
+        # each affected cell is recomputed from all the handles that map onto it
+        selected_slats = slat_tables.slat_selection(category)
+        cell_starts = np.searchsorted(cell_index['cells'], sorted(affected_cells), side='left')
+        cell_ends = np.searchsorted(cell_index['cells'], sorted(affected_cells), side='right')
+        for cell, start, end in zip(sorted(affected_cells), cell_starts, cell_ends):
+            cell_value = 0
+            for entry in range(start, end):
+                slat_index = cell_index['slat_indices'][entry]
+                if not selected_slats[slat_index]:
+                    continue
+                slat = self.slats[slat_tables.slat_keys[slat_index]]
+                handles = slat.H2_handles if cell_index['sides'][entry] == 2 else slat.H5_handles
+                handle_data = handles.get(int(cell_index['positions'][entry]))
+                if handle_data is None or 'ASSEMBLY' not in handle_data['category']:
+                    continue
+                try:
+                    value = int(handle_data['value'])
+                except (TypeError, ValueError):
+                    value = -1
+                if value == 0:
+                    continue
+                if cell_value != 0 and value != cell_value:
+                    y, x, handle_layer = np.unravel_index(cell, handle_grid.shape)
+                    raise RuntimeError('There is a handle conflict at position (%d, %d) on assembly handle layer %d. '
+                                       'Handle %s conflicts with existing handle %s.' % (y, x, handle_layer, value, cell_value))
+                cell_value = value
+            handle_grid[np.unravel_index(cell, handle_grid.shape)] = cell_value
+        return True
+
     def generate_seed_coordinates(self):
+        self.load_deferred_handles()
 
         seed_coordinate_dict = defaultdict(list)
         for key, slat in self.slats.items():
             if slat.phantom_parent is not None:
                 continue
-            for side in [2, 5]:
-                for handle_position, handle_data in slat.get_sorted_handles('h%s' % side):
-                    if 'SEED' in handle_data['category']:
-                        y, x = slat.slat_position_to_coordinate[handle_position]
-                        seed_coordinate_dict[(slat.layer, handle_data['descriptor'].split('|')[-1])].append((y, x))
+            for handles in [slat.H2_handles, slat.H5_handles]:
+                # only seed handles need to be sorted
+                for handle_position in sorted(p for p, h in handles.items() if 'SEED' in h['category']):
+                    y, x = slat.slat_position_to_coordinate[handle_position]
+                    seed_coordinate_dict[(slat.layer, handles[handle_position]['descriptor'].split('|')[-1])].append((y, x))
 
         return seed_coordinate_dict
 
     def generate_cargo_coordinates(self):
+        self.load_deferred_handles()
 
         cargo_coodinate_dict = defaultdict(list)
         for key, slat in self.slats.items():
@@ -778,7 +1416,7 @@ class Megastructure:
         slat_occupancy_grid = self.generate_slat_occupancy_grid()
         default_colors = mpl.colormaps['Dark2'].colors
         next_color = 0
-        slat_lookup = self._get_coordinate_to_slat_lookup()
+        slat_keys, positions, sides, cargo_values = [], [], [], []
 
         for key, cargo_value in cargo_dict.items():
             y_pos = key[0][0]
@@ -806,7 +1444,12 @@ class Megastructure:
                 self.cargo_palette[cargo_value] = {'short name': cargo_value[0:2].upper(), 'color': default_colors[next_color]}
                 next_color = (next_color + 1) % len(default_colors)
 
-            self.smart_set_slat_handle(selected_slat.ID, slat_position, handle_orientation, cargo_value, 'CARGO', 'Cargo|%s' % cargo_value, sel_plates=cargo_plate, coordinate_to_slats=slat_lookup)
+            slat_keys.append(selected_slat.ID)
+            positions.append(slat_position)
+            sides.append(handle_orientation)
+            cargo_values.append(cargo_value)
+
+        self.batch_set_slat_handles(slat_keys, positions, sides, cargo_values, 'CARGO', sel_plates=cargo_plate)
 
     def convert_cargo_array_into_cargo_dict(self, cargo_array, cargo_keymap, layer, handle_orientation=None):
         """
@@ -864,27 +1507,43 @@ class Megastructure:
         :param plates: List of plates from which to extract handles.
         :return: N/A
         """
+        self.load_deferred_handles()
+
+        # extracts handle, orientation and cargo ID from all placeholders, then looks each unique handle up in the plates once
+        placeholders = []
         for key, slat in self.slats.items():
             if slat.phantom_parent is not None:
                 continue  # skip phantom slats
-            placeholder_list = copy.copy(slat.placeholder_list)
-            for placeholder_handle in placeholder_list:  # runs through all placeholders on current slat
-                handle_position = int(placeholder_handle.split('|')[1])  # extracts handle, orientation and cargo ID from placeholder
+            for placeholder_handle in slat.placeholder_list:
+                handle_position = int(placeholder_handle.split('|')[1])
                 orientation = int(placeholder_handle.split('|')[-1][1:])
+                handle_data = slat.H2_handles[handle_position] if orientation == 2 else slat.H5_handles[handle_position]
+                placeholders.append((slat, placeholder_handle, handle_position, orientation, handle_data))
+
+        plate_data = self._resolve_plate_handle_data([(h['category'], position, orientation, h['value']) for
+                                                      _, _, position, orientation, h in placeholders], plates)
+
+        patched_placeholders = defaultdict(set)
+        with self.edit_journal.record('patch_placeholder_handles', self.slats,
+                                      [(slat.ID, position, orientation) for slat, _, position, orientation, _ in placeholders]):
+            for slat, placeholder_handle, handle_position, orientation, handle_data in placeholders:
+                handle_plate_data = plate_data[(handle_data['category'], handle_position, orientation, handle_data['value'])]
+                if handle_plate_data is None:
+                    continue
+                sequence, well, plate_name, concentration = handle_plate_data
+                handles = slat.H2_handles if orientation == 2 else slat.H5_handles
+                handles[handle_position] = {'sequence': sequence, 'well': well, 'plate': plate_name,
+                                            'category': handle_data['category'], 'value': handle_data['value'],
+                                            'concentration': concentration,
+                                            'descriptor': handle_data['descriptor'].split('Placeholder|')[-1]}
+                patched_placeholders[slat.ID].add(placeholder_handle)
 
-                if orientation == 2:
-                    handle_data = slat.H2_handles[handle_position]
-                else:
-                    handle_data = slat.H5_handles[handle_position]
-
-                plate_key = (handle_data['category'], handle_position, orientation, handle_data['value'])
+            for key in patched_placeholders:
+                self.slats[key].placeholder_list = [p for p in self.slats[key].placeholder_list if p not in patched_placeholders[key]]
 
-                for plate in plates:
-                    if not isinstance(plate.get_sequence(*plate_key), bool):
-                        self.direct_handle_assign(slat, handle_position, orientation, handle_data['value'],
-                                                  handle_data['category'],
-                                                  handle_data['descriptor'].split('Placeholder|')[-1], plate, update=True)
-                        break
+        for key, slat in self.slats.items():
+            if slat.phantom_parent is not None:
+                continue
 
             if len(slat.placeholder_list) > 0:
                 print(Fore.RED + f'WARNING: Placeholder handles on slat {key} still remain after patching.')
@@ -903,14 +1562,18 @@ class Megastructure:
         Fills up all remaining holes in slats with no-handle control sequences.
         :param flat_plate: Plate class with flat sequences to draw from.
         """
+        slat_keys, positions, sides = [], [], []
         for key, slat in self.slats.items():
             if slat.phantom_parent is not None:
                 continue # skip phantom slats
             for i in range(1, slat.max_length + 1):
-                if i not in slat.H2_handles:
-                    self.direct_handle_assign(slat, i, 2, 'BLANK', 'FLAT', 'Flat', flat_plate)
-                if i not in slat.H5_handles:
-                    self.direct_handle_assign(slat, i, 5, 'BLANK', 'FLAT', 'Flat', flat_plate)
+                for side, handles in ((2, slat.H2_handles), (5, slat.H5_handles)):
+                    if i not in handles:
+                        slat_keys.append(key)
+                        positions.append(i)
+                        sides.append(side)
+
+        self.batch_set_slat_handles(slat_keys, positions, sides, ['BLANK'] * len(slat_keys), 'FLAT', sel_plates=flat_plate, propagate=False)
 
     def get_slats_by_assembly_stage(self, minimum_handle_cutoff=16):
         """
@@ -938,40 +1601,91 @@ class Megastructure:
                 special_slats.append(s_val.ID)
                 rational_slat_count -= 1
 
-        # TODO: this probably won't work well when there are multiple seeds...
-        while slat_count < rational_slat_count:  # will loop through the design until all slats have been given a home
-            if slat_count == 0:  # first extracts slats that will attach to the seed
-                first_step_slats = set()
-                for (seed_layer, seed_key), seed_coords in seed_coordinates_dict.items():
-                    for (y, x) in seed_coords:  # extracts the slat ids from the layer connecting to the seed
-                        overlapping_slat = (seed_layer, slat_array[y, x,seed_layer - 1])
-                        first_step_slats.add(overlapping_slat)
-
-                complete_slats.update(first_step_slats)  # tracks all slats that have been assigned a group
-                slat_count += len(first_step_slats)
-                slat_groups.append(list(first_step_slats))
+        layer_count = len(self.layer_palette)
+        id_stride = int(slat_array.max()) + 1  # slats are encoded as layer * id_stride + slat ID
 
-            else:
-                slat_overlap_counts = defaultdict(int)
-                # these loops will check all slats in all groups to see if a combination
-                # of different slats provide enough of a foundation for a new slat to attach
-                for slat_group in slat_groups:
-                    for layer, slat in slat_group:
-                        slat_posns = np.where(slat_array[..., layer - 1] == slat)
-                        for y, x in zip(slat_posns[0], slat_posns[1]):
-                            if layer != 1 and slat_array[y, x, layer - 2] != 0:  # checks the layer below
-                                slat_overlap_counts[(layer - 1, slat_array[y, x, layer - 2])] += 1
-                            if layer != len(self.layer_palette) and slat_array[y, x, layer] != 0:  # checks the layer above
-                                slat_overlap_counts[(layer + 1, slat_array[y, x, layer])] += 1
-                next_slat_group = []
-                for k, v in slat_overlap_counts.items():
-                    # a slat is considered stable when it has the defined minimum handle count stably attached
-                    if v >= minimum_handle_cutoff and k not in complete_slats:
-                        next_slat_group.append(k)
-                complete_slats.update(next_slat_group)
-                slat_groups.append(next_slat_group)
-                slat_count += len(next_slat_group)
+        # TODO: this probably won't work well when there are multiple seeds...
+        # first extracts slats that will attach to the seed
+        first_step_slats = set()
+        for (seed_layer, seed_key), seed_coords in seed_coordinates_dict.items():
+            for (y, x) in seed_coords:  # extracts the slat ids from the layer connecting to the seed
+                overlapping_slat = (seed_layer, slat_array[y, x, seed_layer - 1])
+                first_step_slats.add(overlapping_slat)
+        zero_id_layers = {layer for layer, slat in first_step_slats if slat == 0}
+
+        # builds the slat contact graph: for each slat, the slats it overlaps in the layers below and above and the
+        # number of positions they share, in the order they are first encountered when scanning along the slat's
+        # positions (row-major, checking the layer below before the layer above)
+        source_codes, neighbour_codes, scan_ranks = [], [], []
+        for layer in range(1, layer_count + 1):
+            layer_grid = slat_array[..., layer - 1].ravel()
+            cells = np.arange(layer_grid.size) if layer in zero_id_layers else np.flatnonzero(layer_grid)
+            for offset, adjacent_layer in enumerate((layer - 1, layer + 1)):
+                if adjacent_layer < 1 or adjacent_layer > layer_count:
+                    continue
+                neighbours = slat_array[..., adjacent_layer - 1].ravel()[cells]
+                valid = neighbours != 0
+                source_codes.append(layer * id_stride + layer_grid[cells[valid]].astype(np.int64))
+                neighbour_codes.append(adjacent_layer * id_stride + neighbours[valid].astype(np.int64))
+                scan_ranks.append(cells[valid] * 2 + offset)
+
+        code_space = (layer_count + 2) * id_stride
+        if len(source_codes) > 0:
+            source_codes = np.concatenate(source_codes)
+            neighbour_codes = np.concatenate(neighbour_codes)
+            scan_ranks = np.concatenate(scan_ranks)
+        else:
+            source_codes = neighbour_codes = scan_ranks = np.zeros(0, dtype=np.int64)
+        scan_order = np.lexsort((scan_ranks, source_codes))
+        pair_codes = source_codes[scan_order] * code_space + neighbour_codes[scan_order]
+        unique_pairs, first_index, pair_counts = np.unique(pair_codes, return_index=True, return_counts=True)
+        pair_order = np.argsort(first_index, kind='stable')  # i.e. sorted by source slat, then by first encounter
+        pair_neighbours = unique_pairs[pair_order] % code_space
+        pair_counts = pair_counts[pair_order]
+        contact_pointers = np.concatenate(([0], np.cumsum(np.bincount(unique_pairs[pair_order] // code_space, minlength=code_space))))
+
+        # slats are then added stage by stage, with each new slat updating the handle counts of the slats it touches.
+        # A slat is considered stable when it has the defined minimum handle count attached to completed slats.
+        handle_counts = np.zeros(code_space, dtype=np.int64)
+        first_encounter = np.full(code_space, -1, dtype=np.int64)  # candidates are ordered by when they were first touched by a completed slat
+        complete_codes = np.zeros(code_space, dtype=bool)
+        encounter_count = 0
+
+        def complete_group(slat_group):
+            nonlocal encounter_count
+            group_codes = np.array([layer * id_stride + int(slat) for layer, slat in slat_group], dtype=np.int64)
+            complete_codes[group_codes] = True
+
+            # gathers the contacts of all slats in the group (in group order)
+            starts = contact_pointers[group_codes]
+            lengths = contact_pointers[group_codes + 1] - starts
+            contact_index = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+            neighbours = pair_neighbours[contact_index]
+            np.add.at(handle_counts, neighbours, pair_counts[contact_index])
+
+            new_neighbours, new_index = np.unique(neighbours[first_encounter[neighbours] < 0], return_index=True)
+            new_neighbours = new_neighbours[np.argsort(new_index)]
+            first_encounter[new_neighbours] = encounter_count + np.arange(len(new_neighbours))
+            encounter_count += len(new_neighbours)
+
+            touched = np.unique(neighbours)
+            ready = touched[(handle_counts[touched] >= minimum_handle_cutoff) & ~complete_codes[touched]]
+            return ready[np.argsort(first_encounter[ready])].tolist()
+
+        complete_slats.update(first_step_slats)  # tracks all slats that have been assigned a group
+        slat_count += len(first_step_slats)
+        slat_groups.append(list(first_step_slats))
+        ready_slats = complete_group(slat_groups[-1])
 
+        while slat_count < rational_slat_count:  # will loop through the design until all slats have been given a home
+            if len(ready_slats) == 0:
+                raise RuntimeError('Some slats in the design can never attach stably to the slats already assembled - '
+                                   'their assembly stage cannot be predicted.')
+            next_slat_group = [(code // id_stride, code % id_stride) for code in ready_slats]
+            complete_slats.update(next_slat_group)
+            slat_groups.append(next_slat_group)
+            slat_count += len(next_slat_group)
+            ready_slats = complete_group(next_slat_group)
 
         slat_id_animation_classification = {}
 
@@ -996,10 +1710,12 @@ class Megastructure:
 
         return slat_id_animation_classification
 
-    def get_slat_match_counts(self, use_external_handle_array=None):
+    def get_slat_match_counts(self, use_external_handle_array=None, window=None):
         """
         Runs through the design and counts how many slats have a certain number of connections (matches) to other slats.
         Useful for computing the hamming distance of a design with variable slat types.
+        :param use_external_handle_array: Handle array to use instead of the design's own assembly handles
+        :param window: GridWindow covered by the external handle array, if it has been cropped from the full canvas
         :return: Dictionary of match counts (key = number of matches, value = number of slat pairs with that many matches),
          and a connection graph that lists all slat pairs with a certain number of matches.
         TODO: what to do in the case of slats with multiple layers e.g. the sierpinski slats?
@@ -1011,8 +1727,10 @@ class Megastructure:
         connection_graph = defaultdict(list)
         slat_coord_lookup = self._get_coordinate_to_slat_lookup()
 
-        if use_external_handle_array:
+        if use_external_handle_array is not None:
             handle_array = use_external_handle_array
+            if window is not None:
+                handle_array = window.expand(handle_array)
         else:
             handle_array = self.generate_assembly_handle_grid(category='all_slats') # phantom slat matches also need to be compensated for...
 
@@ -1068,36 +1786,58 @@ class Megastructure:
 
         return megastructure_match_count, connection_graph
 
-    def get_bag_of_slat_handles(self, use_original_slat_array=False, use_external_handle_array=None, remove_blank_slats=False):
+    def get_bag_of_slat_handles(self, use_original_slat_array=False, use_external_handle_array=None, remove_blank_slats=False, window=None):
         """
         Obtains two dictionaries - both containing the arrays corresponding to the handle positions of each slat in the
         megastructure (one for handles and one for antihandles).  The keys correspond to the slat ID while the values contain
         individual numpy handle arrays, one for each slat.  The handle arrays represent the actual 2D shape of the slat
         in the design.  Non-2D 60 degree slats are converted into 2D triangular coordinates to make handle match computation
         significantly simpler.
+        If a window is provided, the external handle array is expected to cover only that GridWindow of the canvas
+        (as used during evolution), and must contain all slats in the design (see get_design_window).
         """
         handle_dict = OrderedDict()
         antihandle_dict = OrderedDict()
 
-        # arrays obtained from design as usual
-        slat_array = self.generate_slat_occupancy_grid(use_original_slat_array=use_original_slat_array)
+        # arrays obtained from design as usual (only the layer count is needed from the slat array)
+        if use_original_slat_array:
+            layer_count = self.original_slat_array.shape[-1]
+        else:
+            layer_count = len(self.layer_palette)
         if use_external_handle_array is None:
-            handle_array = self.generate_assembly_handle_grid()
+            handle_array = self.generate_assembly_handle_grid(window=window)
         else:
             handle_array = use_external_handle_array
+        y_offset, x_offset = (0, 0) if window is None else window.offset
+
+        # the handles below and above every slat position are gathered in one go, then split per slat
+        slat_tables = self.get_slat_tables()
+        selected = slat_tables.slat_selection('original_slats', assembly_only=True)[slat_tables.position_slat_index]
+        ys, xs = slat_tables.ys[selected], slat_tables.xs[selected]
+        if window is not None:
+            if not np.all(window.contains(ys, xs)):
+                raise RuntimeError(f'The handle array window {window} does not contain all slats in the design.')
+            ys, xs = window.to_window(ys.astype(np.intp), xs.astype(np.intp))
+        position_layers = slat_tables.slat_layers[slat_tables.position_slat_index[selected]].astype(np.intp)
+        handles_above = np.zeros(len(selected), dtype=handle_array.dtype)
+        handles_below = np.zeros(len(selected), dtype=handle_array.dtype)
+        # the top/bottom layers have no interface above/below, so their (unused) indices are clipped to stay in range
+        handles_above[selected] = handle_array[ys, xs, np.clip(position_layers - 1, 0, handle_array.shape[2] - 1)]
+        handles_below[selected] = handle_array[ys, xs, np.clip(position_layers - 2, 0, handle_array.shape[2] - 1)]
+        offsets = slat_tables.position_offsets
 
         # loops through all slats in the design
-        for s_key, slat in self.slats.items():
+        for slat_index, (s_key, slat) in enumerate(self.slats.items()):
             if not slat.non_assembly_slat and slat.phantom_parent is None: # no phantom slats here
-                rows, cols = zip(*list(slat.slat_position_to_coordinate.values()))
+                rows, cols = slat_tables.slat_coordinates(slat_index)
                 # STANDARD TUBULAR SLATS CAN BE CONVERTED INTO 1D ARRAYS DIRECTLY
                 # checks slats in the layer above
-                if slat.layer != slat_array.shape[-1]:
-                    handle_dict[s_key] = handle_array[rows, cols, slat.layer-1]
+                if slat.layer != layer_count:
+                    handle_dict[s_key] = handles_above[offsets[slat_index]:offsets[slat_index + 1]]
 
                 # checks slats in the layer below - same logic as above
                 if slat.layer != 1:
-                    antihandle_dict[s_key] = handle_array[rows, cols, slat.layer-2]
+                    antihandle_dict[s_key] = handles_below[offsets[slat_index]:offsets[slat_index + 1]]
 
                 # DB Slats in 60deg mode need to be converted into their standard 90deg format
                 if slat.slat_type != 'tube':
@@ -1108,8 +1848,8 @@ class Megastructure:
                             antihandle_dict[s_key] = generate_standardized_slat_handle_array(antihandle_dict[s_key], slat.slat_type)
                     else:
                         # extract the exact shape from the handle array
-                        min_row, max_row = min(rows), max(rows)
-                        min_col, max_col = min(cols), max(cols)
+                        min_row, max_row = int(rows.min()) - y_offset, int(rows.max()) - y_offset
+                        min_col, max_col = int(cols.min()) - x_offset, int(cols.max()) - x_offset
                         if s_key in handle_dict:
                             sub_array = handle_array[min_row:max_row + 1, min_col:max_col + 1, slat.layer-1]
                             handle_dict[s_key] = sub_array
@@ -1159,6 +1899,7 @@ class Megastructure:
         :param cargo_colormap: The colormap to sample from for each cargo type.
         :return: N/A
         """
+        self.load_deferred_handles()
         slat_array = self.generate_slat_occupancy_grid()
         if cargo_colormap is not None:
             self.assign_colormap_for_cargo(cargo_colormap)
@@ -1214,6 +1955,7 @@ class Megastructure:
         """
         from crisscross.graphics.pyvista_3d import create_graphical_3D_view
 
+        self.load_deferred_handles()
         slat_array = self.generate_slat_occupancy_grid()
         if cargo_colormap is not None:
             self.assign_colormap_for_cargo(cargo_colormap)
@@ -1262,6 +2004,7 @@ class Megastructure:
         else:
             assembly_groups = None
 
+        self.load_deferred_handles()
         slat_array = self.generate_slat_occupancy_grid()
         if cargo_colormap is not None:
             self.assign_colormap_for_cargo(cargo_colormap)
@@ -1307,11 +2050,18 @@ class Megastructure:
         """
         Exports the entire design to a single excel file.
         All individual slat, cargo, handle and seed arrays are exported into separate sheets.
-        :param filename: Output .xlsx filename
+        If the filename has a .hcad extension, the design is instead exported to the (much faster) binary design format.
+        :param filename: Output .xlsx (or .hcad) filename
         :param folder: Output folder
         :return: N/A
         """
 
+        self.load_deferred_handles()
+
+        if filename.endswith(BINARY_DESIGN_EXTENSION):
+            export_binary_design(self, os.path.join(folder, filename))
+            return
+
         def write_array_to_excel(writer, array, sheet_prefix):
             for layer_index in range(array.shape[-1]):
                 df = pd.DataFrame(array[..., layer_index])
@@ -1554,17 +2304,77 @@ class Megastructure:
             link_worksheet.merge_range(i, 0, i, max_slat_len, link_output_list[i][0], merge_format)
         writer.close()
 
-    def import_design(self, file):
+    def load_deferred_handles(self):
+        """
+        Reads in and assigns any cargo and seed handles that were deferred when importing the design (see defer_cargo_and_seeds).
+        This is called automatically by all methods that make use of cargo/seed handles.
+        :return: N/A
+        """
+        if self._deferred_handle_sheets is None:
+            return
+        file, sheet_names = self._deferred_handle_sheets
+        self._deferred_handle_sheets = None
+
+        with pd.ExcelFile(file) as excel_file:
+            design_df = {key: excel_file.parse(key, header=None) for key in sheet_names}
+        cargo_dict, seed_dict = read_cargo_and_seed_sheets(design_df)
+
+        # these handles were part of the imported design, so their assignment is not an undoable edit
+        with self.edit_journal.record('load_deferred_handles', self.slats, [], undoable=False):
+            if len(seed_dict) > 0:
+                self.assign_seed_handles(seed_dict)
+            if len(cargo_dict) > 0:
+                self.assign_cargo_handles_with_dict(cargo_dict)
+
+    def _report_parse_profile(self, file, profile):
+        self.import_parse_profile = profile
+        print(Fore.BLUE + f'Design import timings for {os.path.basename(file)}:' + Fore.RESET)
+        for key, duration in profile.items():
+            print(f'  {key}: {duration * 1000:.1f} ms')
+        print(f'  total: {sum(profile.values()) * 1000:.1f} ms')
+
+    def import_design(self, file, defer_cargo_and_seeds=False, parse_profile=False):
         """
         Reads in a complete megastructure from an excel file formatted with each array separated in a different sheet.
+        Binary design files (.hcad) are detected automatically and read with import_binary_design instead.
+        The workbook's sheet list is read first, and only the sheets required are parsed.
         :param file: Path to Excel file containing megastructure design
+        :param defer_cargo_and_seeds: If True, cargo and seed sheets are not parsed here, but only when first needed (see load_deferred_handles)
+        :param parse_profile: If True, the time taken to read each sheet is printed out and stored in self.import_parse_profile
         :return: All arrays and metadata necessary to regenerate the design
         """
-
-        design_df = pd.read_excel(file, sheet_name=None, header=None)
+        profile = {}
+        start_time = time.perf_counter()
+
+        if is_binary_design_file(file):
+            design_output = import_binary_design(file)
+            profile['binary design'] = time.perf_counter() - start_time
+            if parse_profile:
+                self._report_parse_profile(file, profile)
+            return design_output
+
+        # reads the sheet directory first, which allows sheets to be parsed selectively
+        excel_file = pd.ExcelFile(file)
+        sheet_names = excel_file.sheet_names
+        profile['workbook directory'] = time.perf_counter() - start_time
+
+        required_sheets = [key for key in sheet_names if 'slat_layer_' in key or 'handle_interface_' in key or
+                           key in ('slat_types', 'slat_handle_links', 'metadata')]
+        if not defer_cargo_and_seeds:
+            required_sheets += [key for key in sheet_names if key not in required_sheets and ('cargo' in key or 'seed' in key)]
+
+        design_df = {}
+        for key in sheet_names:  # retains the workbook's sheet order
+            if key in required_sheets:
+                sheet_start = time.perf_counter()
+                design_df[key] = excel_file.parse(key, header=None)
+                profile[key] = time.perf_counter() - sheet_start
+        excel_file.close()
+
+        assembly_start = time.perf_counter()
         layer_count = 0
 
-        for i, key in enumerate(design_df.keys()):
+        for i, key in enumerate(sheet_names):
             if 'slat_layer_' in key:
                 layer_count += 1
 
@@ -1572,7 +2382,7 @@ class Megastructure:
         slat_array = np.zeros((design_df['slat_layer_1'].shape[0], design_df['slat_layer_1'].shape[1], layer_count))
         slat_grid_coords = (slat_array.shape[0], slat_array.shape[1])
 
-        handle_array_available = any('handle' in string for string in list(design_df.keys()))
+        handle_array_available = any('handle' in string for string in sheet_names)
 
         old_file_format = True
 
@@ -1648,44 +2458,14 @@ class Megastructure:
         # sort slats based on their ID
         slats = {k: v for k, v in sorted(slats.items(), key=lambda item: natural_sort_key(item[0]))}
 
-        # reading in cargo arrays and transferring to a dictionary
-        cargo_dict = {}
-        seed_dict = defaultdict(list)
-        for i, key in enumerate(design_df.keys()):
-            if 'cargo' in key:
-                layer = int(key.split('_')[2]) # e.g. cargo_layer_1_upper_h2
-                orientation = int(key.split('_')[4][-1])
-                cargo_array = design_df[key].values
-                cargo_coords = np.where(cargo_array != 0)  # only extracts a value if there is cargo present, reducing clutter
-                for y, x in zip(cargo_coords[0], cargo_coords[1]):
-                    cargo_dict[((int(y), int(x)), layer, orientation)] = cargo_array[y, x]
-            if 'seed' in key:
-                if 'h' not in key:
-                    print(Fore.RED + f'WARNING: Seed from imported file was not read in - please check format.')
-                    break
-                layer = int(key.split('_')[2])  # e.g. seed_layer_1_upper_h2
-                orientation = int(key.split('_')[4][-1])
-                seed_coords = np.where(design_df[key].values != 0)  # only extracts a value if there is seed present, reducing clutter
-                for y, x in zip(seed_coords[0], seed_coords[1]):
-                    position_id = design_df[key].values[y, x]
-                    if isinstance(position_id, int):
-                        print(Fore.RED + f'WARNING: Seed from imported file was not read in - please check format.')
-                        break
-                    seed_id = position_id.split('-')[0]
-                    seed_handle = position_id.split('-', 1)[1].replace('-', '_')
-                    seed_dict[(seed_id, layer, orientation)].append((y, x, seed_handle))
-
-        # warn if any seed has fewer than expected handles (5x16 = 80)
-        MINIMUM_SEED_HANDLES = 80
-        seed_handle_counts = {}
-        for (seed_id, layer, orientation), seed_data in seed_dict.items():
-            if seed_id not in seed_handle_counts:
-                seed_handle_counts[seed_id] = 0
-            seed_handle_counts[seed_id] += len(seed_data)
-        for seed_id, count in seed_handle_counts.items():
-            if count < MINIMUM_SEED_HANDLES:
-                print(Fore.YELLOW + f'WARNING: Seed "{seed_id}" has only {count} handles '
-                      f'(recommended: {MINIMUM_SEED_HANDLES}).' + Style.RESET_ALL)
+        # reading in cargo and seed arrays (unless these have been deferred until first use)
+        if defer_cargo_and_seeds:
+            cargo_dict, seed_dict = {}, None
+            deferred_sheets = [key for key in sheet_names if 'cargo' in key or 'seed' in key]
+            if len(deferred_sheets) > 0:
+                self._deferred_handle_sheets = (file, deferred_sheets)
+        else:
+            cargo_dict, seed_dict = read_cargo_and_seed_sheets(design_df)
 
         # extracts and formats metadata
         metadata = design_df.get('metadata')
@@ -1778,4 +2558,8 @@ class Megastructure:
             if slat.phantom_parent is not None:
                 slat.unique_color = slats[slat.phantom_parent].unique_color
 
+        profile['design assembly'] = time.perf_counter() - assembly_start
+        if parse_profile:
+            self._report_parse_profile(file, profile)
+
         return slats, handle_array, seed_dict, cargo_dict, connection_angle, layer_palette, cargo_palette, hashcad_canvas_metadata, slat_grid_coords, link_manager
@@ -0,0 +1,298 @@
+import numpy as np
+
+
+def parse_slat_number(slat_id):
+    """
+    Extracts the numeric slat ID from a slat key (e.g. 'layer1-slat5' -> 5).
+    :param slat_id: Slat key string
+    :return: Slat number, or -1 if the key does not follow the standard format
+    """
+    try:
+        return int(slat_id.split('slat')[-1])
+    except ValueError:
+        return -1
+
+
+def _smallest_int_dtype(max_value):
+    for dtype in (np.int16, np.int32):
+        if max_value < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class SlatTables:
+    """
+    Columnar (array) representation of a megastructure's slats and slat positions.  Allows grids and per-slat arrays
+    to be generated with single numpy gather/scatter operations instead of per-slat Python loops.
+
+    Slat table (one row per slat, in megastructure order):
+    - slat_keys, slat_layers, slat_numbers (numeric ID, for phantoms that of their parent), is_phantom, non_assembly,
+      slat_type_codes (index into slat_type_names) and phantom_parent_index (-1 if not a phantom).
+
+    Position table (one row per slat position, grouped by slat in position order):
+    - position_slat_index, positions, ys, xs. The positions of slat i are rows position_offsets[i]:position_offsets[i+1].
+    """
+    def __init__(self, slats):
+        """
+        :param slats: Dictionary of Slat objects (as stored in Megastructure.slats)
+        """
+        self.slat_keys = list(slats.keys())
+        slat_count = len(self.slat_keys)
+        key_to_index = {key: index for index, key in enumerate(self.slat_keys)}
+
+        self.slat_type_names = sorted({str(slat.slat_type) for slat in slats.values()})
+        type_to_code = {name: code for code, name in enumerate(self.slat_type_names)}
+
+        self.slat_layers = np.zeros(slat_count, dtype=np.int16)
+        self.slat_numbers = np.zeros(slat_count, dtype=np.int64)
+        self.is_phantom = np.zeros(slat_count, dtype=bool)
+        self.non_assembly = np.zeros(slat_count, dtype=bool)
+        self.slat_type_codes = np.zeros(slat_count, dtype=np.int16)
+        self.phantom_parent_index = np.full(slat_count, -1, dtype=np.int32)
+        self.position_offsets = np.zeros(slat_count + 1, dtype=np.int64)
+
+        positions, ys, xs = [], [], []
+        for index, slat in enumerate(slats.values()):
+            self.slat_layers[index] = slat.layer
+            self.non_assembly[index] = slat.non_assembly_slat
+            self.slat_type_codes[index] = type_to_code[str(slat.slat_type)]
+            if slat.phantom_parent is not None:
+                self.is_phantom[index] = True
+                self.phantom_parent_index[index] = key_to_index.get(slat.phantom_parent, -1)
+                self.slat_numbers[index] = parse_slat_number(slat.phantom_parent)
+            else:
+                self.slat_numbers[index] = parse_slat_number(slat.ID)
+
+            for position, (y, x) in slat.slat_position_to_coordinate.items():
+                positions.append(position)
+                ys.append(y)
+                xs.append(x)
+            self.position_offsets[index + 1] = len(positions)
+
+        coordinate_dtype = _smallest_int_dtype(max(ys + xs, default=0))
+        self.positions = np.array(positions, dtype=_smallest_int_dtype(max(positions, default=0)))
+        self.ys = np.array(ys, dtype=coordinate_dtype)
+        self.xs = np.array(xs, dtype=coordinate_dtype)
+        self.position_slat_index = np.repeat(np.arange(slat_count, dtype=np.int32), np.diff(self.position_offsets))
+
+        # sorted (slat index, position) keys, for looking up the coordinates of individual handles
+        self._position_key_stride = int(self.positions.max()) + 1 if len(self.positions) > 0 else 1
+        position_keys = self.position_slat_index.astype(np.int64) * self._position_key_stride + self.positions
+        self._position_key_order = np.argsort(position_keys, kind='stable')
+        self._sorted_position_keys = position_keys[self._position_key_order]
+
+    def slat_selection(self, category='all_slats', assembly_only=False):
+        """
+        Boolean mask over the slat table.
+        :param category: 'original_slats', 'phantom_slats' or 'all_slats' (any other value also selects all slats)
+        :param assembly_only: If True, non-assembly slats (e.g. crossbars) are excluded
+        """
+        mask = np.ones(len(self.slat_keys), dtype=bool)
+        if category == 'original_slats':
+            mask &= ~self.is_phantom
+        elif category == 'phantom_slats':
+            mask &= self.is_phantom
+        if assembly_only:
+            mask &= ~self.non_assembly
+        return mask
+
+    def slat_coordinates(self, slat_index):
+        """
+        Returns the (ys, xs) coordinate arrays of a slat, in position order (views into the position table).
+        """
+        start, end = self.position_offsets[slat_index], self.position_offsets[slat_index + 1]
+        return self.ys[start:end], self.xs[start:end]
+
+    def lookup_rows(self, slat_indices, positions):
+        """
+        Vectorised lookup of the position table rows of specific slat positions.
+        :param slat_indices: Array of slat table indices
+        :param positions: Array of positions on each slat (1-indexed)
+        :return: Array of position table rows
+        """
+        keys = np.asarray(slat_indices, dtype=np.int64) * self._position_key_stride + np.asarray(positions, dtype=np.int64)
+        return self._position_key_order[np.searchsorted(self._sorted_position_keys, keys)]
+
+    def lookup_coordinates(self, slat_indices, positions):
+        """
+        Vectorised lookup of the grid coordinates of specific slat positions.
+        :param slat_indices: Array of slat table indices
+        :param positions: Array of positions on each slat (1-indexed)
+        :return: ys, xs arrays
+        """
+        rows = self.lookup_rows(slat_indices, positions)
+        return self.ys[rows], self.xs[rows]
+
+
+class HandleTable:
+    """
+    Columnar snapshot of all handles assigned to a megastructure's slats (one row per handle), in slat order,
+    then H2 before H5, then position order.
+
+    - slat_index, positions, sides (2 or 5), category_codes (index into category_names),
+      values (numeric handle value, or -1 for non-numeric values such as cargo names),
+      plate_codes/well_codes (index into plate_names/well_names, -1 for placeholder handles).
+    """
+    def __init__(self, slats):
+        """
+        :param slats: Dictionary of Slat objects (as stored in Megastructure.slats)
+        """
+        slat_index, positions, sides, categories, values, plates, wells = [], [], [], [], [], [], []
+        category_lookup, plate_lookup, well_lookup = {}, {}, {}
+
+        for index, slat in enumerate(slats.values()):
+            for side in (2, 5):
+                for position, handle_data in slat.get_sorted_handles('h%s' % side):
+                    slat_index.append(index)
+                    positions.append(position)
+                    sides.append(side)
+                    categories.append(category_lookup.setdefault(handle_data['category'], len(category_lookup)))
+                    try:
+                        values.append(int(handle_data['value']))
+                    except (TypeError, ValueError):
+                        values.append(-1)
+                    plate = handle_data.get('plate')
+                    well = handle_data.get('well')
+                    plates.append(-1 if plate is None else plate_lookup.setdefault(plate, len(plate_lookup)))
+                    wells.append(-1 if well is None else well_lookup.setdefault(well, len(well_lookup)))
+
+        self.category_names = list(category_lookup.keys())
+        self.plate_names = list(plate_lookup.keys())
+        self.well_names = list(well_lookup.keys())
+
+        self.slat_index = np.array(slat_index, dtype=np.int32)
+        self.positions = np.array(positions, dtype=np.int16)
+        self.sides = np.array(sides, dtype=np.int8)
+        self.category_codes = np.array(categories, dtype=np.int8)
+        self.values = np.array(values, dtype=np.int64)
+        self.plate_codes = np.array(plates, dtype=np.int16)
+        self.well_codes = np.array(wells, dtype=np.int16)
+
+    def category_mask(self, substring):
+        """
+        Boolean mask selecting handles whose category contains the given substring (e.g. 'ASSEMBLY').
+        """
+        matching_codes = [code for code, name in enumerate(self.category_names) if substring in name]
+        return np.isin(self.category_codes, matching_codes)
+
+
+def smallest_unsigned_dtype(max_value):
+    """
+    Returns the smallest unsigned integer dtype that can hold values up to max_value (at least uint16, as used for handle arrays).
+    """
+    for dtype in (np.uint16, np.uint32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.uint64
+
+
+class GridWindow:
+    """
+    Rectangular window (e.g. the bounding box of all slats) cut out of a design canvas.  Grids generated within a window
+    only cover the window's area, with window coordinates related to canvas coordinates by a fixed (y, x) offset.
+    This keeps grid memory proportional to the area occupied by the design rather than the full canvas.
+    """
+    def __init__(self, y_offset, x_offset, height, width, canvas_shape):
+        """
+        :param y_offset: Canvas row of the window's first row
+        :param x_offset: Canvas column of the window's first column
+        :param height: Number of rows in the window
+        :param width: Number of columns in the window
+        :param canvas_shape: (rows, columns) of the full canvas
+        """
+        self.y_offset = int(y_offset)
+        self.x_offset = int(x_offset)
+        self.height = int(height)
+        self.width = int(width)
+        self.canvas_shape = (int(canvas_shape[0]), int(canvas_shape[1]))
+
+    @property
+    def offset(self):
+        return self.y_offset, self.x_offset
+
+    @property
+    def shape(self):
+        return self.height, self.width
+
+    @property
+    def key(self):
+        """
+        Hashable description of the window (for caching window-specific data).
+        """
+        return self.y_offset, self.x_offset, self.height, self.width, self.canvas_shape
+
+    def __eq__(self, other):
+        return isinstance(other, GridWindow) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return (f'GridWindow(y={self.y_offset}:{self.y_offset + self.height}, x={self.x_offset}:{self.x_offset + self.width}, '
+                f'canvas={self.canvas_shape})')
+
+    def to_window(self, ys, xs):
+        """
+        Converts canvas coordinates into window coordinates.
+        """
+        return np.asarray(ys) - self.y_offset, np.asarray(xs) - self.x_offset
+
+    def to_canvas(self, ys, xs):
+        """
+        Converts window coordinates into canvas coordinates.
+        """
+        return np.asarray(ys) + self.y_offset, np.asarray(xs) + self.x_offset
+
+    def contains(self, ys, xs):
+        """
+        Boolean mask of the canvas coordinates that fall inside the window.
+        """
+        ys, xs = self.to_window(ys, xs)
+        return (ys >= 0) & (ys < self.height) & (xs >= 0) & (xs < self.width)
+
+    def crop(self, canvas_array):
+        """
+        Cuts the window out of a canvas-sized array (the first two dimensions are cropped).
+        :return: A copy of the window's area of the array
+        """
+        return canvas_array[self.y_offset:self.y_offset + self.height, self.x_offset:self.x_offset + self.width].copy()
+
+    def expand(self, window_array, dtype=None):
+        """
+        Places a window-sized array back onto a (zero-filled) array the size of the full canvas.
+        :param window_array: Array with the window's shape in its first two dimensions
+        :param dtype: Output dtype (defaults to that of the window array)
+        :return: Canvas-sized array
+        """
+        canvas_array = np.zeros(self.canvas_shape + window_array.shape[2:], dtype=window_array.dtype if dtype is None else dtype)
+        canvas_array[self.y_offset:self.y_offset + self.height, self.x_offset:self.x_offset + self.width] = window_array
+        return canvas_array
+
+    def to_coordinate_list(self, window_array):
+        """
+        Sparse representation of a window-sized 3D grid (e.g. a slat occupancy or handle grid).
+        :return: (ys, xs, layers, values) arrays of all non-zero grid entries, in canvas coordinates
+        """
+        ys, xs, layers = np.nonzero(window_array)
+        values = window_array[ys, xs, layers]
+        ys, xs = self.to_canvas(ys, xs)
+        return ys, xs, layers, values
+
+    def from_coordinate_list(self, ys, xs, layers, values, layer_count, dtype=None):
+        """
+        Rebuilds a window-sized 3D grid from its sparse representation (see to_coordinate_list).
+        :param ys: Canvas rows of the grid entries
+        :param xs: Canvas columns of the grid entries
+        :param layers: Layer of each grid entry
+        :param values: Value of each grid entry
+        :param layer_count: Number of layers in the grid
+        :param dtype: Output dtype (defaults to the smallest unsigned dtype that can hold all values)
+        :return: Window-sized grid
+        """
+        values = np.asarray(values)
+        if dtype is None:
+            dtype = smallest_unsigned_dtype(int(values.max()) if len(values) > 0 else 0)
+        window_array = np.zeros(self.shape + (layer_count,), dtype=dtype)
+        ys, xs = self.to_window(ys, xs)
+        window_array[ys, xs, np.asarray(layers)] = values
+        return window_array
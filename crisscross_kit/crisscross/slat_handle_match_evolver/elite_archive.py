@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from crisscross.helper_functions import create_dir_if_empty
+
+# serialises archive/index updates made from different threads (e.g. concurrent evolutions in the gRPC server)
+_archive_lock = threading.Lock()
+
+
+def compute_design_geometry_hash(megastructure, unique_handle_sequences):
+    """
+    Computes a hash of everything in a design that affects handle evolution scores.
+    Two designs with the same hash can share evolved handle arrays directly.
+    :param megastructure: Megastructure object containing the slat design
+    :param unique_handle_sequences: Handle library length
+    :return: Hex digest string
+    """
+    sha = hashlib.sha256()
+
+    slat_grid = np.ascontiguousarray(megastructure.generate_slat_occupancy_grid(category='all_slats'), dtype=np.int64)
+    phantom_grid = np.ascontiguousarray(megastructure.generate_slat_occupancy_grid(category='phantom_slats'), dtype=np.int64)
+    sha.update(str(slat_grid.shape).encode())
+    sha.update(slat_grid.tobytes())
+    sha.update(phantom_grid.tobytes())
+
+    # slat types and layer orientations decide which positions can hold handles
+    slat_types = sorted((key, str(slat.slat_type), str(slat.phantom_parent)) for key, slat in megastructure.slats.items())
+    orientations = [(layer, str(info['top']), str(info['bottom'])) for layer, info in sorted(megastructure.layer_palette.items())]
+
+    link_manager = megastructure.link_manager
+    link_state = {
+        'links': sorted((str(key), group) for key, group in link_manager.handle_link_to_group.items()),
+        'values': sorted((group, int(value)) for group, value in link_manager.handle_group_to_value.items() if value),
+        'blocks': sorted(str(key) for key in link_manager.handle_blocks),
+    }
+
+    sha.update(json.dumps({'slat_types': slat_types, 'orientations': orientations, 'links': link_state,
+                           'connection_angle': megastructure.connection_angle,
+                           'library_size': int(unique_handle_sequences)}, default=str).encode())
+
+    return sha.hexdigest()
+
+
+class EliteArchive:
+    index_file_name = 'archive_index.json'
+
+    def __init__(self, archive_directory, capacity=10, minimum_geometry_similarity=0.5):
+        """
+        Persistent archive of the best handle arrays found for each design geometry, used to warm-start repeat evolutions.
+        Each geometry is stored in a separate .npz file named after its geometry hash.  A small index of each file's
+        slat grid metadata (library size, grid shape and occupied positions) is kept alongside, so that finding a similar
+        geometry only requires opening the few archives that could match.
+        :param archive_directory: Folder in which to store the archive files
+        :param capacity: Maximum number of handle arrays retained per geometry
+        :param minimum_geometry_similarity: Minimum fraction of matching slat grid positions required
+        to seed a new geometry from the archive of a different (edited) geometry
+        """
+        self.archive_directory = archive_directory
+        self.capacity = int(capacity)
+        self.minimum_geometry_similarity = minimum_geometry_similarity
+
+    def _archive_file(self, geometry_hash):
+        return os.path.join(self.archive_directory, f'{geometry_hash}.npz')
+
+    @staticmethod
+    def _read(archive_file):
+        with np.load(archive_file, allow_pickle=False) as data:
+            entry = {key: data[key] for key in data.files}
+        entry['hallofshame'] = json.loads(str(entry['hallofshame']))
+        return entry
+
+    @staticmethod
+    def _read_slat_grid(archive_file):
+        # only the slat grid is decompressed (npz members are loaded on access)
+        with np.load(archive_file, allow_pickle=False) as data:
+            return data['slat_grid']
+
+    @staticmethod
+    def _index_entry(slat_grid, library_size):
+        return {'library_size': int(library_size), 'shape': [int(d) for d in slat_grid.shape],
+                'occupied': int(np.count_nonzero(slat_grid))}
+
+    def _write_atomic(self, target_file, write_function):
+        # writes to a unique temporary file first so that concurrent readers never see a half-written file
+        with tempfile.NamedTemporaryFile(dir=self.archive_directory, suffix='.tmp', delete=False) as temp:
+            temp_file = temp.name
+            write_function(temp)
+        try:
+            os.replace(temp_file, target_file)
+        except OSError:
+            os.remove(temp_file)
+            raise
+
+    def _load_index(self):
+        """
+        Reads the metadata index of the archive, adding any archive files missing from it (e.g. written by an older
+        version or by another process) and dropping entries for files that no longer exist.
+        :return: Dictionary of geometry hash: index entry
+        """
+        if not os.path.isdir(self.archive_directory):
+            return {}
+        index_file = os.path.join(self.archive_directory, self.index_file_name)
+        with _archive_lock:
+            try:
+                with open(index_file) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}
+
+            archived_hashes = {name[:-len('.npz')] for name in os.listdir(self.archive_directory) if name.endswith('.npz')}
+            modified = len(set(index) - archived_hashes) > 0
+            index = {geometry_hash: entry for geometry_hash, entry in index.items() if geometry_hash in archived_hashes}
+            for geometry_hash in archived_hashes - set(index):
+                try:
+                    with np.load(self._archive_file(geometry_hash), allow_pickle=False) as data:
+                        index[geometry_hash] = self._index_entry(data['slat_grid'], data['library_size'])
+                except Exception:
+                    continue  # skips corrupted or incompatible files
+                modified = True
+
+            if modified:
+                self._write_atomic(index_file, lambda f: f.write(json.dumps(index).encode()))
+        return index
+
+    def load(self, geometry_hash, slat_grid, library_size):
+        """
+        Retrieves the archived handle arrays for a design.  If the exact geometry has not been evolved before,
+        the archive of the most similar geometry (same handle layers and library size) is returned instead.
+        :param geometry_hash: Hash of the design (see compute_design_geometry_hash)
+        :param slat_grid: Slat occupancy grid of the design (all slats), used to find similar geometries
+        :param library_size: Handle library length
+        :return: Dictionary with the archived 'handle_arrays', 'mean_log_scores', 'worst_match_scores' and 'hallofshame',
+        plus an 'exact_match' flag.  None if nothing suitable is available.
+        """
+        exact_file = self._archive_file(geometry_hash)
+        if os.path.isfile(exact_file):
+            entry = self._read(exact_file)
+            entry['exact_match'] = True
+            return entry
+
+        # the similarity of two grids can be no higher than the ratio of their occupied position counts,
+        # so candidates are checked from the most promising and the search stops once none can beat the best match
+        occupied = int(np.count_nonzero(slat_grid))
+        candidates = []
+        for archived_hash, index_entry in self._load_index().items():
+            if index_entry['library_size'] != int(library_size) or index_entry['shape'][2] != slat_grid.shape[2]:
+                continue
+            if max(index_entry['occupied'], occupied) == 0:
+                continue
+            candidates.append((min(index_entry['occupied'], occupied) / max(index_entry['occupied'], occupied), archived_hash))
+        candidates.sort(reverse=True)
+
+        best_hash, best_similarity = None, self.minimum_geometry_similarity
+        for similarity_bound, archived_hash in candidates:
+            if similarity_bound <= best_similarity:
+                break
+            try:
+                archived_grid = self._read_slat_grid(self._archive_file(archived_hash))
+            except Exception:
+                continue  # skips corrupted or incompatible files
+            overlap = tuple(slice(0, min(a, b)) for a, b in zip(archived_grid.shape, slat_grid.shape))
+            occupied_positions = (archived_grid[overlap] != 0) | (slat_grid[overlap] != 0)
+            if not np.any(occupied_positions):
+                continue
+            similarity = np.sum((archived_grid[overlap] == slat_grid[overlap]) & occupied_positions) / max(np.sum(archived_grid != 0), np.sum(slat_grid != 0))
+            if similarity > best_similarity:
+                best_hash, best_similarity = archived_hash, similarity
+
+        if best_hash is None:
+            return None
+        try:
+            best_entry = self._read(self._archive_file(best_hash))
+        except Exception:
+            return None
+        best_entry['exact_match'] = False
+        return best_entry
+
+    def update(self, geometry_hash, slat_grid, library_size, handle_arrays, mean_log_scores, worst_match_scores, hallofshame):
+        """
+        Merges newly evaluated handle arrays into a geometry's archive, retaining only the best unique arrays.
+        :param geometry_hash: Hash of the design (see compute_design_geometry_hash)
+        :param slat_grid: Slat occupancy grid of the design (all slats)
+        :param library_size: Handle library length
+        :param handle_arrays: List of handle arrays to archive
+        :param mean_log_scores: Effective parasitic valency (mean log score) of each array
+        :param worst_match_scores: Max parasitic valency of each array
+        :param hallofshame: List of {'handles': [...], 'antihandles': [...]} worst slat combinations for each array
+        :return: N/A
+        """
+        create_dir_if_empty(self.archive_directory)
+        archive_file = self._archive_file(geometry_hash)
+        slat_grid = np.asarray(slat_grid, dtype=np.int64)
+
+        candidates = [(np.asarray(a), float(m), int(w), h) for a, m, w, h in zip(handle_arrays, mean_log_scores, worst_match_scores, hallofshame)]
+
+        # the read-merge-write is locked so that concurrent updates to the same geometry are not lost
+        with _archive_lock:
+            if os.path.isfile(archive_file):
+                try:
+                    entry = self._read(archive_file)
+                    candidates.extend(zip(entry['handle_arrays'], entry['mean_log_scores'].tolist(),
+                                          entry['worst_match_scores'].tolist(), entry['hallofshame']))
+                except Exception:
+                    pass  # a corrupted archive is simply overwritten
+
+            # keeps the best unique arrays only
+            candidates.sort(key=lambda c: c[1])
+            retained, seen = [], set()
+            for candidate in candidates:
+                array_bytes = np.ascontiguousarray(candidate[0], dtype=np.uint16).tobytes()
+                if array_bytes in seen:
+                    continue
+                seen.add(array_bytes)
+                retained.append(candidate)
+                if len(retained) == self.capacity:
+                    break
+
+            self._write_atomic(archive_file, lambda f: np.savez_compressed(
+                f,
+                handle_arrays=np.stack([np.asarray(c[0], dtype=np.uint16) for c in retained]),
+                mean_log_scores=np.array([c[1] for c in retained], dtype=np.float64),
+                worst_match_scores=np.array([c[2] for c in retained], dtype=np.int64),
+                hallofshame=np.array(json.dumps([c[3] for c in retained])),
+                slat_grid=slat_grid,
+                library_size=np.array(int(library_size)),
+                timestamp=np.array(time.time())))
+
+            index_file = os.path.join(self.archive_directory, self.index_file_name)
+            try:
+                with open(index_file) as f:
+                    index = json.load(f)
+            except (OSError, ValueError):
+                index = {}  # missing entries are re-indexed from the archive files on the next load
+            index[geometry_hash] = self._index_entry(slat_grid, library_size)
+            self._write_atomic(index_file, lambda f: f.write(json.dumps(index).encode()))
+
+
+def repair_archived_handle_array(archived_array, reference_array):
+    """
+    Adapts an archived handle array to a (possibly edited) design.  Handles at positions that no longer exist are removed,
+    and new handle positions are filled in from a randomly generated reference array.
+    :param archived_array: Handle array from the archive
+    :param reference_array: Randomly generated handle array for the current design (defines valid handle positions)
+    :return: Repaired handle array with the same shape and dtype as the reference array
+    """
+    repaired_array = np.zeros_like(reference_array)
+    overlap = tuple(slice(0, min(a, b)) for a, b in zip(archived_array.shape, reference_array.shape))
+    repaired_array[overlap] = archived_array[overlap]
+
+    valid_positions = reference_array != 0
+    repaired_array[~valid_positions] = 0
+    missing_positions = valid_positions & (repaired_array == 0)
+    repaired_array[missing_positions] = reference_array[missing_positions]
+    return repaired_array
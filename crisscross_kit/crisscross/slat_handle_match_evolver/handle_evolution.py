@@ -11,11 +11,14 @@ from colorama import Fore
 import re
 import toml
 import platform
+import pickle
+import cProfile
 from multiprocessing.pool import RUN
 
 from crisscross.core_functions.megastructures import Megastructure
 from crisscross.slat_handle_match_evolver.handle_mutation import mutate_handle_arrays
 from crisscross.slat_handle_match_evolver import generate_random_slat_handles, generate_layer_split_handles
+from crisscross.slat_handle_match_evolver.elite_archive import EliteArchive, compute_design_geometry_hash, repair_archived_handle_array
 from crisscross.helper_functions import save_list_dict_to_file, create_dir_if_empty
 from eqcorr2d.eqcorr2d_interface import comprehensive_score_analysis
 
@@ -26,7 +29,10 @@ class EvolveManager:
                  evolution_generations=200, evolution_population=30, split_sequence_handles=False, sequence_split_factor=2,
                  process_count=None, early_max_valency_stop=None, log_tracking_directory=None, progress_bar_update_iterations=2,
                  mutation_memory_system='off', memory_length=10, repeating_unit_constraints=None,
-                 similarity_score_calculation_frequency=10, update_scope='interfaces'):
+                 similarity_score_calculation_frequency=10, update_scope='interfaces',
+                 early_candidate_rejection=False, early_rejection_valency_margin=None,
+                 elite_archive_directory=None, elite_archive_size=10,
+                 stage_profiling=False, profile_dump_interval=None, crop_to_design=True):
         """
         Prepares an evolution manager to optimize a handle array for the provided slat array.
         WARNING: Make sure to use the "if __name__ == '__main__':" block to run this class in a script.
@@ -53,6 +59,26 @@ class EvolveManager:
         :param similarity_score_calculation_frequency: The duplication risk score will be calculated every x generations.
         This helps speed up the evolution process, since it isn't used for deciding on the best generations to retain.
         :param update_scope: Either 'interfaces' (default) to only place handles at layer interfaces, or 'all' to also place handles at positions with existing handles in the seed array.
+        :param early_candidate_rejection: If true, mutated candidates are scored in bounded mode and their computation is
+        aborted as soon as they are guaranteed to score worse than every survivor of the previous generation.
+        Rejected candidates can never be selected, so the evolution trajectory is unchanged while compute time is saved.
+        :param early_rejection_valency_margin: If set (and early_candidate_rejection is on), mutated candidates are also
+        rejected once their max parasitic valency exceeds that of the current best candidate plus this margin.
+        Unlike the effective parasitic valency bound, this can discard candidates that would otherwise have survived.
+        :param elite_archive_directory: If set, the best handle arrays found are stored in this folder (keyed by a hash of the
+        design geometry) and used to seed the initial population of future evolutions of the same (or a similar) design.
+        :param elite_archive_size: Maximum number of handle arrays retained in the elite archive for each design.
+        :param stage_profiling: If true, the scoring workers also report the time spent in each stage of the match analysis,
+        along with the number of slat pairs computed at each rotation and the number of bytes pickled between processes
+        (measured on the first generation only, as the transferred data keeps the same size throughout).
+        These are added to the metrics alongside the parent process stage timings (which are always recorded).
+        :param profile_dump_interval: If set, a cProfile dump of the parent process is saved to the log tracking directory
+        every x generations (can be viewed with snakeviz or pstats).
+        :param crop_to_design: If true, all arrays used during evolution (slat array, candidate handle arrays, mutation mask)
+        are cropped to the bounding box of the design's slats, and stored as uint16, so memory scales with the design
+        rather than the canvas.  Results (e.g. handle_array) are still provided in full canvas coordinates.
+        Random draws depend on the array size, so the evolution trajectory for a given seed will differ from that of a full canvas run
+        unless the design already fills its canvas.
         """
 
         # initial parameter setup
@@ -63,22 +89,31 @@ class EvolveManager:
 
         # creates Megastructure objects to help compute arrays required for compensating match calculation histograms
         self.dummy_megastructure = megastructure
-        self.slat_array = megastructure.generate_slat_occupancy_grid()
         self.repeating_unit_constraints = {} if repeating_unit_constraints is None else repeating_unit_constraints
 
-        seed_handle_array = megastructure.generate_assembly_handle_grid(category='all_slats')
-
-        if np.sum(seed_handle_array) == 0:
-            self.handle_array = None
+        if isinstance(crop_to_design, str):
+            crop_to_design = eval(crop_to_design.capitalize())
+        # repeating unit constraints are defined in canvas coordinates, so these designs are always evolved on the full canvas
+        if crop_to_design and len(self.repeating_unit_constraints) == 0:
+            self.grid_window = megastructure.get_design_window()
         else:
-            self.handle_array = seed_handle_array # this variable holds the current best handle array in the system (updated throughout evolution)
+            self.grid_window = None
+
+        # all internal arrays are in grid window coordinates (see the handle_array property for the canvas version)
+        self.slat_array = megastructure.generate_slat_occupancy_grid(window=self.grid_window, compact=self.grid_window is not None)
+
+        seed_handle_array = megastructure.generate_assembly_handle_grid(category='all_slats', window=self.grid_window)
+
+        self._handle_array = None # this variable holds the current best handle array in the system (updated throughout evolution)
+        if np.sum(seed_handle_array) != 0:
+            self._handle_array = seed_handle_array
 
         # Store update_scope and extract additional positions from seed handle array if 'all'
         self.update_scope = update_scope
         self.additional_positions = None
-        if update_scope == 'all' and self.handle_array is not None:
+        if update_scope == 'all' and self._handle_array is not None:
             # Extract all non-zero positions from the seed handle array as additional positions
-            self.additional_positions = set(zip(*np.where(self.handle_array != 0)))
+            self.additional_positions = set(zip(*np.where(self._handle_array != 0)))
 
         self.generational_survivors = int(generational_survivors)
         self.mutation_rate = mutation_rate
@@ -88,10 +123,34 @@ class EvolveManager:
         self.similarity_score_calculation_frequency = int(similarity_score_calculation_frequency)
         self.current_generation = 0
 
+        if isinstance(early_candidate_rejection, str):
+            self.early_candidate_rejection = eval(early_candidate_rejection.capitalize())
+        else:
+            self.early_candidate_rejection = early_candidate_rejection
+        if early_rejection_valency_margin is None:
+            self.early_rejection_valency_margin = None
+        else:
+            self.early_rejection_valency_margin = int(early_rejection_valency_margin)
+        self.rejection_mean_log_cutoff = None  # updated after each generation from the survivors' scores
+        self.rejection_worst_match_cutoff = None
+
         self.log_tracking_directory = log_tracking_directory
         if self.log_tracking_directory is not None:
             create_dir_if_empty(self.log_tracking_directory)
 
+        if isinstance(stage_profiling, str):
+            self.stage_profiling = eval(stage_profiling.capitalize())
+        else:
+            self.stage_profiling = stage_profiling
+        self.pickled_bytes = None  # size of the data transferred to/from the workers in one generation (see stage_profiling)
+        if profile_dump_interval is None:
+            self.profile_dump_interval = None
+        else:
+            self.profile_dump_interval = int(profile_dump_interval)
+            if self.log_tracking_directory is None:
+                raise ValueError('Log tracking directory must be specified to save cProfile dumps.')
+        self.pending_logging_time = 0.0  # time spent exporting results since the last generation
+
         self.progress_bar_update_iterations = int(progress_bar_update_iterations)
         self.mutation_memory_system = mutation_memory_system
         self.hall_of_shame_memory = memory_length
@@ -121,19 +180,34 @@ class EvolveManager:
 
         print(Fore.BLUE + f'Handle array evolution core count set to {self.num_processes}.' + Fore.RESET)
 
+        self.elite_archive_size = int(elite_archive_size)
+        self.latest_survivors = []  # (handle array, effective parasitic valency, max parasitic valency, hall of shame) of the last generation
+        if elite_archive_directory is None:
+            self.elite_archive = None
+        else:
+            self.elite_archive = EliteArchive(elite_archive_directory, capacity=self.elite_archive_size)
+            self.geometry_hash = compute_design_geometry_hash(megastructure, self.number_unique_handles)
+            self.archive_slat_grid = megastructure.generate_slat_occupancy_grid(category='all_slats')
+
         self.next_candidates = self.initialize_evolution()
+        archived_hallofshame = self.seed_from_elite_archive()
         self.initial_candidates = self.next_candidates.copy()
 
-        if self.handle_array is None:
-            self.dummy_megastructure.assign_assembly_handles(self.next_candidates[0])
+        if self._handle_array is None:
+            self.dummy_megastructure.assign_assembly_handles(self.next_candidates[0], window=self.grid_window)
 
-        self.mutation_mask = self.dummy_megastructure.generate_assembly_handle_grid(create_mutation_mask=True, category='all_slats')
+        self.mutation_mask = self.dummy_megastructure.generate_assembly_handle_grid(create_mutation_mask=True, category='all_slats',
+                                                                                    window=self.grid_window)
 
         self.slat_compensation_match_counts, self.slat_connection_graph = self.dummy_megastructure.get_slat_match_counts()
 
         self.memory_hallofshame = defaultdict(list)
         self.memory_best_parent_hallofshame = defaultdict(list)
         self.initial_hallofshame = defaultdict(list)
+        if archived_hallofshame is not None:
+            for entry in archived_hallofshame:
+                for key in ['handles', 'antihandles']:
+                    self.memory_hallofshame[key].append([tuple(combo) for combo in entry[key]])
 
         self.excel_conditional_formatting = {'type': '3_color_scale',
                                              'criteria': '<>',
@@ -150,24 +224,42 @@ class EvolveManager:
 
         self.pool = self._mp_ctx.Pool(processes=self.num_processes)
 
+    @property
+    def handle_array(self):
+        """
+        The current best handle array (None before evolution if the design had no handles), in full canvas coordinates.
+        """
+        if self._handle_array is None or self.grid_window is None:
+            return self._handle_array
+        return self.grid_window.expand(self._handle_array)
+
+    @handle_array.setter
+    def handle_array(self, handle_array):
+        if handle_array is not None and self.grid_window is not None:
+            handle_array = self.grid_window.crop(handle_array)
+        self._handle_array = handle_array
+
+    def _to_canvas(self, handle_array):
+        return handle_array if self.grid_window is None else self.grid_window.expand(handle_array)
+
     def initialize_evolution(self):
         """
         Initializes the pool of candidate handle arrays.
         """
         candidate_handle_arrays = []
-        slat_array_with_phantoms = self.dummy_megastructure.generate_slat_occupancy_grid(category='all')
+        slat_array_with_phantoms = self.dummy_megastructure.generate_slat_occupancy_grid(category='all', window=self.grid_window)
         if not self.split_sequence_handles or slat_array_with_phantoms.shape[2] < 3:
             for j in range(self.evolution_population):
                 candidate_array = generate_random_slat_handles(slat_array_with_phantoms, self.number_unique_handles, self.repeating_unit_constraints, additional_positions=self.additional_positions)
-                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_array)
+                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_array, window=self.grid_window)
                 candidate_handle_arrays.append(candidate_array)
         else:
             for j in range(self.evolution_population):
                 candidate_array = generate_layer_split_handles(slat_array_with_phantoms,  self.number_unique_handles, self.sequence_split_factor, self.repeating_unit_constraints, additional_positions=self.additional_positions)
-                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_array)
+                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_array, window=self.grid_window)
                 candidate_handle_arrays.append(candidate_array)
-        if self.handle_array is not None:
-            candidate_handle_arrays[0] = self.handle_array
+        if self._handle_array is not None:
+            candidate_handle_arrays[0] = self._handle_array
 
             # Fill missing handle positions in the initial array
             # Use a random candidate as reference for valid interface positions
@@ -190,10 +282,53 @@ class EvolveManager:
                         random_fills[..., i] = np.random.randint(h_start, h_end, size=(random_fills.shape[0], random_fills.shape[1]), dtype=np.uint16)
 
                 candidate_handle_arrays[0][missing_positions] = random_fills[missing_positions]
-                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_handle_arrays[0])
+                self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(candidate_handle_arrays[0], window=self.grid_window)
 
         return candidate_handle_arrays
 
+    def seed_from_elite_archive(self):
+        """
+        Replaces part of the initial random population with the best handle arrays previously found for this design.
+        Archived arrays from an edited design are repaired to fit the current set of handle positions.
+        :return: The archived hall of shame entries (only if the design geometry is an exact match, otherwise None)
+        """
+        if self.elite_archive is None:
+            return None
+
+        archive_entry = self.elite_archive.load(self.geometry_hash, self.archive_slat_grid, self.number_unique_handles)
+        if archive_entry is None:
+            return None
+
+        # the user-provided seed array always takes the first slot
+        start_index = 0 if self._handle_array is None else 1
+        seed_count = min(len(archive_entry['handle_arrays']), self.evolution_population - start_index)
+        for i in range(seed_count):
+            # archived arrays are stored (and repaired) in canvas coordinates
+            reference_array = self._to_canvas(self.next_candidates[start_index + i])
+            seeded_array = repair_archived_handle_array(archive_entry['handle_arrays'][i].astype(reference_array.dtype), reference_array)
+            if self.grid_window is not None:
+                seeded_array = self.grid_window.crop(seeded_array)
+            self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(seeded_array, window=self.grid_window)
+            self.next_candidates[start_index + i] = seeded_array
+
+        match_type = 'matching' if archive_entry['exact_match'] else 'similar'
+        print(Fore.BLUE + f'Seeded {seed_count} candidates from the elite archive of a {match_type} design.' + Fore.RESET)
+
+        if archive_entry['exact_match']:
+            return archive_entry['hallofshame'][:seed_count]
+        return None
+
+    def save_to_elite_archive(self):
+        """
+        Merges the survivors of the latest generation into the elite archive (if one was requested).
+        """
+        if self.elite_archive is None or len(self.latest_survivors) == 0:
+            return
+        arrays, mean_log_scores, worst_match_scores, hallofshame = zip(*self.latest_survivors)
+        arrays = [self._to_canvas(array) for array in arrays]
+        self.elite_archive.update(self.geometry_hash, self.archive_slat_grid, self.number_unique_handles,
+                                  arrays, mean_log_scores, worst_match_scores, hallofshame)
+
     def single_evolution_step(self):
         """
         Performs a single evolution step, evaluating all candidate arrays and preparing new mutations for the next generation.
@@ -204,6 +339,11 @@ class EvolveManager:
 
         self.current_generation += 1
 
+        profiler = None
+        if self.profile_dump_interval and self.current_generation % self.profile_dump_interval == 0:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
         request_sim_score = (self.current_generation % self.similarity_score_calculation_frequency == 0) or (self.current_generation == 1)
 
         mean_parasitic_valency = np.zeros(self.evolution_population)  # initialize the score variable which will be used as the phenotype for the selection.
@@ -217,23 +357,39 @@ class EvolveManager:
         # multiprocessing will be used to speed up overall computation and parallelize the hamming distance calculations
         # refer to the multirule_oneshot_hamming function for details on input arguments
         multiprocess_start = time.time()
+        stage_start = time.perf_counter()
 
         analysis_inputs = []
         for j in range(self.evolution_population):
             handles, antihandles = self.dummy_megastructure.get_bag_of_slat_handles(use_original_slat_array=True,
                                                                                     use_external_handle_array = self.next_candidates[j],
-                                                                                    remove_blank_slats=True)
+                                                                                    remove_blank_slats=True, window=self.grid_window)
+
+            # parents are always placed first in the candidate list, so only the mutated children are given cutoffs
+            if self.early_candidate_rejection and j >= self.generational_survivors:
+                cutoffs = (self.rejection_worst_match_cutoff, self.rejection_mean_log_cutoff)
+            else:
+                cutoffs = (None, None)
 
-            analysis_inputs.append((handles, antihandles, self.slat_compensation_match_counts, self.slat_connection_graph, self.dummy_megastructure.connection_angle, True, 10, request_sim_score))
+            analysis_inputs.append((handles, antihandles, self.slat_compensation_match_counts, self.slat_connection_graph, self.dummy_megastructure.connection_angle, True, 10, request_sim_score) + cutoffs + (self.stage_profiling,))
 
+        extraction_time = time.perf_counter() - stage_start
+        stage_start = time.perf_counter()
         results = self.pool.starmap(comprehensive_score_analysis, analysis_inputs)
+        scoring_time = time.perf_counter() - stage_start
         multiprocess_time = time.time() - multiprocess_start
 
         # Unpack and store noflank_results from multiprocessing
+        rejected_candidates = np.zeros(self.evolution_population, dtype=bool)
         for index, res in enumerate(results):
             mean_parasitic_valency[index] = res['mean_log_score']
             max_parasitic_valency[index] = res['worst_match_score']
-            if request_sim_score:
+            if res['rejected']:
+                # rejected scores are only lower bounds, so these candidates must never be selected
+                rejected_candidates[index] = True
+                mean_parasitic_valency[index] = np.inf
+                duplicate_risk_scores[index] = np.nan
+            elif request_sim_score:
                 duplicate_risk_scores[index] = res['similarity_score']
             worst_handle_combos = [tuple(map(int, re.findall(r'\d+', r[0]))) for r in res['worst_slat_combos']]
             worst_antihandle_combos = [tuple(map(int, re.findall(r'\d+', r[1]))) for r in res['worst_slat_combos']]
@@ -267,22 +423,54 @@ class EvolveManager:
 
         self.metrics['Compute Time'].append(multiprocess_time)
         self.metrics['Generation'].append(self.current_generation)
-
+        if self.early_candidate_rejection:
+            self.metrics['Early Rejections'].append(int(np.sum(rejected_candidates)))
+
+        self.metrics['Handle Extraction Time'].append(extraction_time)
+        self.metrics['Scoring Time'].append(scoring_time)
+        if self.stage_profiling:
+            worker_timings = defaultdict(float)
+            for res in results:
+                for stage, stage_time in res['timings'].items():
+                    worker_timings[stage] += stage_time
+            self.metrics['Worker Match Compute Time'].append(worker_timings['match_compute'])
+            self.metrics['Worker Similarity Time'].append(worker_timings['similarity_compute'])
+            self.metrics['Worker Worst Combo Time'].append(worker_timings['worst_combo_extraction'])
+            # whatever the workers did not account for (spread over all processes) is spent on transfers and scheduling
+            self.metrics['IPC Overhead Time'].append(max(0.0, scoring_time - sum(worker_timings.values()) / self.num_processes))
+            pairs_per_rotation = defaultdict(int)
+            for res in results:
+                for angle, pair_count in res['pairs_computed'].items():
+                    pairs_per_rotation[angle] += pair_count
+            # survivors are never rejected, so every rotation is reported each generation
+            for angle in sorted(pairs_per_rotation):
+                self.metrics[f'Pairs Computed at {angle} Degrees'].append(pairs_per_rotation[angle])
+            # inputs and outputs keep the same shapes throughout the evolution, so their pickled size is only measured once
+            if self.pickled_bytes is None:
+                self.pickled_bytes = (len(pickle.dumps(analysis_inputs, protocol=pickle.HIGHEST_PROTOCOL)) +
+                                      len(pickle.dumps(results, protocol=pickle.HIGHEST_PROTOCOL)))
+            self.metrics['Bytes Pickled'].append(self.pickled_bytes)
+
+        # cells outside the grid window are empty in every array, but are still counted as matching
+        cropped_cells = 0
+        if self.grid_window is not None:
+            cropped_cells = (np.prod(self.grid_window.canvas_shape) - np.prod(self.grid_window.shape)) * self.next_candidates[0].shape[2]
         similarity_scores = []
         for candidate in self.next_candidates:
             for initial_candidate in self.initial_candidates:
-                similarity_scores.append(np.sum(candidate == initial_candidate))
+                similarity_scores.append(np.sum(candidate == initial_candidate) + cropped_cells)
 
         self.metrics['Similarity of Array to Initial Population'].append(sum(similarity_scores) / len(similarity_scores))
 
         # Select and store the current best handle array
 
-        self.handle_array = self.next_candidates[best_idx]
+        self._handle_array = self.next_candidates[best_idx]
 
         # Extracts precomputed match histogram from multirule_oneshot_hamming for the best candidate
         self.mismatch_histograms.append(results[best_idx]['match_histogram'])
 
         # apply mutations and select the next generation of candidates
+        stage_start = time.perf_counter()
         candidate_handle_arrays, _ = mutate_handle_arrays(self.slat_array, self.next_candidates,
                                                           hallofshame=hallofshame,
                                                           memory_hallofshame=self.memory_hallofshame,
@@ -297,11 +485,18 @@ class EvolveManager:
                                                           sequence_split_factor=self.sequence_split_factor,
                                                           repeating_unit_constraints=self.repeating_unit_constraints,
                                                           mutation_mask=self.mutation_mask)
+        self.metrics['Mutation Time'].append(time.perf_counter() - stage_start)
 
-        candidate_handle_arrays = [self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(arr) for arr in candidate_handle_arrays]
+        stage_start = time.perf_counter()
+        candidate_handle_arrays = [self.dummy_megastructure.enforce_phantom_links_on_assembly_handle_array(arr, window=self.grid_window)
+                                   for arr in candidate_handle_arrays]
+        self.metrics['Phantom Link Time'].append(time.perf_counter() - stage_start)
+        self.metrics['Logging Time'].append(self.pending_logging_time)
+        self.pending_logging_time = 0.0
 
         for key, payload in hallofshame.items():
-            self.memory_hallofshame[key].extend(payload)
+            # rejected candidates do not report their worst combinations, so are kept out of the memory
+            self.memory_hallofshame[key].extend([p for i, p in enumerate(payload) if not rejected_candidates[i]])
             self.memory_best_parent_hallofshame[key].extend([payload[i] for i in indices_of_largest_scores])
 
         if len(self.memory_hallofshame['handles']) > self.hall_of_shame_memory * self.evolution_population:
@@ -309,13 +504,41 @@ class EvolveManager:
                 self.memory_hallofshame[key] = self.memory_hallofshame[key][-self.hall_of_shame_memory * self.evolution_population:]
                 self.memory_best_parent_hallofshame[key] = self.memory_best_parent_hallofshame[key][-self.hall_of_shame_memory * self.generational_survivors:]
 
+        if self.elite_archive is not None:
+            self.latest_survivors = [(self.next_candidates[i], mean_parasitic_valency[i], max_parasitic_valency[i],
+                                      {'handles': hallofshame['handles'][i], 'antihandles': hallofshame['antihandles'][i]})
+                                     for i in indices_of_largest_scores if not rejected_candidates[i]]
+
         self.next_candidates = candidate_handle_arrays
 
+        if self.early_candidate_rejection:
+            # the survivors are re-scored next generation, so a child that is guaranteed to score worse than all of them
+            # can never be selected
+            self.rejection_mean_log_cutoff = float(np.max(mean_parasitic_valency[indices_of_largest_scores]))
+            if self.early_rejection_valency_margin is not None:
+                self.rejection_worst_match_cutoff = int(max_parasitic_valency[best_idx]) + self.early_rejection_valency_margin
+
+        if profiler is not None:
+            profiler.disable()
+            profile_folder = os.path.join(self.log_tracking_directory, 'profiles')
+            create_dir_if_empty(profile_folder)
+            profiler.dump_stats(os.path.join(profile_folder, f'generation_{self.current_generation}.prof'))
+
+    def latest_stage_timings(self):
+        """
+        Returns the stage timings and profiling counters of the latest generation.
+        :return: Dictionary of metric name to value (empty if no generation has been run)
+        """
+        stage_metrics = ['Handle Extraction Time', 'Scoring Time', 'Mutation Time', 'Phantom Link Time', 'Logging Time',
+                         'Worker Match Compute Time', 'Worker Similarity Time', 'Worker Worst Combo Time',
+                         'IPC Overhead Time'] + [name for name in self.metrics if name.startswith('Pairs Computed at')] + ['Bytes Pickled']
+        return {name: float(self.metrics[name][-1]) for name in stage_metrics if len(self.metrics.get(name, [])) > 0}
 
     def _save_handle_array_to_excel(self, folder, filename):
         writer = pd.ExcelWriter(os.path.join(folder, filename), engine='xlsxwriter')
-        for layer_index in range(self.handle_array.shape[-1]):
-            df = pd.DataFrame(self.handle_array[..., layer_index])
+        handle_array = self.handle_array
+        for layer_index in range(handle_array.shape[-1]):
+            df = pd.DataFrame(handle_array[..., layer_index])
             df.to_excel(writer, sheet_name=f'handle_interface_{layer_index + 1}', index=False, header=False)
             writer.sheets[f'handle_interface_{layer_index + 1}'].conditional_format(0, 0, df.shape[0], df.shape[1] - 1, self.excel_conditional_formatting)
         writer.close()
@@ -395,6 +618,8 @@ class EvolveManager:
         if not suppress_handle_array_export:
             self._save_handle_array_to_excel(output_folder, f'best_handle_array_generation_{self.current_generation}.xlsx')
 
+        self.save_to_elite_archive()
+
         if parameter_export:
             full_parameter_set = {
                 'random_seed': self.seed,
@@ -411,7 +636,16 @@ class EvolveManager:
                 'progress_bar_update_iterations': self.progress_bar_update_iterations,
                 'mutation_memory_system': self.mutation_memory_system,
                 'memory_length': self.hall_of_shame_memory,
+                'early_candidate_rejection': self.early_candidate_rejection,
+                'elite_archive_size': self.elite_archive_size,
+                'stage_profiling': self.stage_profiling,
             }
+            if self.early_rejection_valency_margin is not None:
+                full_parameter_set['early_rejection_valency_margin'] = self.early_rejection_valency_margin
+            if self.elite_archive is not None:
+                full_parameter_set['elite_archive_directory'] = self.elite_archive.archive_directory
+            if self.profile_dump_interval is not None:
+                full_parameter_set['profile_dump_interval'] = self.profile_dump_interval
 
             toml.dump(full_parameter_set, open(os.path.join(output_folder, 'evolution_config.toml'), 'w'))
 
@@ -437,7 +671,9 @@ class EvolveManager:
                         save_first = False  # only save once
 
                     if (index+1) % logging_interval == 0:
+                        logging_start = time.perf_counter()
                         self.export_results(suppress_handle_array_export=suppress_handle_array_export)
+                        self.pending_logging_time += time.perf_counter() - logging_start
 
                     pbar.update(1)
                     pbar.set_postfix({f'Latest max parasitic valency': self.metrics['Corresponding Max Parasitic Valency'][-1],
@@ -447,6 +683,7 @@ class EvolveManager:
                     if self.early_max_valency_stop and min(self.metrics['Corresponding Max Parasitic Valency']) <= self.early_max_valency_stop:
                         print('Early stopping criteria met, ending evolution process.')
                         break
+            self.save_to_elite_archive()
             self.close_pool()
 
         except KeyboardInterrupt:
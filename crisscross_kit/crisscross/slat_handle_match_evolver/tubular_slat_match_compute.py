@@ -75,25 +75,30 @@ def extract_handle_dicts(handle_array, slat_array, list_indices_only=False, cust
         return handle_dict, antihandle_dict
 
 
-def oneshot_hamming_compute(handle_dict, antihandle_dict, slat_length):
+def oneshot_hamming_compute(handle_dict, antihandle_dict, slat_length, max_block_bytes=256 * 1024 ** 2):
     """
     Given a dictionary of slat handles and antihandles, this function computes the hamming distance between all possible combinations.
     This is the fastest implementation available, making full use of Numpy's efficient vector computation.
+    Combinations are computed in blocks of handle/antihandle slats, so that the working memory used stays within
+    max_block_bytes regardless of the number of slats in the design (only the final results scale with the design).
     :param handle_dict: Dictionary of handles i.e. {slat_id: slat_handle_array}
     :param antihandle_dict: Dictionary of antihandles i.e. {slat_id: slat_antihandle_array}
     :param slat_length: The length of a single slat (must be an integer)
+    :param max_block_bytes: Approximate memory limit (in bytes) for the match array computed for each block of combinations
     :return: Array of noflank_results for each possible combination (a single integer per combination)
     """
 
     handles = np.array(list(handle_dict.values()))
     num_handles = handles.shape[0]
     flippedhandles = handles[:, ::-1]
+    shift_count = (4 * slat_length) - 2
 
     # Generate every possible shift and reversed shift of the handle sequences -
     # the goal is to simulate every possible physical interaction between two slats
     # The total length will be 4 * the slat length - 2 (two states are repeated)
     # The operations are repeated for all handles in the input array
-    shifted_handles = np.zeros((handles.shape[0], (4 * slat_length)-2, slat_length), dtype=np.uint16)
+    # Empty positions are set to -1, which can never match an antihandle (this removes the need for a separate zero check)
+    shifted_handles = np.full((num_handles, shift_count, slat_length), -1, dtype=np.int32)
 
     for i in range(slat_length):
         # Normal shifts
@@ -104,22 +109,30 @@ def oneshot_hamming_compute(handle_dict, antihandle_dict, slat_length):
         shifted_handles[:, 2 * slat_length + i - 1, i:] = flippedhandles[:, :slat_length - i]
         if i != 0:  # skip the first one as it repeats the normal reversed slat
             shifted_handles[:, 3 * slat_length + i - 2, :slat_length - i] = flippedhandles[:, i:] # index has a -2 due to the two skipped combinations at this point
+    shifted_handles[shifted_handles == 0] = -1
 
-    # The antihandles should simply be tiled to generate the same number of sequences as the handles, shifts are not needed
-    antihandles = np.array(list(antihandle_dict.values()))
+    # The antihandles do not need to be shifted - broadcasting matches each one against every shift of the handles
+    antihandles = np.array(list(antihandle_dict.values()), dtype=np.int32)
     num_antihandles = antihandles.shape[0]
-    tiled_antihandles = np.tile(antihandles[:, np.newaxis, :], (1, (4 * slat_length) - 2, 1))
 
-    # tiles all the handle and antihandles into a large 4D array containing:
-        # all combinations of handles with antihandles (dimensions 1 and 2)
-        # all possible shifts of the handles (dimension 3)
-    # This final tiling ensures that each and every handle-slat is matched with each and every antihandle-slat
-    combinatorial_matrix_handles = np.tile(shifted_handles[:, np.newaxis, :, :], (1, num_antihandles, 1, 1))
-    combinatorial_matrix_antihandles = np.tile(tiled_antihandles[np.newaxis, :, :, :], (num_handles, 1, 1, 1))
-
-    # After all the matches are built up, the hamming distance can be computed for all combinations in one go
-    all_matches = (combinatorial_matrix_handles == combinatorial_matrix_antihandles) & (combinatorial_matrix_handles != 0)
-    hamming_results = slat_length - np.count_nonzero(all_matches, axis=3) # hamming distance maximum is always the length of the slats
+    # block sizes are selected so that each block's boolean match array (handles x antihandles x shifts x slat length)
+    # stays within the memory limit.  Whole rows of antihandles are used whenever possible.
+    combos_per_block = max(1, max_block_bytes // (shift_count * slat_length))
+    if num_antihandles <= combos_per_block:
+        antihandle_block = max(1, num_antihandles)
+        handle_block = max(1, combos_per_block // antihandle_block)
+    else:
+        antihandle_block = combos_per_block
+        handle_block = 1
+
+    hamming_results = np.empty((num_handles, num_antihandles, shift_count), dtype=np.int64)
+    for h_start in range(0, num_handles, handle_block):
+        handle_view = shifted_handles[h_start:h_start + handle_block, np.newaxis, :, :]
+        for a_start in range(0, num_antihandles, antihandle_block):
+            antihandle_view = antihandles[np.newaxis, a_start:a_start + antihandle_block, np.newaxis, :]
+            # hamming distance maximum is always the length of the slats
+            hamming_results[h_start:h_start + handle_block, a_start:a_start + antihandle_block] = \
+                slat_length - np.count_nonzero(handle_view == antihandle_view, axis=3)
 
     return hamming_results
 
@@ -208,25 +221,30 @@ def multirule_oneshot_hamming(slat_array, handle_array,
 
     # If requested, the hamming distance for each layer and each specific slat group is calculated (these will always be better than or identical to the universal score)
     if per_layer_check or specific_slat_groups:
-        layer_hammings = defaultdict(list)
-        group_hammings = defaultdict(list)
-        for (handle_layer, handle_id), (antihandle_layer, antihandle_id) in product(handle_ordered_list, antihandle_ordered_list):
-            handle_matrix_index = handle_ordered_list.index((handle_layer, handle_id))
-            antihandle_matrix_index = antihandle_ordered_list.index((antihandle_layer, antihandle_id))
-
-            if per_layer_check and handle_layer == antihandle_layer - 1:
-                layer_hammings[handle_layer].append(min(hamming_results[handle_matrix_index, antihandle_matrix_index, :]))
-            if specific_slat_groups:
-                for group_key, group in specific_slat_groups.items():
-                    if (handle_layer, handle_id) in group and (antihandle_layer, antihandle_id) in group:
-                        group_hammings[group_key].append(min(hamming_results[handle_matrix_index, antihandle_matrix_index, :]))
+        pair_hammings = np.min(hamming_results, axis=2)  # best alignment of each handle/antihandle combination
 
+        def first_pair(selected_pairs):
+            # position of the first selected combination (in handle-major order), used to keep the order of the reports stable
+            return np.argmax(selected_pairs) if selected_pairs.any() else None
+
+        group_reports = []
         if per_layer_check:
-            for layer, all_hammings in layer_hammings.items():
-                score_dict[f'Layer {layer}'] = np.min(all_hammings)
+            handle_layers = np.array([layer for layer, _ in handle_ordered_list])
+            antihandle_layers = np.array([layer for layer, _ in antihandle_ordered_list])
+            for layer in np.unique(handle_layers):
+                layer_pairs = (handle_layers == layer)[:, np.newaxis] & (antihandle_layers == layer + 1)[np.newaxis, :]
+                group_reports.append((first_pair(layer_pairs.ravel()), 0, f'Layer {layer}', layer_pairs))
         if specific_slat_groups:
-            for group_key, all_hammings in group_hammings.items():
-                score_dict[group_key] = np.min(all_hammings)
+            for group_index, (group_key, group) in enumerate(specific_slat_groups.items()):
+                handles_in_group = np.array([slat_key in group for slat_key in handle_ordered_list], dtype=bool)
+                antihandles_in_group = np.array([slat_key in group for slat_key in antihandle_ordered_list], dtype=bool)
+                group_pairs = handles_in_group[:, np.newaxis] & antihandles_in_group[np.newaxis, :]
+                group_reports.append((first_pair(group_pairs.ravel()), 1 + group_index, group_key, group_pairs))
+
+        # layers are reported before groups, each in the order of their first slat combination
+        group_reports = [report for report in group_reports if report[0] is not None]  # skips layers/groups with no combinations
+        for _, _, report_key, selected_pairs in sorted(group_reports, key=lambda report: (report[1] > 0, report[0], report[1])):
+            score_dict[report_key] = np.min(pair_hammings[selected_pairs])
 
     # generates lists of the worst handle/antihandle combinations - these will be used for mutations in the evolutionary algorithm
     if report_worst_slat_combinations:
@@ -250,12 +268,12 @@ def multirule_oneshot_hamming(slat_array, handle_array,
 
     # if a specific region was requested, filter for just the slats that were considered rather than all slats
     if partial_area_score:
-        handle_ordered_list_partial = list(handle_dict_partial.keys())
-        antihandle_ordered_list_partial = list(antihandle_dict_partial.keys())
+        handle_index_partial = {slat_key: index for index, slat_key in enumerate(handle_dict_partial.keys())}
+        antihandle_index_partial = {slat_key: index for index, slat_key in enumerate(antihandle_dict_partial.keys())}
         for group_key, slat_dict in partial_area_score.items():
-            handle_matrix_indices = np.array([handle_ordered_list_partial.index((x,y)) for x,y in slat_dict["handles"].keys()], dtype=np.uint16)
-            antihandle_matrix_indices = np.array([antihandle_ordered_list_partial.index((x,y)) for x,y in slat_dict["antihandles"].keys()], dtype=np.uint16)
-            score_dict[group_key] = np.min([hamming_results_partial[group_key][hID, ahID, :] for hID, ahID in product(handle_matrix_indices, antihandle_matrix_indices)])
+            handle_matrix_indices = [handle_index_partial[slat_key] for slat_key in slat_dict["handles"].keys()]
+            antihandle_matrix_indices = [antihandle_index_partial[slat_key] for slat_key in slat_dict["antihandles"].keys()]
+            score_dict[group_key] = np.min(hamming_results_partial[group_key][np.ix_(handle_matrix_indices, antihandle_matrix_indices)])
 
     # Precomputes match histogram (based on oneshot noflank_results computed above)
     if return_match_histogram:
@@ -2,3 +2,8 @@
 def compute(*args, **kwargs):
     from .eqcorr2d_engine import compute as _compute
     return _compute(*args, **kwargs)
+
+
+def compute_batch(*args, **kwargs):
+    from .eqcorr2d_engine import compute_batch as _compute_batch
+    return _compute_batch(*args, **kwargs)
@@ -27,6 +27,30 @@
 # endif
 #endif
 
+// Forces a function to be inlined, so that constant arguments (output flags, fixed widths)
+// specialise its body at every call site.
+#ifndef EQ_ALWAYS_INLINE
+# if defined(__GNUC__) || defined(__clang__)
+#  define EQ_ALWAYS_INLINE inline __attribute__((always_inline))
+# elif defined(_MSC_VER)
+#  define EQ_ALWAYS_INLINE __forceinline
+# else
+#  define EQ_ALWAYS_INLINE inline
+# endif
+#endif
+
+// Runtime CPU dispatch: on x86-64 GCC/glibc builds, the specialised kernels are compiled
+// twice (baseline and AVX2) and the best version is picked when the module is loaded.
+// The baseline build keeps the wheels runnable on any x86-64 CPU.
+#ifndef EQ_CPU_DISPATCH
+# if defined(__GNUC__) && !defined(__clang__) && defined(__x86_64__) && defined(__GLIBC__) \
+     && !defined(EQCORR2D_NO_CPU_DISPATCH)
+#  define EQ_CPU_DISPATCH __attribute__((target_clones("avx2", "default")))
+# else
+#  define EQ_CPU_DISPATCH
+# endif
+#endif
+
 #ifdef __cplusplus
 extern "C" {
 #endif
@@ -38,16 +62,44 @@ typedef uint64_t hist_t; // histogram bin type (global histogram uses uint64)
 #include <stdint.h>
 typedef uint32_t local_hist_t; // local histogram bin type (per-pair) uses uint32
 
-// Track (iA, iB) pairs achieving the global maximum match value.
+// Compact worst-match tracking: the (iA, iB) pairs whose highest match value equals the
+// running maximum, kept as a sparse list with their number of offsets at that value.
 typedef struct {
-    int            max_val;
-    npy_intp       nA, nB;         // matrix dimensions (nA rows x nB cols)
-    uint32_t*      counts;         // nA*nB counter matrix; counts[ia*nB + ib]
+    int            max_val;        // running maximum (starts at the caller's floor)
+    npy_intp       n, cap;         // number of listed pairs / allocated capacity
+    npy_intp*      pairs;          // 2*cap entries: (ia, ib) of each listed pair
+    uint64_t*      counts;         // cap entries: offsets of each listed pair at max_val
 } worst_tracker_t;
 
-// Helpers for worst tracking (counting version)
+// Helpers for worst tracking (compact version). Return -1 on allocation failure.
 int worst_reset(worst_tracker_t *wt, int new_max);
-int worst_count(worst_tracker_t *wt, npy_intp ia, npy_intp ib);
+int worst_count(worst_tracker_t *wt, npy_intp ia, npy_intp ib, uint64_t count);
+// Highest non-empty bin of a local histogram (0 if all bins are empty).
+int local_hist_max(const local_hist_t *local_hist, npy_intp hdim);
+// Updates the tracker with the local histogram of one pair; returns the pair's
+// highest match value (or -1 on allocation failure).
+int worst_update(worst_tracker_t *wt, const local_hist_t *local_hist, npy_intp hdim, npy_intp ia, npy_intp ib);
+
+// Running bound for the early-exit (bounded) scoring mode. Counts in a bin up to
+// allowance[bin] are absorbed (expected matches); every count beyond that is
+// "excess" and either rejects the run outright (bin > reject_above) or adds
+// weights[bin] to a running score that rejects the run once above cutoff.
+typedef struct {
+    const int64_t* allowance;     // hdim entries (may be negative if already exceeded)
+    const double*  weights;       // hdim entries, or NULL to disable the score bound
+    int            reject_above;  // -1 disables the worst-match bound
+    double         cutoff;        // score bound (only used with weights)
+    double         excess;        // running weighted excess (starts at caller's offset)
+    int            rejected;
+    hist_t*        row_counts;    // hdim zeroed entries: histogram of the row of pairs being computed
+} bound_tracker_t;
+
+// Adds bt->row_counts to hist (and clears it); returns 1 if the run now exceeds its bounds.
+int bound_merge_row(bound_tracker_t *bt, hist_t *hist, npy_intp hdim);
+
+// 1 (default) lets loop_rot0_mode hand hist/local-only calls to the specialised kernels;
+// 0 forces the generic loop (set from the EQCORR2D_GENERIC_KERNEL environment variable on import).
+extern int eqcorr2d_specialised_kernels;
 
 // Core tight-loop kernel for 0° rotation mode only. All other rotations
 // are handled by pre-rotating B in the binding layer.
@@ -57,8 +109,7 @@ void loop_rot0_mode(
     hist_t *EQ_RESTRICT hist, npy_intp hist_len,
     local_hist_t *EQ_RESTRICT local_hist, npy_intp local_hist_len,
     out_t *EQ_RESTRICT out, npy_intp Ho, npy_intp Wo,
-    int DO_HIST, int DO_LOCAL, int DO_FULL,
-    int DO_WORST, npy_intp IA, npy_intp IB, worst_tracker_t *WT);
+    int DO_HIST, int DO_LOCAL, int DO_FULL);
 
 #ifdef __cplusplus
 }
@@ -3,8 +3,12 @@
 #include <stddef.h>
 #include <limits.h>
 #include <stdint.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
 // Forward declare module methods
-static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args);
+static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args, PyObject* kwargs);
+static PyObject* eqcorr2d_compute_batch(PyObject* self, PyObject* args, PyObject* kwargs);
 
 // We only use the 0° core kernel and pre-rotate B into contiguous buffers.
 // The core declaration is provided by eqcorr2d.h, so no redundant declaration here.
@@ -21,6 +25,34 @@ static void pack_to_contig_u8(const unsigned char* src, npy_intp H, npy_intp W,
 }
 
 
+// ---------------- Parse tracked_pairs into sorted row-major keys (iA * nB + iB) ----------------
+// The pairs are visited in row-major order, so sorted keys let a single cursor find them.
+// Returns -1 with a Python exception set on failure.
+static int parse_tracked_pairs(PyObject* tracked_obj, npy_intp nA, npy_intp nB,
+                               npy_intp** keys_out, npy_intp* n_out) {
+    PyArrayObject* Tracked = (PyArrayObject*)PyArray_FROM_OTF(tracked_obj, NPY_INT64, NPY_ARRAY_IN_ARRAY);
+    if (!Tracked) return -1;
+    if (PyArray_NDIM(Tracked) != 2 || PyArray_DIM(Tracked, 1) != 2) {
+        Py_DECREF(Tracked); PyErr_SetString(PyExc_ValueError, "tracked_pairs must be a (T, 2) array"); return -1; }
+    const npy_intp n_tracked = PyArray_DIM(Tracked, 0);
+    const int64_t* tp = (const int64_t*)PyArray_DATA(Tracked);
+    npy_intp* keys = (npy_intp*)malloc((size_t)(n_tracked > 0 ? n_tracked : 1) * sizeof(npy_intp));
+    if (!keys) { Py_DECREF(Tracked); PyErr_NoMemory(); return -1; }
+    for (npy_intp t = 0; t < n_tracked; ++t) {
+        if (tp[2*t] < 0 || tp[2*t] >= nA || tp[2*t+1] < 0 || tp[2*t+1] >= nB
+            || (t > 0 && tp[2*t] * nB + tp[2*t+1] <= keys[t-1])) {
+            Py_DECREF(Tracked); free(keys);
+            PyErr_SetString(PyExc_ValueError, "tracked_pairs must hold unique (iA, iB) index pairs in row-major order");
+            return -1;
+        }
+        keys[t] = (npy_intp)(tp[2*t] * nB + tp[2*t+1]);
+    }
+    Py_DECREF(Tracked);
+    *keys_out = keys; *n_out = n_tracked;
+    return 0;
+}
+
+
 // ------------------ main API moved here ------------------
 /* ---------------------------------------------------------------------------------------
  * Main callable from Python: eqcorr2d.compute(...)
@@ -44,14 +76,58 @@ static void pack_to_contig_u8(const unsigned char* src, npy_intp H, npy_intp W,
  * - do_full (int bool): if 1, also return the full 2D result map for every
  *   computed pair. Shape at 0°: (Ha+Hb-1, Wa+Wb-1). Warning: can be large; returns
  *   nested Python list [nA][nB] of np.int32 arrays (with None for skipped pairs).
- * - report_worst (int bool): if 1, track the global maximum match count observed
- *   and return unique (iA, iB) pairs that achieved it.
+ * - report_worst (int bool): if 1, return a compact summary of the worst matches
+ *   instead of requiring the full local histograms (see "Worst tracking" below).
+ * - local_histogram (int bool): if 1, also return per-pair histograms (nA, nB, hdim).
  *
- * Return value (3-tuple)
+ * Bounded mode (keyword-only, requires do_hist)
+ * ---------------------------------------------
+ * - hist_allowance: 1D int64 array; counts in bin k up to hist_allowance[k] are
+ *   absorbed (missing bins count as 0). Passing it enables the bounded mode.
+ * - reject_above (int): abort once any excess count lands in a bin > reject_above
+ *   (-1, the default, disables this bound).
+ * - bin_weights: 1D float64 array with the weight of one excess count per bin
+ *   (missing bins weigh 0). Enables the score bound.
+ * - score_cutoff (float): abort once the summed excess weight exceeds this value.
+ * - score_offset (float): excess weight already accumulated by earlier calls.
+ * The bounds are checked once per A item (after its pairs with every B item). On
+ * abort, the outputs contain the partial results gathered so far.
+ *
+ * Symmetric mode (keyword-only, histogram only)
+ * ---------------------------------------------
+ * - symmetric (bool): self-correlation of a single list. B_list must hold the
+ *   items of A_list transformed by a self-inverse rotation (0° or 180°), so that
+ *   pair (i, j) produces the same histogram as pair (j, i). Only pairs with
+ *   i <= j are computed, and each i < j pair is counted twice, giving the same
+ *   histogram as the full nA x nA run in roughly half the time.
+ * - exclude_self_alignment (bool): for the identity rotation (B_list items equal
+ *   to A_list items), removes the trivial count of each item aligned exactly with
+ *   itself (one count in the bin equal to its number of non-zeros).
+ *
+ * Worst tracking (report_worst=1, not available in symmetric mode)
+ * ---------------------------------------------------------------
+ * Each computed pair is summarised from its local histogram (kept in a scratch
+ * buffer unless local_histogram is also requested), giving a dict with:
+ * - 'pair_max': (nA, nB) array (uint8, or uint32 if hdim > 256) with the highest
+ *   match count of each pair (0 for skipped pairs).
+ * - 'worst_value', 'worst_pairs' (K, 2) int64, 'worst_counts' (K,) uint64: the
+ *   highest pair_max among the untracked pairs (at least worst_floor) and every
+ *   untracked pair reaching it, with its number of offsets at that value.
+ * - 'tracked_hist': (T, hdim) uint32 full histograms of the tracked pairs (or None).
+ * Keyword-only options:
+ * - tracked_pairs: (T, 2) int64 array of unique (iA, iB) pairs in row-major order,
+ *   e.g. the pairs that are expected to match by design. Their full histograms are
+ *   returned and they are left out of the worst list.
+ * - worst_floor (int): pairs below this value are never listed (e.g. the worst
+ *   value already found by an earlier rotation). Defaults to -1.
+ *
+ * Return value (5-tuple)
  * ----------------------
  * ( hist_or_None,
  *   outs0_or_None,
- *   worst_pairs_or_None )
+ *   worst_dict_or_None (report_worst),
+ *   local_hist_or_None,
+ *   rejected (bool, always False outside bounded mode) )
  *
  * Implementation notes
  * --------------------
@@ -60,14 +136,61 @@ static void pack_to_contig_u8(const unsigned char* src, npy_intp H, npy_intp W,
  *   Python objects and manages reference counts.
  * - The hot loops are in the core and do not touch the Python C-API.
  * ------------------------------------------------------------------------------------- */
-static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
+static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args, PyObject* kwargs)
 {
+    static char *kwlist[] = {"A_list", "B_list", "compute_instructions", "do_hist", "do_full",
+                             "report_worst", "local_histogram", "hist_allowance", "reject_above",
+                             "bin_weights", "score_cutoff", "score_offset", "symmetric",
+                             "exclude_self_alignment", "tracked_pairs", "worst_floor", NULL};
     PyObject *seqA_obj, *seqB_obj, *mask_obj;
+    PyObject *allowance_obj = Py_None, *weights_obj = Py_None, *tracked_obj = Py_None;
     int do_hist, do_full, do_worst, do_local;
-    do_worst = 0;  // deprecated, keep variable for compatibility
-    if (!PyArg_ParseTuple(args, "OOOppp|p",
+    int reject_above = -1;
+    double score_cutoff = 0.0, score_offset = 0.0;
+    int symmetric = 0, exclude_self = 0;
+    int worst_floor = -1;
+    // Declared up-front so that every `goto fail` path sees initialised pointers
+    typedef struct { unsigned char *p0; npy_intp H0,W0; } Pack;
+    Pack* packs = NULL;
+    PyArrayObject* Hist = NULL;   uint64_t* hist = NULL;
+    int64_t* bound_allowance = NULL; double* bound_weights = NULL; hist_t* bound_row_counts = NULL;
+    uint64_t* pair_hist = NULL;  // symmetric mode: counts of the i < j pairs (added twice at the end)
+    // worst tracking (report_worst)
+    worst_tracker_t WT_local = {0, 0, 0, NULL, NULL}; worst_tracker_t* WT = NULL;
+    PyArrayObject *PairMax = NULL, *TrackedHist = NULL;
+    PyObject *L0 = NULL;   // full output: list (nA) of lists (nB)
+    PyArrayObject *Mask = NULL, *Lh3 = NULL;  // compute instructions and 3D local-hist array (nA, nB, hdim)
+    npy_intp* tracked_keys = NULL; npy_intp n_tracked = 0;
+    local_hist_t* pair_scratch = NULL;
+    do_worst = 0;
+    do_local = 0;
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOppp|p$OiOddppOi", kwlist,
                           &seqA_obj, &seqB_obj, &mask_obj,
-                          &do_hist, &do_full, &do_worst, &do_local)) {
+                          &do_hist, &do_full, &do_worst, &do_local,
+                          &allowance_obj, &reject_above, &weights_obj,
+                          &score_cutoff, &score_offset, &symmetric, &exclude_self,
+                          &tracked_obj, &worst_floor)) {
+        return NULL;
+    }
+    const int do_bound = (allowance_obj != Py_None);
+    if (do_bound && !do_hist) {
+        PyErr_SetString(PyExc_ValueError, "hist_allowance (bounded mode) requires do_hist");
+        return NULL;
+    }
+    if (symmetric && (!do_hist || do_full || do_local || do_bound)) {
+        PyErr_SetString(PyExc_ValueError, "symmetric mode only supports the global histogram output (no full, local or bounded outputs)");
+        return NULL;
+    }
+    if (do_worst && symmetric) {
+        PyErr_SetString(PyExc_ValueError, "report_worst is not available in symmetric mode");
+        return NULL;
+    }
+    if (tracked_obj != Py_None && !do_worst) {
+        PyErr_SetString(PyExc_ValueError, "tracked_pairs requires report_worst");
+        return NULL;
+    }
+    if (exclude_self && !symmetric) {
+        PyErr_SetString(PyExc_ValueError, "exclude_self_alignment requires symmetric mode");
         return NULL;
     }
 
@@ -80,6 +203,10 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
     Py_ssize_t nB = PySequence_Fast_GET_SIZE(B_fast);
     PyObject **A_items = PySequence_Fast_ITEMS(A_fast);
     PyObject **B_items = PySequence_Fast_ITEMS(B_fast);
+    if (symmetric && nA != nB) {
+        PyErr_SetString(PyExc_ValueError, "symmetric mode requires A_list and B_list to have the same length");
+        goto fail;
+    }
 
     // Validate arrays and compute histogram length (max Ha*Wa + 1) based on A
     npy_intp max_prod = 0;
@@ -103,41 +230,86 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
     if (max_prod < 1) max_prod = 1;
     npy_intp hdim = max_prod + 1;
 
+    // Bounded mode: copy allowance/weights into zero-padded hdim-length buffers
+    bound_tracker_t BT_local; bound_tracker_t* BT = NULL;
+    if (do_bound) {
+        bound_allowance = (int64_t*)calloc((size_t)hdim, sizeof(int64_t));
+        if (!bound_allowance) { PyErr_NoMemory(); goto fail; }
+        PyArrayObject* Allow = (PyArrayObject*)PyArray_FROM_OTF(allowance_obj, NPY_INT64, NPY_ARRAY_IN_ARRAY);
+        if (!Allow) goto fail;
+        if (PyArray_NDIM(Allow) != 1) {
+            Py_DECREF(Allow); PyErr_SetString(PyExc_ValueError, "hist_allowance must be a 1D array"); goto fail; }
+        npy_intp n_allow = PyArray_DIM(Allow, 0) < hdim ? PyArray_DIM(Allow, 0) : hdim;
+        memcpy(bound_allowance, PyArray_DATA(Allow), (size_t)n_allow * sizeof(int64_t));
+        Py_DECREF(Allow);
+
+        if (weights_obj != Py_None) {
+            bound_weights = (double*)calloc((size_t)hdim, sizeof(double));
+            if (!bound_weights) { PyErr_NoMemory(); goto fail; }
+            PyArrayObject* W = (PyArrayObject*)PyArray_FROM_OTF(weights_obj, NPY_FLOAT64, NPY_ARRAY_IN_ARRAY);
+            if (!W) goto fail;
+            if (PyArray_NDIM(W) != 1) {
+                Py_DECREF(W); PyErr_SetString(PyExc_ValueError, "bin_weights must be a 1D array"); goto fail; }
+            npy_intp n_w = PyArray_DIM(W, 0) < hdim ? PyArray_DIM(W, 0) : hdim;
+            memcpy(bound_weights, PyArray_DATA(W), (size_t)n_w * sizeof(double));
+            Py_DECREF(W);
+        }
+        bound_row_counts = (hist_t*)calloc((size_t)hdim, sizeof(hist_t));
+        if (!bound_row_counts) { PyErr_NoMemory(); goto fail; }
+        BT = &BT_local;
+        BT->row_counts = bound_row_counts;
+        BT->allowance = bound_allowance;
+        BT->weights = bound_weights;
+        BT->reject_above = reject_above;
+        BT->cutoff = score_cutoff;
+        BT->excess = score_offset;
+        BT->rejected = 0;
+    }
+
     // Validate compute_instructions mask: expect 2D array (nA x nB) of bool/uint8/int
-    PyArrayObject* Mask = (PyArrayObject*)PyArray_FROM_OTF(mask_obj, NPY_UINT8, NPY_ARRAY_ALIGNED);
+    Mask = (PyArrayObject*)PyArray_FROM_OTF(mask_obj, NPY_UINT8, NPY_ARRAY_ALIGNED);
     if (!Mask) { goto fail; }
     if (PyArray_NDIM(Mask) != 2) {
-        Py_DECREF(Mask); PyErr_SetString(PyExc_ValueError, "compute_instructions must be a 2D array (nA x nB)"); goto fail; }
+        PyErr_SetString(PyExc_ValueError, "compute_instructions must be a 2D array (nA x nB)"); goto fail; }
     if (PyArray_DIM(Mask,0) != nA || PyArray_DIM(Mask,1) != nB) {
-        Py_DECREF(Mask); PyErr_SetString(PyExc_ValueError, "compute_instructions shape must be (len(A_list), len(B_list))"); goto fail; }
+        PyErr_SetString(PyExc_ValueError, "compute_instructions shape must be (len(A_list), len(B_list))"); goto fail; }
     const u8* maskp = (const u8*)PyArray_DATA(Mask);
     npy_intp m_s0 = PyArray_STRIDE(Mask,0);
     npy_intp m_s1 = PyArray_STRIDE(Mask,1);
 
-    PyArrayObject* Hist = NULL;   uint64_t* hist = NULL;
     if (do_hist) {
         Hist = (PyArrayObject*)PyArray_Zeros(1, &hdim, PyArray_DescrFromType(NPY_UINT64), 0);
-        if (!Hist) { Py_DECREF(A_fast); Py_DECREF(B_fast); Py_DECREF(Mask); return NULL; }
+        if (!Hist) goto fail;
         hist = (uint64_t*)PyArray_DATA(Hist);
     }
+    if (symmetric) {
+        pair_hist = (uint64_t*)calloc((size_t)hdim, sizeof(uint64_t));
+        if (!pair_hist) { PyErr_NoMemory(); goto fail; }
+    }
 
-    worst_tracker_t WT_local; worst_tracker_t* WT = NULL;
     if (do_worst) {
         WT = &WT_local;
-        WT->max_val = INT_MIN; WT->nA = nA; WT->nB = nB;
-        WT->counts = (uint32_t*)calloc((size_t)(nA * nB), sizeof(uint32_t));
-        if (!WT->counts) { Py_DECREF(A_fast); Py_DECREF(B_fast); Py_XDECREF(Hist); Py_DECREF(Mask); return PyErr_NoMemory(); }
+        WT->max_val = worst_floor;
+        npy_intp dims_pm[2] = { nA, nB };
+        PairMax = (PyArrayObject*)PyArray_Zeros(2, dims_pm, PyArray_DescrFromType(hdim <= 256 ? NPY_UINT8 : NPY_UINT32), 0);
+        if (!PairMax) goto fail;
+        pair_scratch = (local_hist_t*)malloc((size_t)hdim * sizeof(local_hist_t));
+        if (!pair_scratch) { PyErr_NoMemory(); goto fail; }
+        if (tracked_obj != Py_None) {
+            if (parse_tracked_pairs(tracked_obj, nA, nB, &tracked_keys, &n_tracked) < 0) goto fail;
+            npy_intp dims_th[2] = { n_tracked, hdim };
+            TrackedHist = (PyArrayObject*)PyArray_Zeros(2, dims_th, PyArray_DescrFromType(NPY_UINT32), 0);
+            if (!TrackedHist) goto fail;
+        }
     }
 
     // Prepare containers for outputs
-    PyObject *L0 = Py_None;
     if (do_full) {
         L0 = PyList_New(nA); if (!L0) goto fail;
         for (Py_ssize_t i=0; i<nA; ++i) {
             PyObject* row = PyList_New(nB); if (!row) goto fail; PyList_SET_ITEM(L0, i, row);
         }
     }
-    PyArrayObject *Lh3 = NULL;   // 3D local-hist array (nA, nB, hdim)
     if (do_local) {
         npy_intp dims3[3] = { nA, nB, hdim };
         Lh3 = (PyArrayObject*)PyArray_Zeros(3, dims3, PyArray_DescrFromType(NPY_UINT32), 0);
@@ -145,8 +317,7 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
     }
 
     // Pack B into contiguous buffers for fast kernel
-    typedef struct { unsigned char *p0; npy_intp H0,W0; } Pack;
-    Pack* packs = (Pack*)calloc((size_t)nB, sizeof(Pack));
+    packs = (Pack*)calloc((size_t)nB, sizeof(Pack));
     if (!packs) { PyErr_NoMemory(); goto fail_packs; }
     for (Py_ssize_t j=0; j<nB; ++j) {
         PyArrayObject* B = (PyArrayObject*)B_items[j];
@@ -160,14 +331,17 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
         pack_to_contig_u8(Bp, Hb, Wb, Bs0, Bs1, packs[j].p0);
     }
 
-    const int DO_WORST = 0; // worst tracking deprecated; disabled
-    const int DO_LOCAL = do_local ? 1 : 0;
-    for (Py_ssize_t i=0; i<nA; ++i) {
+    // worst tracking reads each pair's local histogram (from a scratch buffer if none is requested)
+    const int DO_LOCAL = (do_local || do_worst) ? 1 : 0;
+    npy_intp tracked_cursor = 0;
+    int rejected = 0;
+    for (Py_ssize_t i=0; i<nA && !rejected; ++i) {
         PyArrayObject* A = (PyArrayObject*)A_items[i];
         const unsigned char* Ap = (const unsigned char*)PyArray_DATA(A);
         const npy_intp Ha = PyArray_DIM(A,0), Wa = PyArray_DIM(A,1);
         const npy_intp As0 = PyArray_STRIDE(A,0), As1 = PyArray_STRIDE(A,1);
-        for (Py_ssize_t j=0; j<nB; ++j) {
+        // symmetric mode: pair (j, i) is covered by pair (i, j), so only the upper triangle is computed
+        for (Py_ssize_t j=(symmetric ? i : 0); j<nB; ++j) {
 // mask check: skip pair if mask[i,j]==0
 			const u8 mj = *(const u8*)((const char*)maskp + i*m_s0 + j*m_s1);
     if (!mj) {
@@ -201,26 +375,70 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
                 const npy_intp sA = PyArray_STRIDE(Lh3, 0);
                 const npy_intp sB = PyArray_STRIDE(Lh3, 1);
                 lhp = (local_hist_t*)(base + i*sA + j*sB);
+            } else if (do_worst) {
+                memset(pair_scratch, 0, (size_t)hdim * sizeof(local_hist_t));
+                lhp = pair_scratch;
             }
 
-            // Call kernel once with appropriate flags
+            // Call kernel once with appropriate flags (off-diagonal symmetric pairs go to the pair histogram,
+            // bounded runs count the row separately until its bounds are checked)
+            uint64_t* pair_target = BT ? BT->row_counts : (symmetric && j != i) ? pair_hist : hist;
             loop_rot0_mode(
                 Ap,Ha,Wa,As0,As1,
                 packs[j].p0, packs[j].H0, packs[j].W0, packs[j].W0, 1,
-                do_hist ? hist : NULL, hdim,
+                do_hist ? pair_target : NULL, hdim,
                 lhp, hdim,
                 o0, Ho0, Wo0,
-                do_hist ? 1 : 0, DO_LOCAL, do_full_eff ? 1 : 0,
-                DO_WORST, i,j, WT);
+                do_hist ? 1 : 0, DO_LOCAL, do_full_eff ? 1 : 0);
 
+            if (exclude_self && j == i) {
+                // the exact self-alignment of an item matches every one of its non-zero entries
+                npy_intp nnz = 0;
+                for (npy_intp k = 0; k < packs[i].H0 * packs[i].W0; ++k) nnz += packs[i].p0[k] != 0;
+                hist[nnz] -= 1;
+            }
 
             if (do_full) {
                 PyObject* row = PyList_GET_ITEM(L0, i);
                 PyList_SET_ITEM(row, j, (PyObject*)O0);
             }
             // do_local: nothing to assign; data already accumulated into Lh3 slice
+            if (do_worst) {
+                const npy_intp key = i * nB + j;
+                while (tracked_cursor < n_tracked && tracked_keys[tracked_cursor] < key) ++tracked_cursor;
+                int pair_max;
+                if (tracked_cursor < n_tracked && tracked_keys[tracked_cursor] == key) {
+                    local_hist_t* th = (local_hist_t*)PyArray_DATA(TrackedHist) + tracked_cursor * hdim;
+                    for (npy_intp k = 0; k < hdim; ++k) th[k] += lhp[k];
+                    pair_max = local_hist_max(lhp, hdim);
+                } else {
+                    pair_max = worst_update(WT, lhp, hdim, i, j);
+                    if (pair_max < 0) { PyErr_NoMemory(); goto fail; }
+                }
+                if (PyArray_TYPE(PairMax) == NPY_UINT8) ((npy_uint8*)PyArray_DATA(PairMax))[key] = (npy_uint8)pair_max;
+                else ((npy_uint32*)PyArray_DATA(PairMax))[key] = (npy_uint32)pair_max;
+            }
+        }
+        if (BT && bound_merge_row(BT, hist, hdim)) {
+            rejected = 1;
+            // bounded mode abort: fill the remaining full-output slots so the nested list stays valid
+            if (do_full) {
+                for (Py_ssize_t i2=i+1; i2<nA; ++i2) {
+                    PyObject* row = PyList_GET_ITEM(L0, i2);
+                    for (Py_ssize_t j2=0; j2<nB; ++j2) {
+                        Py_INCREF(Py_None); PyList_SET_ITEM(row, j2, Py_None);
+                    }
+                }
+            }
         }
     }
+    free(bound_allowance); bound_allowance = NULL;
+    free(bound_weights); bound_weights = NULL;
+    free(bound_row_counts); bound_row_counts = NULL;
+    if (pair_hist) {
+        for (npy_intp k = 0; k < hdim; ++k) hist[k] += 2 * pair_hist[k];
+        free(pair_hist); pair_hist = NULL;
+    }
 
     // Free contiguous B packs now that kernels are done
     if (packs) {
@@ -230,20 +448,38 @@ static PyObject* eqcorr2d_compute(PyObject* self, PyObject* args)
         free(packs); packs = NULL;
     }
 
-    PyArrayObject* WorstCounts = NULL;
-    // worst tracking deprecated; always return None
+    PyObject* Worst = NULL;
+    if (do_worst) {
+        npy_intp dims_wp[2] = { WT->n, 2 };
+        PyArrayObject* WorstPairs = (PyArrayObject*)PyArray_SimpleNew(2, dims_wp, NPY_INT64);
+        PyArrayObject* WorstCounts = (PyArrayObject*)PyArray_SimpleNew(1, &WT->n, NPY_UINT64);
+        if (!WorstPairs || !WorstCounts) { Py_XDECREF(WorstPairs); Py_XDECREF(WorstCounts); goto fail; }
+        int64_t* wp = (int64_t*)PyArray_DATA(WorstPairs);
+        for (npy_intp k = 0; k < 2 * WT->n; ++k) wp[k] = (int64_t)WT->pairs[k];
+        if (WT->n > 0) memcpy(PyArray_DATA(WorstCounts), WT->counts, (size_t)WT->n * sizeof(uint64_t));
+        Worst = Py_BuildValue("{s:O,s:i,s:O,s:O,s:O}",
+                              "pair_max", (PyObject*)PairMax, "worst_value", WT->max_val,
+                              "worst_pairs", (PyObject*)WorstPairs, "worst_counts", (PyObject*)WorstCounts,
+                              "tracked_hist", TrackedHist ? (PyObject*)TrackedHist : Py_None);
+        Py_DECREF(WorstPairs); Py_DECREF(WorstCounts);
+        if (!Worst) goto fail;
+    }
+    free(WT_local.pairs); free(WT_local.counts); free(tracked_keys); free(pair_scratch);
+    Py_XDECREF(PairMax); Py_XDECREF(TrackedHist);
 
     Py_DECREF(A_fast); Py_DECREF(B_fast); Py_DECREF(Mask);
-    if (do_worst && WT && WT->counts) { free(WT->counts); }
 
-    PyObject* ret = Py_BuildValue("OOOO",
+    PyObject* ret = Py_BuildValue("OOOOO",
         do_hist ? (PyObject*)Hist : Py_None,
         do_full ? L0 : Py_None,
-        Py_None,
-        do_local ? (PyObject*)Lh3 : Py_None);
+        Worst ? Worst : Py_None,
+        do_local ? (PyObject*)Lh3 : Py_None,
+        rejected ? Py_True : Py_False);
 
     Py_XDECREF(Hist);
+    Py_XDECREF(L0);
     Py_XDECREF(Lh3);
+    Py_XDECREF(Worst);
     return ret;
 
 fail_packs:
@@ -263,13 +499,350 @@ fail:
         free(packs); packs = NULL;
     }
     Py_XDECREF(Hist);
-    if (do_worst) { free(WT->counts); }
+    Py_XDECREF(L0);
+    Py_XDECREF(Lh3);
+    Py_XDECREF(Mask);
+    free(bound_allowance); free(bound_weights); free(bound_row_counts); free(pair_hist);
+    free(WT_local.pairs); free(WT_local.counts); free(tracked_keys); free(pair_scratch);
+    Py_XDECREF(PairMax); Py_XDECREF(TrackedHist);
     Py_DECREF(A_fast); Py_DECREF(B_fast);
     return NULL;
 }
 
+
+/* ---------------------------------------------------------------------------------------
+ * Population callable from Python: eqcorr2d.compute_batch(...)
+ *
+ * Scores P candidates that share the same slat geometry (array shapes and compute mask)
+ * but hold different handle values, in a single call. Equivalent to calling compute()
+ * once per candidate with do_full=0, but the inputs are validated once and the work is
+ * spread over multiple threads (OpenMP, when available) with the GIL released.
+ *
+ * Inputs from Python
+ * ------------------
+ * - A_list: sequence of nA C-contiguous uint8 arrays of shape (P, Ha, Wa). A_list[i][c]
+ *   is item i of candidate c.
+ * - B_list: sequence of nB C-contiguous uint8 arrays of shape (P, Hb, Wb) (pre-rotated).
+ * - compute_instructions (mask): 2D uint8 array of shape (nA, nB), shared by all candidates.
+ * - do_hist (int bool): if 1, return one global histogram per candidate.
+ * - local_histogram (int bool): if 1, also return per-pair histograms per candidate.
+ * - report_worst (int bool): if 1, also return the compact worst tracking output of each
+ *   candidate (see below), without the memory cost of local_histogram.
+ * - num_threads (keyword-only, int): number of threads (0 = OpenMP default). Ignored if the
+ *   module was compiled without OpenMP.
+ * - tracked_pairs (keyword-only): (T, 2) int64 array of unique (iA, iB) pairs in row-major
+ *   order, shared by all candidates, as for compute().
+ *
+ * Worst tracking (report_worst=1)
+ * -------------------------------
+ * Same summary as compute(), per candidate, in a dict with:
+ * - 'pair_max': (P, nA, nB) array (uint8, or uint32 if hdim > 256).
+ * - 'worst_value': (P,) int64 highest pair_max among the untracked pairs (-1 if none).
+ * - 'worst_offsets': (P + 1,) int64; the worst pairs of candidate c are the rows
+ *   worst_offsets[c]:worst_offsets[c+1] of 'worst_pairs' (K, 2) int64 and
+ *   'worst_counts' (K,) uint64, in row-major order.
+ * - 'tracked_hist': (P, T, hdim) uint32 full histograms of the tracked pairs (or None).
+ *
+ * Return value (3-tuple)
+ * ----------------------
+ * ( hist (P, hdim) uint64 or None,
+ *   local_hist (P, nA, nB, hdim) uint32 or None,
+ *   worst_dict_or_None (report_worst) )
+ *
+ * Implementation notes
+ * --------------------
+ * - Work items are (candidate, A item) rows. Each row is accumulated into a private
+ *   histogram and added to its candidate's histogram afterwards, so threads never write
+ *   to the same bins concurrently. Local histogram slices are disjoint per pair.
+ * - Each row also owns a worst tracker, and the trackers of a candidate are merged once
+ *   all threads are done, so no tracker is shared between threads either.
+ * ------------------------------------------------------------------------------------- */
+static PyObject* eqcorr2d_compute_batch(PyObject* self, PyObject* args, PyObject* kwargs)
+{
+    static char *kwlist[] = {"A_list", "B_list", "compute_instructions", "do_hist", "local_histogram",
+                             "report_worst", "num_threads", "tracked_pairs", NULL};
+    PyObject *seqA_obj, *seqB_obj, *mask_obj, *tracked_obj = Py_None;
+    int do_hist, do_local = 0, do_worst = 0, num_threads = 0;
+    PyObject *A_fast = NULL, *B_fast = NULL;
+    PyArrayObject *Mask = NULL, *Hist = NULL, *Lh4 = NULL;
+    const u8 **A_data = NULL, **B_data = NULL;
+    npy_intp *A_shape = NULL, *B_shape = NULL;  // (H, W) per item
+    int alloc_failed = 0;
+    // worst tracking (report_worst): one tracker per (candidate, A item) row
+    worst_tracker_t* trackers = NULL;
+    PyArrayObject *PairMax = NULL, *TrackedHist = NULL;
+    PyArrayObject *WorstValue = NULL, *WorstOffsets = NULL, *WorstPairs = NULL, *WorstCounts = NULL;
+    npy_intp* tracked_keys = NULL; npy_intp n_tracked = 0;
+    npy_intp n_rows = 0;
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwargs, "OOOp|pp$iO", kwlist,
+                                     &seqA_obj, &seqB_obj, &mask_obj, &do_hist, &do_local, &do_worst,
+                                     &num_threads, &tracked_obj)) {
+        return NULL;
+    }
+
+    A_fast = PySequence_Fast(seqA_obj, "A_list must be a sequence");
+    if (!A_fast) goto fail;
+    B_fast = PySequence_Fast(seqB_obj, "B_list must be a sequence");
+    if (!B_fast) goto fail;
+    const Py_ssize_t nA = PySequence_Fast_GET_SIZE(A_fast);
+    const Py_ssize_t nB = PySequence_Fast_GET_SIZE(B_fast);
+    PyObject **A_items = PySequence_Fast_ITEMS(A_fast);
+    PyObject **B_items = PySequence_Fast_ITEMS(B_fast);
+
+    A_data = (const u8**)calloc((size_t)(nA + 1), sizeof(u8*));
+    B_data = (const u8**)calloc((size_t)(nB + 1), sizeof(u8*));
+    A_shape = (npy_intp*)calloc((size_t)(2 * nA + 2), sizeof(npy_intp));
+    B_shape = (npy_intp*)calloc((size_t)(2 * nB + 2), sizeof(npy_intp));
+    if (!A_data || !B_data || !A_shape || !B_shape) { PyErr_NoMemory(); goto fail; }
+
+    // Validate arrays (all items must hold the same number of candidates) and compute the histogram length
+    npy_intp P = -1, max_prod = 0;
+    for (Py_ssize_t n = 0; n < nA + nB; ++n) {
+        PyArrayObject* X = (PyArrayObject*)(n < nA ? A_items[n] : B_items[n - nA]);
+        if (!PyArray_Check(X) || PyArray_TYPE(X) != NPY_UINT8 || PyArray_NDIM(X) != 3 || !PyArray_IS_C_CONTIGUOUS(X)) {
+            PyErr_SetString(PyExc_TypeError, "A_list and B_list items must be C-contiguous 3D uint8 arrays (P, H, W)");
+            goto fail;
+        }
+        if (P < 0) P = PyArray_DIM(X, 0);
+        if (PyArray_DIM(X, 0) != P) {
+            PyErr_SetString(PyExc_ValueError, "all items must hold the same number of candidates (first dimension)");
+            goto fail;
+        }
+        if (n < nA) {
+            A_data[n] = (const u8*)PyArray_DATA(X);
+            A_shape[2 * n] = PyArray_DIM(X, 1); A_shape[2 * n + 1] = PyArray_DIM(X, 2);
+            if (A_shape[2 * n] * A_shape[2 * n + 1] > max_prod) max_prod = A_shape[2 * n] * A_shape[2 * n + 1];
+        } else {
+            B_data[n - nA] = (const u8*)PyArray_DATA(X);
+            B_shape[2 * (n - nA)] = PyArray_DIM(X, 1); B_shape[2 * (n - nA) + 1] = PyArray_DIM(X, 2);
+        }
+    }
+    if (P < 0) P = 0;
+    if (max_prod < 1) max_prod = 1;
+    npy_intp hdim = max_prod + 1;
+    if (P * nA > INT_MAX) {
+        PyErr_SetString(PyExc_ValueError, "too many candidates x items for a single batch");
+        goto fail;
+    }
+
+    Mask = (PyArrayObject*)PyArray_FROM_OTF(mask_obj, NPY_UINT8, NPY_ARRAY_ALIGNED | NPY_ARRAY_C_CONTIGUOUS);
+    if (!Mask) goto fail;
+    if (PyArray_NDIM(Mask) != 2 || PyArray_DIM(Mask, 0) != nA || PyArray_DIM(Mask, 1) != nB) {
+        PyErr_SetString(PyExc_ValueError, "compute_instructions shape must be (len(A_list), len(B_list))");
+        goto fail;
+    }
+    const u8* maskp = (const u8*)PyArray_DATA(Mask);
+
+    hist_t* hist = NULL;
+    if (do_hist) {
+        npy_intp dims2[2] = { P, hdim };
+        Hist = (PyArrayObject*)PyArray_Zeros(2, dims2, PyArray_DescrFromType(NPY_UINT64), 0);
+        if (!Hist) goto fail;
+        hist = (hist_t*)PyArray_DATA(Hist);
+    }
+    local_hist_t* local = NULL;
+    if (do_local) {
+        npy_intp dims4[4] = { P, nA, nB, hdim };
+        Lh4 = (PyArrayObject*)PyArray_Zeros(4, dims4, PyArray_DescrFromType(NPY_UINT32), 0);
+        if (!Lh4) goto fail;
+        local = (local_hist_t*)PyArray_DATA(Lh4);
+    }
+
+    n_rows = P * nA;
+    local_hist_t* tracked_hist = NULL;
+    if (do_worst) {
+        npy_intp dims_pm[3] = { P, nA, nB };
+        PairMax = (PyArrayObject*)PyArray_Zeros(3, dims_pm, PyArray_DescrFromType(hdim <= 256 ? NPY_UINT8 : NPY_UINT32), 0);
+        if (!PairMax) goto fail;
+        trackers = (worst_tracker_t*)calloc((size_t)(n_rows > 0 ? n_rows : 1), sizeof(worst_tracker_t));
+        if (!trackers) { PyErr_NoMemory(); goto fail; }
+        for (npy_intp r = 0; r < n_rows; ++r) trackers[r].max_val = -1;
+        if (tracked_obj != Py_None) {
+            if (parse_tracked_pairs(tracked_obj, nA, nB, &tracked_keys, &n_tracked) < 0) goto fail;
+            npy_intp dims_th[3] = { P, n_tracked, hdim };
+            TrackedHist = (PyArrayObject*)PyArray_Zeros(3, dims_th, PyArray_DescrFromType(NPY_UINT32), 0);
+            if (!TrackedHist) goto fail;
+            tracked_hist = (local_hist_t*)PyArray_DATA(TrackedHist);
+        }
+    }
+    const int pair_max_u8 = do_worst && PyArray_TYPE(PairMax) == NPY_UINT8;
+    void* pair_max_data = do_worst ? PyArray_DATA(PairMax) : NULL;
+
+    const int n_items = (int)n_rows;
+    Py_BEGIN_ALLOW_THREADS
+#ifdef _OPENMP
+    #pragma omp parallel num_threads(num_threads > 0 ? num_threads : omp_get_max_threads())
+#endif
+    {
+        hist_t* row_hist = do_hist ? (hist_t*)calloc((size_t)hdim, sizeof(hist_t)) : NULL;
+        // untracked pairs are summarised from a scratch local histogram unless local_histogram is requested
+        local_hist_t* pair_scratch = (do_worst && !do_local) ? (local_hist_t*)malloc((size_t)hdim * sizeof(local_hist_t)) : NULL;
+        if ((do_hist && !row_hist) || (do_worst && !do_local && !pair_scratch)) {
+#ifdef _OPENMP
+            #pragma omp atomic write
+#endif
+            alloc_failed = 1;
+        }
+#ifdef _OPENMP
+        #pragma omp for schedule(dynamic, 1)
+#endif
+        for (int item = 0; item < n_items; ++item) {
+            if ((do_hist && !row_hist) || (do_worst && !do_local && !pair_scratch)) continue;
+            const npy_intp c = item / nA, i = item % nA;
+            const npy_intp Ha = A_shape[2 * i], Wa = A_shape[2 * i + 1];
+            const u8* Ap = A_data[i] + c * Ha * Wa;
+            if (do_hist) memset(row_hist, 0, (size_t)hdim * sizeof(hist_t));
+            npy_intp tracked_cursor = 0;
+            if (do_worst) {
+                // first tracked key of this row (keys are sorted)
+                npy_intp lo = 0, hi = n_tracked;
+                while (lo < hi) {
+                    const npy_intp mid = lo + (hi - lo) / 2;
+                    if (tracked_keys[mid] < i * nB) lo = mid + 1; else hi = mid;
+                }
+                tracked_cursor = lo;
+            }
+            for (npy_intp j = 0; j < nB; ++j) {
+                if (!maskp[i * nB + j]) continue;
+                const npy_intp Hb = B_shape[2 * j], Wb = B_shape[2 * j + 1];
+                const u8* Bp = B_data[j] + c * Hb * Wb;
+                local_hist_t* lhp = do_local ? local + ((c * nA + i) * nB + j) * hdim : NULL;
+                local_hist_t* th = NULL;
+                if (do_worst) {
+                    const npy_intp key = i * nB + j;
+                    while (tracked_cursor < n_tracked && tracked_keys[tracked_cursor] < key) ++tracked_cursor;
+                    if (tracked_cursor < n_tracked && tracked_keys[tracked_cursor] == key)
+                        th = tracked_hist + (c * n_tracked + tracked_cursor) * hdim;
+                    if (!lhp) {
+                        // tracked pairs accumulate straight into their (still empty) output slice
+                        if (th) lhp = th;
+                        else { memset(pair_scratch, 0, (size_t)hdim * sizeof(local_hist_t)); lhp = pair_scratch; }
+                    }
+                }
+                loop_rot0_mode(Ap, Ha, Wa, Wa, 1,
+                               Bp, Hb, Wb, Wb, 1,
+                               row_hist, hdim,
+                               lhp, hdim,
+                               NULL, Ha + Hb - 1, Wa + Wb - 1,
+                               do_hist ? 1 : 0, lhp ? 1 : 0, 0);
+                if (do_worst) {
+                    int pair_max;
+                    if (th) {
+                        if (th != lhp) for (npy_intp k = 0; k < hdim; ++k) th[k] += lhp[k];
+                        pair_max = local_hist_max(lhp, hdim);
+                    } else {
+                        pair_max = worst_update(&trackers[item], lhp, hdim, i, j);
+                        if (pair_max < 0) {
+#ifdef _OPENMP
+                            #pragma omp atomic write
+#endif
+                            alloc_failed = 1;
+                            pair_max = 0;
+                        }
+                    }
+                    const npy_intp pm_index = (c * nA + i) * nB + j;
+                    if (pair_max_u8) ((npy_uint8*)pair_max_data)[pm_index] = (npy_uint8)pair_max;
+                    else ((npy_uint32*)pair_max_data)[pm_index] = (npy_uint32)pair_max;
+                }
+            }
+            if (do_hist) {
+                hist_t* cand_hist = hist + c * hdim;
+#ifdef _OPENMP
+                #pragma omp critical(eqcorr2d_batch_hist)
+#endif
+                {
+                    for (npy_intp k = 0; k < hdim; ++k) cand_hist[k] += row_hist[k];
+                }
+            }
+        }
+        free(row_hist);
+        free(pair_scratch);
+    }
+    Py_END_ALLOW_THREADS
+    if (alloc_failed) { PyErr_NoMemory(); goto fail; }
+
+    PyObject* Worst = NULL;
+    if (do_worst) {
+        // merge the row trackers of each candidate: only the rows at the candidate's highest value contribute
+        npy_intp dims_p[1] = { P }, dims_off[1] = { P + 1 };
+        WorstValue = (PyArrayObject*)PyArray_SimpleNew(1, dims_p, NPY_INT64);
+        WorstOffsets = (PyArrayObject*)PyArray_SimpleNew(1, dims_off, NPY_INT64);
+        if (!WorstValue || !WorstOffsets) goto fail;
+        int64_t* wv = (int64_t*)PyArray_DATA(WorstValue);
+        int64_t* wo = (int64_t*)PyArray_DATA(WorstOffsets);
+        wo[0] = 0;
+        for (npy_intp c = 0; c < P; ++c) {
+            int value = -1;
+            npy_intp count = 0;
+            for (npy_intp i = 0; i < nA; ++i) {
+                const worst_tracker_t* wt = &trackers[c * nA + i];
+                if (wt->max_val > value) { value = wt->max_val; count = 0; }
+                if (wt->max_val == value) count += wt->n;
+            }
+            wv[c] = value;
+            wo[c + 1] = wo[c] + count;
+        }
+        npy_intp dims_wp[2] = { wo[P], 2 }, dims_wc[1] = { wo[P] };
+        WorstPairs = (PyArrayObject*)PyArray_SimpleNew(2, dims_wp, NPY_INT64);
+        WorstCounts = (PyArrayObject*)PyArray_SimpleNew(1, dims_wc, NPY_UINT64);
+        if (!WorstPairs || !WorstCounts) goto fail;
+        int64_t* wp = (int64_t*)PyArray_DATA(WorstPairs);
+        uint64_t* wc = (uint64_t*)PyArray_DATA(WorstCounts);
+        for (npy_intp c = 0; c < P; ++c) {
+            npy_intp k = wo[c];
+            for (npy_intp i = 0; i < nA; ++i) {
+                const worst_tracker_t* wt = &trackers[c * nA + i];
+                if (wt->max_val != wv[c]) continue;
+                for (npy_intp t = 0; t < wt->n; ++t, ++k) {
+                    wp[2 * k] = (int64_t)wt->pairs[2 * t];
+                    wp[2 * k + 1] = (int64_t)wt->pairs[2 * t + 1];
+                    wc[k] = wt->counts[t];
+                }
+            }
+        }
+        Worst = Py_BuildValue("{s:O,s:O,s:O,s:O,s:O,s:O}",
+                              "pair_max", (PyObject*)PairMax, "worst_value", (PyObject*)WorstValue,
+                              "worst_offsets", (PyObject*)WorstOffsets, "worst_pairs", (PyObject*)WorstPairs,
+                              "worst_counts", (PyObject*)WorstCounts,
+                              "tracked_hist", TrackedHist ? (PyObject*)TrackedHist : Py_None);
+        if (!Worst) goto fail;
+    }
+
+    if (trackers) {
+        for (npy_intp r = 0; r < n_rows; ++r) { free(trackers[r].pairs); free(trackers[r].counts); }
+        free(trackers);
+    }
+    free(tracked_keys);
+    Py_XDECREF(PairMax); Py_XDECREF(TrackedHist);
+    Py_XDECREF(WorstValue); Py_XDECREF(WorstOffsets); Py_XDECREF(WorstPairs); Py_XDECREF(WorstCounts);
+    free(A_data); free(B_data); free(A_shape); free(B_shape);
+    Py_DECREF(A_fast); Py_DECREF(B_fast); Py_DECREF(Mask);
+    PyObject* ret = Py_BuildValue("OOO", do_hist ? (PyObject*)Hist : Py_None, do_local ? (PyObject*)Lh4 : Py_None,
+                                  Worst ? Worst : Py_None);
+    Py_XDECREF(Hist);
+    Py_XDECREF(Lh4);
+    Py_XDECREF(Worst);
+    return ret;
+
+fail:
+    if (trackers) {
+        for (npy_intp r = 0; r < n_rows; ++r) { free(trackers[r].pairs); free(trackers[r].counts); }
+        free(trackers);
+    }
+    free(tracked_keys);
+    Py_XDECREF(PairMax); Py_XDECREF(TrackedHist);
+    Py_XDECREF(WorstValue); Py_XDECREF(WorstOffsets); Py_XDECREF(WorstPairs); Py_XDECREF(WorstCounts);
+    free(A_data); free(B_data); free(A_shape); free(B_shape);
+    Py_XDECREF(A_fast); Py_XDECREF(B_fast); Py_XDECREF(Mask);
+    Py_XDECREF(Hist); Py_XDECREF(Lh4);
+    return NULL;
+}
+
 static PyMethodDef Eqcorr2dMethods[] = {
-    {"compute", (PyCFunction)eqcorr2d_compute, METH_VARARGS, "Compute eqcorr2d"},
+    {"compute", (PyCFunction)(void(*)(void))eqcorr2d_compute, METH_VARARGS | METH_KEYWORDS, "Compute eqcorr2d"},
+    {"compute_batch", (PyCFunction)(void(*)(void))eqcorr2d_compute_batch, METH_VARARGS | METH_KEYWORDS,
+     "Compute eqcorr2d histograms for a population of candidates sharing the same geometry"},
     {NULL, NULL, 0, NULL}
 };
 
@@ -284,5 +857,8 @@ static struct PyModuleDef moduledef = {
 PyMODINIT_FUNC PyInit_eqcorr2d_engine(void)
 {
     import_array();
+    // debugging/benchmarking switch: EQCORR2D_GENERIC_KERNEL=1 disables the specialised histogram kernels
+    const char* generic_kernel = getenv("EQCORR2D_GENERIC_KERNEL");
+    eqcorr2d_specialised_kernels = !(generic_kernel && generic_kernel[0] && generic_kernel[0] != '0');
     return PyModule_Create(&moduledef);
 }
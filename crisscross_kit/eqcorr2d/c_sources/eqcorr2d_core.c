@@ -1,26 +1,207 @@
 #include "eqcorr2d.h"
 
-/* ---- worst_tracker_t helpers (counting version) ---------------------------------
- * Purpose: Maintain a per-(iA,iB) counter matrix of how often a pair achieved
- * the CURRENT global maximum match value during a run. When a strictly larger
- * maximum is found, we reset all counters to zero and start counting anew.
- * When we encounter another offset that ties the current maximum, we increment
- * the corresponding counter for (iA,iB). No Python objects are manipulated here.
+int eqcorr2d_specialised_kernels = 1;
+
+/* ---- worst_tracker_t helpers (compact version) -------------------------------
+ * Purpose: Find the (iA,iB) pairs that reach the highest match value of a run
+ * without keeping a dense per-pair histogram. Each pair is summarised from its
+ * local histogram (a scratch buffer in the bindings): pairs whose highest match
+ * value equals the running maximum are appended to a sparse list together with
+ * their number of offsets at that value, and a strictly larger maximum empties
+ * the list. Pairs below the starting value (the caller's floor) are never listed.
+ * No Python objects are manipulated here.
  * --------------------------------------------------------------------------- */
 int worst_reset(worst_tracker_t* wt, int new_max) {
     wt->max_val = new_max;
-    if (wt->counts) memset(wt->counts, 0, (size_t)(wt->nA * wt->nB * sizeof(uint32_t)));
+    wt->n = 0;
     return 0;
 }
 
-// Increment counter for (ia, ib)
-int worst_count(worst_tracker_t* wt, npy_intp ia, npy_intp ib) {
-    if (!wt->counts) return 0;
-    npy_intp idx = ia * wt->nB + ib;
-    wt->counts[idx] += 1u;
+// Append (ia, ib) with its count at the current maximum
+int worst_count(worst_tracker_t* wt, npy_intp ia, npy_intp ib, uint64_t count) {
+    if (wt->n == wt->cap) {
+        npy_intp new_cap = wt->cap ? 2 * wt->cap : 64;
+        npy_intp* pairs = (npy_intp*)realloc(wt->pairs, (size_t)(2 * new_cap) * sizeof(npy_intp));
+        if (!pairs) return -1;
+        wt->pairs = pairs;
+        uint64_t* counts = (uint64_t*)realloc(wt->counts, (size_t)new_cap * sizeof(uint64_t));
+        if (!counts) return -1;
+        wt->counts = counts;
+        wt->cap = new_cap;
+    }
+    wt->pairs[2 * wt->n] = ia;
+    wt->pairs[2 * wt->n + 1] = ib;
+    wt->counts[wt->n] = count;
+    wt->n += 1;
     return 0;
 }
 
+int local_hist_max(const local_hist_t* local_hist, npy_intp hdim) {
+    int top = (int)hdim - 1;
+    while (top > 0 && local_hist[top] == 0) --top;
+    return top;
+}
+
+int worst_update(worst_tracker_t* wt, const local_hist_t* local_hist, npy_intp hdim, npy_intp ia, npy_intp ib) {
+    const int pair_max = local_hist_max(local_hist, hdim);
+    if (pair_max > wt->max_val) worst_reset(wt, pair_max);
+    if (pair_max == wt->max_val && worst_count(wt, ia, ib, local_hist[pair_max]) < 0) return -1;
+    return pair_max;
+}
+
+/* ---- bound_tracker_t helper ---------------------------------------------------
+ * Purpose: Support the bounded scoring mode. The bindings count the offsets of
+ * a whole row of pairs (one A item against every B item) into bt->row_counts,
+ * which is merged into the global histogram once the row is done, so the bounds
+ * cost nothing inside the kernels. As long as a bin count stays within its
+ * allowance (matches expected from the design's own slat connections),
+ * nothing happens. Beyond that, the counts are true parasitic matches: they
+ * either reject the run (worst-match bound) or add their weight to the running
+ * score, which rejects the run once past the cutoff. Since histogram counts only grow, both bounds
+ * are lower bounds of the final result, so rejection is final and checking once
+ * per row rejects exactly the same runs as checking every offset.
+ * --------------------------------------------------------------------------- */
+int bound_merge_row(bound_tracker_t* bt, hist_t* hist, npy_intp hdim) {
+    int rejected = 0;
+    for (npy_intp bin = 0; bin < hdim; ++bin) {
+        const hist_t count = bt->row_counts[bin];
+        if (!count) continue;
+        bt->row_counts[bin] = 0;
+        const int64_t before = (int64_t)hist[bin];
+        hist[bin] += count;
+        // counts beyond the allowance that were not already beyond it before this row
+        const int64_t over = (int64_t)hist[bin] - (before > bt->allowance[bin] ? before : bt->allowance[bin]);
+        if (over <= 0) continue;
+        if (bt->reject_above >= 0 && bin > bt->reject_above) rejected = 1;
+        else if (bt->weights) bt->excess += (double)over * bt->weights[bin];
+    }
+    if (bt->weights && bt->excess > bt->cutoff) rejected = 1;
+    if (rejected) bt->rejected = 1;
+    return rejected;
+}
+
+/* ---- Specialised histogram kernels -------------------------------------------
+ * Purpose: Almost every call only needs the global histogram and/or the local
+ * (per-pair) histogram. These kernels drop the runtime DO_* flag checks, the
+ * bin clamping and the strided path of loop_rot0_mode: the output flags (and,
+ * for the footprint kernels, B's shape) are compile-time constants of an
+ * always-inlined body, and the match test is branchless so the inner loop
+ * vectorises. loop_rot0_mode dispatches to them when it is safe to do so.
+ *
+ * hist_kernel_body:   any contiguous A/B, same offset order and bounds as the
+ *                     generic loop.
+ * padded_kernel_body: B of a fixed shape (1×32 and 1×64 slats, 2×16 and 2×17
+ *                     double-barrel footprints) against an A with the same
+ *                     number of rows and at most EQ_PAD_MAX_W columns. A is
+ *                     copied into a zero-padded buffer, so every offset compares
+ *                     the full fixed-size B window with no bounds arithmetic
+ *                     (the padding never matches since B's zeros are masked out).
+ *                     Only these kernels get AVX2 clones; the variable-length
+ *                     loops of hist_kernel_body are faster at baseline width.
+ * --------------------------------------------------------------------------- */
+static EQ_ALWAYS_INLINE void hist_kernel_body(
+    const u8* EQ_RESTRICT A, npy_intp Ha, npy_intp Wa,
+    const u8* EQ_RESTRICT B, npy_intp Hb, npy_intp Wb,
+    hist_t* EQ_RESTRICT hist, local_hist_t* EQ_RESTRICT local_hist,
+    const int DO_HIST, const int DO_LOCAL)
+{
+    const npy_intp Ho = Ha + Hb - 1, Wo = Wa + Wb - 1;
+    for (npy_intp oy = 0; oy < Ho; ++oy) {
+        const npy_intp by0 = (Hb-1) - oy < 0 ? 0 : (Hb-1) - oy;
+        const npy_intp by1 = (Ha+Hb-2 - oy) > (Hb-1) ? (Hb-1) : (Ha+Hb-2 - oy);
+        for (npy_intp ox = 0; ox < Wo; ++ox) {
+            const npy_intp bx0 = (Wb-1) - ox < 0 ? 0 : (Wb-1) - ox;
+            const npy_intp bx1 = (Wa+Wb-2 - ox) > (Wb-1) ? (Wb-1) : (Wa+Wb-2 - ox);
+            const npy_intp n = bx1 - bx0 + 1;
+            unsigned int acc = 0;
+            for (npy_intp by = by0; by <= by1; ++by) {
+                const u8* EQ_RESTRICT Ap = A + (oy - (Hb-1) + by)*Wa + (ox - (Wb-1) + bx0);
+                const u8* EQ_RESTRICT Bp = B + by*Wb + bx0;
+                for (npy_intp k = 0; k < n; ++k) acc += (Ap[k] == Bp[k]) & (Bp[k] != 0);
+            }
+            if (DO_HIST) hist[acc] += 1;
+            if (DO_LOCAL) local_hist[acc] += 1u;
+        }
+    }
+}
+
+#define EQ_PAD_MAX_H 2
+#define EQ_PAD_MAX_W 64
+
+static EQ_ALWAYS_INLINE void padded_kernel_body(
+    const u8* EQ_RESTRICT A, npy_intp Wa,
+    const u8* EQ_RESTRICT B, const npy_intp H, const npy_intp Wb,
+    hist_t* EQ_RESTRICT hist, local_hist_t* EQ_RESTRICT local_hist,
+    const int DO_HIST, const int DO_LOCAL)
+{
+    // A (H×Wa) placed at (H-1, Wb-1) in a zero buffer of (3H-2)×(Wa+2Wb-2)
+    u8 Apad[(3*EQ_PAD_MAX_H - 2) * (3*EQ_PAD_MAX_W - 2)];
+    u8 Bmask[EQ_PAD_MAX_H * EQ_PAD_MAX_W];
+    const npy_intp Wp = Wa + 2*(Wb-1);
+    memset(Apad, 0, (size_t)((3*H - 2) * Wp));
+    for (npy_intp y = 0; y < H; ++y) memcpy(Apad + (y + H-1)*Wp + (Wb-1), A + y*Wa, (size_t)Wa);
+    for (npy_intp k = 0; k < H*Wb; ++k) Bmask[k] = B[k] != 0;
+
+    for (npy_intp oy = 0; oy < 2*H - 1; ++oy) {
+        for (npy_intp ox = 0; ox < Wa + Wb - 1; ++ox) {
+            unsigned int acc = 0;
+            for (npy_intp by = 0; by < H; ++by) {
+                const u8* EQ_RESTRICT Ap = Apad + (oy + by)*Wp + ox;
+                const u8* EQ_RESTRICT Bp = B + by*Wb;
+                const u8* EQ_RESTRICT Mp = Bmask + by*Wb;
+                u8 row_acc = 0;  // at most Wb <= 64 matches per row
+                for (npy_intp k = 0; k < Wb; ++k) row_acc += (Ap[k] == Bp[k]) & Mp[k];
+                acc += row_acc;
+            }
+            if (DO_HIST) hist[acc] += 1;
+            if (DO_LOCAL) local_hist[acc] += 1u;
+        }
+    }
+}
+
+typedef void (*hist_kernel_fn)(const u8*, npy_intp, npy_intp, const u8*, npy_intp, npy_intp, hist_t*, local_hist_t*);
+typedef void (*padded_kernel_fn)(const u8*, npy_intp, const u8*, hist_t*, local_hist_t*);
+
+#define EQ_HIST_KERNEL(NAME, DO_HIST, DO_LOCAL) \
+    static void NAME(const u8* A, npy_intp Ha, npy_intp Wa, const u8* B, npy_intp Hb, npy_intp Wb, \
+                     hist_t* hist, local_hist_t* local_hist) \
+    { hist_kernel_body(A, Ha, Wa, B, Hb, Wb, hist, local_hist, DO_HIST, DO_LOCAL); }
+
+#define EQ_PADDED_KERNEL(NAME, H, WB, DO_HIST, DO_LOCAL) \
+    static EQ_CPU_DISPATCH void NAME(const u8* A, npy_intp Wa, const u8* B, hist_t* hist, local_hist_t* local_hist) \
+    { padded_kernel_body(A, Wa, B, H, WB, hist, local_hist, DO_HIST, DO_LOCAL); }
+
+// one kernel per output combination: _h (global histogram), _l (local histogram), _hl (both)
+EQ_HIST_KERNEL(hist_kernel_h, 1, 0)
+EQ_HIST_KERNEL(hist_kernel_l, 0, 1)
+EQ_HIST_KERNEL(hist_kernel_hl, 1, 1)
+EQ_PADDED_KERNEL(row32_kernel_h, 1, 32, 1, 0)
+EQ_PADDED_KERNEL(row32_kernel_l, 1, 32, 0, 1)
+EQ_PADDED_KERNEL(row32_kernel_hl, 1, 32, 1, 1)
+EQ_PADDED_KERNEL(row64_kernel_h, 1, 64, 1, 0)
+EQ_PADDED_KERNEL(row64_kernel_l, 1, 64, 0, 1)
+EQ_PADDED_KERNEL(row64_kernel_hl, 1, 64, 1, 1)
+EQ_PADDED_KERNEL(db16_kernel_h, 2, 16, 1, 0)
+EQ_PADDED_KERNEL(db16_kernel_l, 2, 16, 0, 1)
+EQ_PADDED_KERNEL(db16_kernel_hl, 2, 16, 1, 1)
+EQ_PADDED_KERNEL(db17_kernel_h, 2, 17, 1, 0)
+EQ_PADDED_KERNEL(db17_kernel_l, 2, 17, 0, 1)
+EQ_PADDED_KERNEL(db17_kernel_hl, 2, 17, 1, 1)
+
+// indexed by (DO_HIST ? 1 : 0) + (DO_LOCAL ? 2 : 0) - 1
+static const hist_kernel_fn hist_kernels[3] = {hist_kernel_h, hist_kernel_l, hist_kernel_hl};
+
+// fixed B footprints of the padded kernels
+static const struct {
+    npy_intp H, W;
+    padded_kernel_fn kernels[3];
+} padded_kernels[] = {
+    {1, 32, {row32_kernel_h, row32_kernel_l, row32_kernel_hl}},
+    {1, 64, {row64_kernel_h, row64_kernel_l, row64_kernel_hl}},
+    {2, 16, {db16_kernel_h, db16_kernel_l, db16_kernel_hl}},
+    {2, 17, {db17_kernel_h, db17_kernel_l, db17_kernel_hl}},
+};
+
 /* ----------------------------------------------------------------------
  * loop_rot0_mode — one A–B pair at 0° rotation
  *
@@ -29,8 +210,8 @@ int worst_count(worst_tracker_t* wt, npy_intp ia, npy_intp ib) {
  * Slides B over A at every offset (ox, oy). For each overlap window,
  * counts matches of equal, non-zero entries (acc). Optionally:
  *   - adds acc to a global histogram,
- *   - writes acc into the full 2D output map,
- *   - updates a global “worst” tracker (max acc seen; stores (IA,IB) pairs).
+ *   - adds acc to the pair's local histogram,
+ *   - writes acc into the full 2D output map.
  *
  * Inputs (this call handles ONE pair A_list[IA] vs B_list[IB])
  * -----------------------------------------------------------
@@ -44,15 +225,14 @@ int worst_count(worst_tracker_t* wt, npy_intp ia, npy_intp ib) {
  * Optional outputs / side effects
  * -------------------------------
  *   hist,hist_len : global histogram buffer and its length (bin = acc)
+ *   local_hist    : the pair's local histogram (bin = acc)
  *   out           : per-offset map (int32), size Ho×Wo
- *   WT            : worst-pair tracker (tracks global max acc and the (IA,IB) that hit it)
  *
  * Control flags & indices
  * -----------------------
  *   DO_HIST  : 1 -> increment histogram bin for acc
+ *   DO_LOCAL : 1 -> increment local histogram bin for acc
  *   DO_FULL  : 1 -> write acc into out[oy,ox]
- *   DO_WORST : 1 -> compare acc to WT->max_val; record (IA,IB) on tie/new max
- *   IA, IB   : indices of this pair within the original Python lists
  *
  * Notes
  * -----
@@ -61,6 +241,9 @@ int worst_count(worst_tracker_t* wt, npy_intp ia, npy_intp ib) {
  * - by0/by1/bx0/bx1 clamp B’s indices to the part that actually overlaps A,
  *   so no out-of-bounds reads when B sticks out of A near the borders.
  * - Equality test ignores zeros: (a && b && a==b).
+ * - Calls that only fill the global/local histograms of contiguous arrays
+ *   (no full map) are handed to the specialised kernels above, which
+ *   produce identical histograms.
  * ---------------------------------------------------------------------- */
 void loop_rot0_mode(
     const u8* EQ_RESTRICT A, npy_intp Ha, npy_intp Wa, npy_intp As0, npy_intp As1,
@@ -68,10 +251,25 @@ void loop_rot0_mode(
     hist_t* EQ_RESTRICT hist, npy_intp hist_len,
     local_hist_t* EQ_RESTRICT local_hist, npy_intp local_hist_len,
     out_t* EQ_RESTRICT out, npy_intp Ho, npy_intp Wo,
-    int DO_HIST, int DO_LOCAL, int DO_FULL,
-    int DO_WORST, npy_intp IA, npy_intp IB, worst_tracker_t* WT)
+    int DO_HIST, int DO_LOCAL, int DO_FULL)
 {
     const int contiguous = (As1==1) && (Bs1==1);
+    if (eqcorr2d_specialised_kernels && (DO_HIST || DO_LOCAL) && !DO_FULL
+        && contiguous && (Ha == 1 || As0 == Wa) && (Hb == 1 || Bs0 == Wb) && Ho == Ha + Hb - 1 && Wo == Wa + Wb - 1
+        && (!DO_HIST || Ha*Wa < hist_len) && (!DO_LOCAL || Ha*Wa < local_hist_len)) {
+        // every match count fits in the histograms (at most Ha*Wa matches), so no bin clamping is needed
+        const int variant = (DO_HIST ? 1 : 0) + (DO_LOCAL ? 2 : 0) - 1;
+        if (Ha == Hb && Wa <= EQ_PAD_MAX_W) {
+            for (size_t k = 0; k < sizeof(padded_kernels) / sizeof(padded_kernels[0]); ++k) {
+                if (padded_kernels[k].H == Hb && padded_kernels[k].W == Wb) {
+                    padded_kernels[k].kernels[variant](A, Wa, B, hist, local_hist);
+                    return;
+                }
+            }
+        }
+        hist_kernels[variant](A, Ha, Wa, B, Hb, Wb, hist, local_hist);
+        return;
+    }
     for (npy_intp oy = 0; oy < Ho; ++oy) {
         const npy_intp by0 = (Hb-1) - oy < 0 ? 0 : (Hb-1) - oy;
         const npy_intp by1 = (Ha+Hb-2 - oy) > (Hb-1) ? (Hb-1) : (Ha+Hb-2 - oy);
@@ -105,16 +303,8 @@ void loop_rot0_mode(
                     }
                 }
             }
-            if (DO_WORST) {
-                if (acc > WT->max_val) {
-                    if (worst_reset(WT, acc) < 0) {}
-                    if (worst_count(WT, IA, IB) < 0) {}
-                } else if (acc == WT->max_val) {
-                    if (worst_count(WT, IA, IB) < 0) {}
-                }
-            }
+            int bin = acc;
             if (DO_HIST) {
-                int bin = acc;
                 if (bin < 0) bin = 0;
                 if (bin >= hist_len) bin = (int)(hist_len - 1);
                 hist[bin] += 1;
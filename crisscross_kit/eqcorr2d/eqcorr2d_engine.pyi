@@ -11,9 +11,38 @@ def compute(
     do_full: int,
     report_worst: int,
     local_histogram: int = 0,
+    *,
+    hist_allowance: Optional[np.ndarray] = None,  # int64 per-bin expected counts; enables bounded mode
+    reject_above: int = -1,  # abort once an unexpected count lands above this bin (-1 disables)
+    bin_weights: Optional[np.ndarray] = None,  # float64 per-bin weight of an unexpected count
+    score_cutoff: float = 0.0,  # abort once the summed weight exceeds this value
+    score_offset: float = 0.0,  # weight already accumulated by previous calls
+    symmetric: bool = False,  # A_list is B_list: only pairs j >= i are computed, off-diagonal counts are doubled
+    exclude_self_alignment: bool = False,  # symmetric mode: drop each array's trivial match with itself
+    tracked_pairs: Optional[np.ndarray] = None,  # int64 (T, 2) pairs whose full histograms are reported (report_worst)
+    worst_floor: int = -1,  # report_worst: pairs below this value are never listed
 ) -> Tuple[
     Optional[np.ndarray],
     Optional[List[List[np.ndarray]]],
-    Optional[np.ndarray],  # worst-count matrix (deprecated, always None)
+    Optional[dict],  # report_worst: pair_max, worst_value, worst_pairs, worst_counts, tracked_hist
     Optional[np.ndarray],  # local hist per pair as 3D ndarray (nA,nB,hdim), uint32
+    bool,  # rejected by the bounded mode (partial outputs)
+]: ...
+
+# A_list and B_list: sequences of C-contiguous 3D uint8 arrays (P, H, W), one row per candidate
+
+def compute_batch(
+    A_list: Sequence[np.ndarray],
+    B_list: Sequence[np.ndarray],
+    compute_instructions: np.ndarray,
+    do_hist: int,
+    local_histogram: int = 0,
+    report_worst: int = 0,
+    *,
+    num_threads: int = 0,  # 0 uses the OpenMP default (ignored without OpenMP)
+    tracked_pairs: Optional[np.ndarray] = None,  # (T, 2) int64 unique pairs in row-major order
+) -> Tuple[
+    Optional[np.ndarray],  # (P, hdim) uint64 histograms
+    Optional[np.ndarray],  # (P, nA, nB, hdim) uint32 local histograms
+    Optional[dict],  # report_worst: pair_max, worst_value, worst_offsets, worst_pairs, worst_counts, tracked_hist
 ]: ...
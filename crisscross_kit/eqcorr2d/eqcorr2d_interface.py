@@ -21,7 +21,8 @@ Key terms:
 Modes:
 - classic: only 0° and 180° rotations (historical behavior for 1D slats).
 - square_grid: 0°, 90°, 180°, 270°.
-- triangle_grid: 0°, 60°, 120°, 180°, 240°, 300° (implemented via rotate_array_tri60).
+- triangle_grid: 0°, 60°, 120°, 180°, 240°, 300° (implemented via rotate_array_tri60
+  coordinates, cached per antihandle shape).
 
 Smart mode (do_smart):
 - If enabled, we still compute 0°/180°.
@@ -29,17 +30,37 @@ Smart mode (do_smart):
   truly 2D (H >= 2 and W >= 2). This keeps compute costs lower for pure 1D data.
 - For triangle_grid, the same idea applies to the six-fold rotation set.
 
+Bounded mode (expected_histogram + reject_worst_above / reject_sum_above):
+- Used to discard hopeless candidates (e.g. during evolution) without computing
+  their full histogram. The C engine aborts as soon as the compensated histogram
+  is guaranteed to exceed the requested worst match or exponentially weighted sum,
+  and the result is flagged as 'rejected' with the partial histogram gathered so far.
+
+Value prefilter (value_prefilter):
+- Pairs whose arrays share so few handle values that they can never match more than
+  one position at any offset are resolved directly from their value counts (see
+  get_value_count_overlaps) and masked out of the C engine call. Results are unchanged.
+
+Worst tracking (worst_tracking / tracked_pairs):
+- Instead of the (nA, nB, L) local histograms, the C engine only reports the highest
+  match count of each pair and the pairs reaching the overall highest count. Tracked
+  pairs (e.g. the connected slats of a design) keep their full histograms, so that
+  their expected matches can still be compensated when listing the worst pairs.
+
 Note: This module adds extensive comments and docstrings only. The C code is not
 modified by this interface.
 """
+import time
+from functools import lru_cache
 import numpy as np
 from eqcorr2d import eqcorr2d_engine
-from eqcorr2d.rot60 import rotate_array_tri60
+from eqcorr2d.rot60 import rotate_coords_tri60
 from collections import Counter
 
 
 def comprehensive_score_analysis(handle_dict, antihandle_dict, match_counts, connection_graph, connection_angle,
-                                 do_worst=False, fudge_dg=10, request_similarity_score=True):
+                                 do_worst=False, fudge_dg=10, request_similarity_score=True,
+                                 worst_match_cutoff=None, mean_log_score_cutoff=None, report_timings=False):
     """
     Compute all relevant match count metrics for a megastructure's slat handles.
 
@@ -65,6 +86,15 @@ def comprehensive_score_analysis(handle_dict, antihandle_dict, match_counts, con
     :param request_similarity_score: If True, computes a similarity score to check for slat duplication risk.
         Defaults to True.
     :type request_similarity_score: bool
+    :param worst_match_cutoff: If set, the analysis is aborted early (and the result flagged as rejected) as soon as
+        the compensated worst match is guaranteed to be larger than this value. Defaults to None (no cutoff).
+    :type worst_match_cutoff: int or None
+    :param mean_log_score_cutoff: If set, the analysis is aborted early (and the result flagged as rejected) as soon
+        as the mean log score is guaranteed to be larger than this value. Defaults to None (no cutoff).
+    :type mean_log_score_cutoff: float or None
+    :param report_timings: If True, the time spent in each stage of the analysis and the number of slat pairs
+        compared are also reported (for profiling). Defaults to False.
+    :type report_timings: bool
     :returns: Dictionary containing:
 
         - ``worst_match_score`` (int): The highest non-zero match count in the compensated histogram.
@@ -73,24 +103,61 @@ def comprehensive_score_analysis(handle_dict, antihandle_dict, match_counts, con
         - ``uncompensated_match_histogram`` (numpy.ndarray): Raw histogram before connection compensation.
         - ``similarity_score`` (int, optional): Highest match count within handle/antihandle sets (if requested).
         - ``worst_slat_combos`` (list, optional): List of (handle_key, antihandle_key, count) tuples (if do_worst=True).
+        - ``rejected`` (bool): True if the analysis was aborted by one of the cutoffs. In this case, the histogram,
+          worst match and mean log score are lower bounds computed from the partial histogram, no similarity score
+          is computed and ``worst_slat_combos`` is empty.
+        - ``timings`` (dict, optional): Time (in seconds) spent on the ``match_compute``, ``similarity_compute`` and
+          ``worst_combo_extraction`` stages (if report_timings=True).
+        - ``pairs_computed`` (dict, optional): Number of handle/antihandle slat pairs compared at each rotation
+          started, keyed by angle (if report_timings=True).
     :rtype: dict
     """
-    # runs the match comparison computation using our eqcorr2D C function
-    if do_worst:
-        local_histogram = True
-    else:
-        local_histogram = False
+    # runs the match comparison computation using our eqcorr2D C function.  The worst pairs are found from the compact
+    # worst tracking output, with the connected slat pairs tracked in full so that they can be compensated exactly.
+    tracked_pairs = [pair for match, pairs in connection_graph.items() if match > 1 for pair in pairs] if do_worst else None
 
-    full_results = wrap_eqcorr2d(handle_dict, antihandle_dict, do_smart=True, hist=True, local_histogram=local_histogram,
-                                 mode='triangle_grid' if connection_angle == '60' else 'square_grid')
-
-    # compensates for matches in the design that are expected based on slat connections
-    hist = full_results['hist_total']
-    match_counts_histogram = np.zeros_like(hist)
+    # the expected matches in the design (based on slat connections) are needed up-front for the bounded mode
+    hist_length = max(np.asarray(h).size for h in handle_dict.values()) + 1
+    match_counts_histogram = np.zeros(max([hist_length] + [m + 1 for m in match_counts.keys()]), dtype=np.int64)
     for match, count in match_counts.items():
         if match > 1:
             match_counts_histogram[match] += count
 
+    timings = {'match_compute': 0.0, 'similarity_compute': 0.0, 'worst_combo_extraction': 0.0}
+    stage_start = time.perf_counter()
+
+    reject_sum_above = None
+    if mean_log_score_cutoff is not None:
+        # mean log score > cutoff <=> sum score > exp(fudge_dg * cutoff) * pair count (small slack to keep ties)
+        reject_sum_above = np.exp(fudge_dg * mean_log_score_cutoff) * len(handle_dict) * len(antihandle_dict) * (1 + 1e-9)
+
+    full_results = wrap_eqcorr2d(handle_dict, antihandle_dict, do_smart=True, hist=True, worst_tracking=do_worst,
+                                 tracked_pairs=tracked_pairs,
+                                 mode='triangle_grid' if connection_angle == '60' else 'square_grid',
+                                 expected_histogram=match_counts_histogram, reject_worst_above=worst_match_cutoff,
+                                 reject_sum_above=reject_sum_above, fudge_dg=fudge_dg)
+
+    hist = full_results['hist_total']
+    timings['match_compute'] = time.perf_counter() - stage_start
+    pairs_computed = full_results['pairs_per_rotation']
+
+    if full_results['rejected']:
+        # partial histogram: only the counts already in excess of the expected matches are known to be parasitic
+        comp_hist = compensate_histogram(hist, match_counts_histogram[:len(hist)], clip_negative=True)
+        worst_match = int(np.max(np.nonzero(comp_hist)[0]))
+        comp_hist = comp_hist[:worst_match + 1]
+        mean_log_score = np.log(get_sum_score({'hist_total': comp_hist}, fudge_dg=fudge_dg) / (len(handle_dict) * len(antihandle_dict)))/fudge_dg
+        data_dict = {'worst_match_score': worst_match, 'mean_log_score': mean_log_score,
+                     'match_histogram': comp_hist,
+                     'uncompensated_match_histogram': hist,
+                     'rejected': True}
+        if do_worst:
+            data_dict['worst_slat_combos'] = []
+        if report_timings:
+            data_dict['timings'] = timings
+            data_dict['pairs_computed'] = pairs_computed
+        return data_dict
+
     comp_hist = compensate_histogram(hist, match_counts_histogram)
     full_results['hist_total'] = comp_hist
 
@@ -103,20 +170,35 @@ def comprehensive_score_analysis(handle_dict, antihandle_dict, match_counts, con
 
     data_dict = {'worst_match_score': worst_match, 'mean_log_score': mean_log_score,
                  'match_histogram': full_results['hist_total'],
-                 'uncompensated_match_histogram': hist}
+                 'uncompensated_match_histogram': hist,
+                 'rejected': False}
 
     if request_similarity_score:
+        stage_start = time.perf_counter()
         # runs a separate similarity analysis to check for slats that are too similar to each other.
         similarity_results = get_similarity_hist(handle_dict, antihandle_dict, mode='triangle_grid' if connection_angle == '60' else 'square_grid')
         similarity_score = get_worst_match(similarity_results)
         data_dict['similarity_score'] = similarity_score
+        timings['similarity_compute'] = time.perf_counter() - stage_start
 
     if do_worst:
+        stage_start = time.perf_counter()
+        if worst_match < full_results['worst_value']:
+            # only possible if the connection graph does not match the handles, in which case the untracked pairs
+            # of the worst bin are not known and the local histograms are needed after all
+            full_results['local_hist_total'] = wrap_eqcorr2d(
+                handle_dict, antihandle_dict, do_smart=True, hist=False, local_histogram=True,
+                mode='triangle_grid' if connection_angle == '60' else 'square_grid')['local_hist_total']
         data_dict['worst_slat_combos'] = get_compensated_worst_keys_combos(full_results, connection_graph)
+        timings['worst_combo_extraction'] = time.perf_counter() - stage_start
+
+    if report_timings:
+        data_dict['timings'] = timings
+        data_dict['pairs_computed'] = pairs_computed
 
     return data_dict
 
-def compensate_histogram(hist, connection_hist):
+def compensate_histogram(hist, connection_hist, clip_negative=False):
     """
     Subtract the connection occupancy from the total histogram safely.
 
@@ -126,12 +208,15 @@ def compensate_histogram(hist, connection_hist):
     :type hist: numpy.ndarray
     :param connection_hist: Histogram of expected matches due to slat connections.
     :type connection_hist: numpy.ndarray
+    :param clip_negative: If True, negative bins are set to zero instead of raising an error.  Used for partial
+        histograms (bounded mode), where not all expected matches have been counted yet. Defaults to False.
+    :type clip_negative: bool
     :returns: Compensated histogram with connection matches subtracted.
     :rtype: numpy.ndarray
     :raises ValueError: If subtraction noflank_results in negative values (over-subtraction).
     """
     hist = np.asarray(hist, dtype=int)
-    connection_hist = np.asarray(connection_hist, dtype=int)
+    connection_hist = np.array(connection_hist, dtype=int)
 
     # zero out the entry for key=1 (ignored in smart mode)
     if connection_hist.size > 1:
@@ -147,6 +232,8 @@ def compensate_histogram(hist, connection_hist):
 
     # compute compensated histogram
     comphist = hist_padded - conn_padded
+    if clip_negative:
+        return np.maximum(comphist, 0)
     if np.any(comphist < 0):
         raise ValueError("Negative values detected in comphist — possible over-subtraction.")
 
@@ -171,9 +258,114 @@ def make_connection_histogram(connection_graph):
 
     return con_hist
 
+def get_value_count_overlaps(A_list, B_list):
+    """
+    Bound the possible matches of every A/B pair from the values each array contains.
+
+    At any offset, each non-zero entry of A can match at most one entry of B with the same value,
+    so the match count of a pair can never exceed ``sum_v min(countA[v], countB[v])`` over all
+    non-zero values ``v``. Summed over all offsets, the pair produces exactly
+    ``sum_v countA[v] * countB[v]`` matches (each equal pair of entries lines up at exactly one
+    offset). Both quantities are independent of rotation and are computed for all pairs at once
+    through matrix products of per-array value-count vectors.
+
+    :param A_list: Sequence of 2D uint8 arrays.
+    :type A_list: list[numpy.ndarray]
+    :param B_list: Sequence of 2D uint8 arrays.
+    :type B_list: list[numpy.ndarray]
+    :returns: Tuple of:
+
+        - ``single_match_pairs`` (numpy.ndarray): Boolean (nA, nB) array flagging the pairs that can
+          never match more than one entry at any offset.
+        - ``match_incidence`` (numpy.ndarray): int64 (nA, nB) array with the total number of matches
+          of each pair summed over all offsets.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    value_range = 1 + max((int(a.max()) for a in list(A_list) + list(B_list) if a.size > 0), default=0)
+
+    def value_counts(arrays):
+        sizes = [a.size for a in arrays]
+        values = np.concatenate([a.ravel() for a in arrays] + [np.zeros(0, dtype=np.uint8)]).astype(np.int64)
+        owners = np.repeat(np.arange(len(arrays), dtype=np.int64), sizes)
+        counts = np.bincount(owners * value_range + values, minlength=len(arrays) * value_range)
+        return counts.reshape(len(arrays), value_range)[:, 1:].astype(np.float64)  # zeros never match (float64 keeps the products exact)
+
+    counts_A = value_counts(A_list)
+    counts_B = value_counts(B_list)
+    present_A, present_B = (counts_A > 0).astype(np.float64), (counts_B > 0).astype(np.float64)
+
+    match_incidence = (counts_A @ counts_B.T).astype(np.int64)
+    shared_values = present_A @ present_B.T
+    # with a single shared value, the bound is 1 if that value only appears once on either side
+    single_sided = (counts_A == 1).astype(np.float64) @ present_B.T + present_A @ (counts_B == 1).astype(np.float64).T
+    single_match_pairs = (shared_values == 0) | ((shared_values == 1) & (single_sided > 0))
+    return single_match_pairs, match_incidence
+
+def _rotation_angles(mode, do_smart, any_2d):
+    """
+    Select the rotations computed for a mode (see the module notes on smart mode).
+    """
+    if mode not in ('classic', 'square_grid', 'triangle_grid'):
+        raise ValueError("mode must be one of 'classic', 'square_grid', 'triangle_grid'")
+
+    if mode == 'classic':
+        return [0, 180]
+    if do_smart and not any_2d:
+        return [0, 180]
+    if mode == 'square_grid':
+        return [0, 90, 180, 270]
+    return [0, 60, 120, 180, 240, 300]  # triangle_grid
+
+
+@lru_cache(maxsize=None)
+def _tri60_rotation_coords(shape):
+    """
+    Rotated coordinates of every cell of an array for all six 60° triangular-grid rotations (as in
+    :func:`rotate_array_tri60`, before shifting them to be non-negative). These only depend on the array shape, so
+    the cache holds one entry per slat geometry, however many arrays or footprints share it.
+
+    :param shape: (H, W) of the input array.
+    :type shape: tuple[int, int]
+    :returns: Read-only int64 array (6, 2, H*W) with the (x, y) coordinates of each flat cell index per rotation.
+    :rtype: numpy.ndarray
+    """
+    H, W = shape
+    i, j = np.divmod(np.arange(H * W), W)
+    coords = np.stack([np.stack(rotate_coords_tri60(i, j, k=k60)) for k60 in range(6)])
+    coords.setflags(write=False)  # shared between all callers through the cache
+    return coords
+
+
+def _rotate_tri60_cached(b, k60, footprint=None):
+    """
+    Rotates a uint8 array (H, W), or a stack of arrays (P, H, W) sharing the same geometry, by k60×60° on the
+    triangular grid using cached rotated coordinates (see :func:`_tri60_rotation_coords`).
+
+    :param b: Array to rotate.
+    :type b: numpy.ndarray
+    :param k60: Number of 60° rotation steps.
+    :type k60: int
+    :param footprint: Boolean (H, W) mask of the cells to map (the output is cropped to it), or None to map all
+        cells (dense).
+    :type footprint: numpy.ndarray or None
+    :returns: C-contiguous rotated array, identical to the output of :func:`rotate_array_tri60`.
+    :rtype: numpy.ndarray
+    """
+    x, y = _tri60_rotation_coords(b.shape[-2:])[k60 % 6]
+    src = np.arange(x.size) if footprint is None else np.flatnonzero(footprint)
+    x, y = x[src], y[src]
+    xs, ys = x - x.min(), y - y.min()
+    out_shape = (int(xs.max()) + 1, int(ys.max()) + 1)
+    stack_shape = b.shape[:-2]
+    out = np.zeros(stack_shape + out_shape, dtype=np.uint8)
+    out.reshape(stack_shape + (-1,))[..., xs * out_shape[1] + ys] = b.reshape(stack_shape + (-1,))[..., src]
+    return out
+
+
 def wrap_eqcorr2d(handle_dict, antihandle_dict,
                   mode='classic', hist=True, local_histogram=False, report_full=False,
-                   do_smart=False):
+                   do_smart=False, expected_histogram=None, reject_worst_above=None, reject_sum_above=None,
+                  fudge_dg=10, symmetric=False, value_prefilter=True, worst_tracking=False, tracked_pairs=None):
     """
     Run eqcorr2d on all handle/antihandle pairs, optionally across rotations.
 
@@ -211,6 +403,39 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
         non-axial 60° steps) are only evaluated for pairs where at least one operand is truly
         2D (H >= 2 and W >= 2). 0°/180° are always evaluated. Defaults to False.
     :type do_smart: bool
+    :param expected_histogram: Histogram of matches expected from the design itself (e.g. slat connections).
+        Only used in bounded mode, where counts up to these values are not considered parasitic. Defaults to None
+        (no expected matches).
+    :type expected_histogram: numpy.ndarray or None
+    :param reject_worst_above: Enables bounded mode. The computation is aborted as soon as any bin above this value
+        holds more counts than expected. Defaults to None (disabled).
+    :type reject_worst_above: int or None
+    :param reject_sum_above: Enables bounded mode. The computation is aborted as soon as the sum score
+        (see :func:`get_sum_score`) of the counts in excess of ``expected_histogram`` exceeds this value.
+        Defaults to None (disabled).
+    :type reject_sum_above: float or None
+    :param fudge_dg: Exponential weighting factor used for ``reject_sum_above``. Defaults to 10.
+    :type fudge_dg: float
+    :param symmetric: If True, computes the self-correlation of a single set of arrays (``antihandle_dict`` must be
+        the same object as ``handle_dict``). Pairs (i, j) and (j, i) are mirror images of each other (at the same
+        rotation for 0°/180°, or at opposite rotations for 90°/270°), so only one of each is computed and counted twice.
+        The trivial alignment of each array with itself (at 0°) is excluded from the histogram.
+        Only the global histogram is available in this mode. Defaults to False.
+    :type symmetric: bool
+    :param value_prefilter: If True, pairs that can never match more than one entry at any offset (judged from the
+        values each array contains, see :func:`get_value_count_overlaps`) are resolved directly instead of being
+        scanned by the C engine. Results are identical either way. Not used with ``report_full`` or ``symmetric``.
+        Defaults to True.
+    :type value_prefilter: bool
+    :param worst_tracking: If True, the C engine also reports the highest match count of every pair and the pairs
+        that reach the overall highest count, which is enough to extract the worst pairs (see
+        :func:`get_worst_keys_combos`) without the memory cost of ``local_histogram``. Not available in symmetric
+        mode. Defaults to False.
+    :type worst_tracking: bool
+    :param tracked_pairs: (handle_key, antihandle_key) pairs whose full histograms are reported when
+        ``worst_tracking`` is enabled (e.g. the slat pairs that are connected by design). These pairs are left out
+        of ``worst_value``/``worst_pairs``. Pairs with unknown keys are ignored. Defaults to None.
+    :type tracked_pairs: list[tuple] or None
     :returns: Dictionary containing:
 
         - ``angles`` (list[int]): Angles actually computed.
@@ -219,12 +444,24 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
         - ``handle_keys`` (list): Keys from handle_dict in order.
         - ``anti_handle_keys`` (list): Keys from antihandle_dict in order.
         - ``local_hist_total`` (numpy.ndarray or None): 3D array (nA, nB, L) if local_histogram=True.
+        - ``rejected`` (bool): True if bounded mode aborted the computation. Histograms are then partial and
+          ``angles`` only lists the rotations that were started.
+        - ``pairs_per_rotation`` (dict): Number of pairs sent to the C engine at each angle in ``angles`` (pairs
+          resolved by the value prefilter, or covered by the opposite rotation in symmetric mode, are not counted).
+        - ``pair_max`` (numpy.ndarray, if worst_tracking=True): (nA, nB) highest match count of each pair.
+        - ``worst_value`` (int, if worst_tracking=True): Highest match count among the pairs that are not tracked.
+        - ``worst_pairs`` (tuple, if worst_tracking=True): (handle indices, antihandle indices, counts) of the
+          untracked pairs reaching ``worst_value``, in row-major order, with their number of offsets at that value.
+        - ``tracked_pairs`` (tuple, if worst_tracking=True): (handle indices, antihandle indices) of the tracked pairs.
+        - ``tracked_hist`` (numpy.ndarray, if worst_tracking=True): (T, L) histograms of the tracked pairs.
     :rtype: dict
 
     .. note::
         The low-level C engine always computes a single orientation. Rotations are
         handled by pre-rotating the antihandle arrays before calling the C engine.
-        For triangle_grid, rotations are performed via :func:`rotate_array_tri60`.
+        For triangle_grid, rotations are performed with the rotated coordinates cached per array shape by
+        :func:`_tri60_rotation_coords` (equivalent to :func:`rotate_array_tri60`), so each antihandle rotation is a
+        crop and a single scatter after the first call.
     """
 
     def ensure_2d_uint8(arr):
@@ -247,7 +484,7 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
             out = np.ascontiguousarray(out, dtype=np.uint8)
         return out
 
-    def rot60_py(b, k60):
+    def rot60_py(b, k60, footprint):
         """60° rotations for triangle_grid.
         For 1D arrays, use dense mapping at 180° so the footprint stays 1×L
         (matches 0°) and yields 63 offsets at that angle.
@@ -257,14 +494,20 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
         else:
             # b is already 2D here (ensure_2d_uint8); consider it effectively 1D if any dim is 1
             is_effectively_1d = (b.shape[0] == 1) or (b.shape[1] == 1)
-            map_only_nonzero = True
             if is_effectively_1d and k60 == 3:  # 180° in {0,60,120,180,240,300} → k60=3
-                map_only_nonzero = False
-            out = rotate_array_tri60(b, k60, map_only_nonzero=map_only_nonzero, return_shift=False)
+                footprint = None  # dense mapping
+            out = _rotate_tri60_cached(b, k60, footprint)
         if not out.flags['C_CONTIGUOUS'] or out.dtype != np.uint8:
             out = np.ascontiguousarray(out, dtype=np.uint8)
         return out
 
+    if symmetric:
+        if antihandle_dict is not handle_dict:
+            raise ValueError('Symmetric mode correlates a single set of arrays, so antihandle_dict must be handle_dict.')
+        if (report_full or local_histogram or worst_tracking or not hist or reject_worst_above is not None
+                or reject_sum_above is not None):
+            raise ValueError('Symmetric mode only supports the global histogram output.')
+
     # Prepare lists
     handle_keys = list(handle_dict.keys())
     antihandle_keys = list(antihandle_dict.keys())
@@ -278,23 +521,12 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
 
     # Decide which angles to compute based on mode and do_smart
     mode = (mode or 'square_grid').lower()
-    if mode not in ('classic', 'square_grid', 'triangle_grid'):
-        raise ValueError("mode must be one of 'classic', 'square_grid', 'triangle_grid'")
-
-    if mode == 'classic':
-        angles = [0, 180]
-    elif mode == 'square_grid':
-        angles = [0, 90, 180, 270]
-        if do_smart and not (anyA2D or anyB2D):
-            angles = [0, 180]
-    else:  # triangle_grid
-        # Six rotations: 0,60,120,180,240,300. Only 0 and 180 supported until rot60_py is implemented.
-        if do_smart and not (anyA2D or anyB2D):
-            angles = [0, 180]
-        else:
-            angles = [0, 60, 120, 180, 240, 300]
+    angles = _rotation_angles(mode, do_smart, anyA2D or anyB2D)
 
     # Pre-rotate B only for the selected angles
+    if mode == 'triangle_grid':
+        # the rotated coordinates are cached per array shape, the footprints only select (and crop to) their cells
+        B_footprints = [b != 0 for b in B_list]
     B_rot = {}
     for angle in angles:
         if mode in ('classic', 'square_grid'):
@@ -304,7 +536,7 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
             # triangle_grid uses 60° steps; currently only 0 and 180 (k60=0 or 3) are implemented
             k60_map = {0: 0, 60: 1, 120: 2, 180: 3, 240: 4, 300: 5}
             k60 = k60_map[angle]
-            B_rot[angle] = [rot60_py(b, k60) for b in B_list]
+            B_rot[angle] = [rot60_py(b, k60, fp) for b, fp in zip(B_list, B_footprints)]
 
     # Build compute_instructions masks per rotation
     nA, nB = len(A_list), len(B_list)
@@ -315,19 +547,188 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
     pair_need_quarter = np.logical_or(A_is2D[:, None], B_is2D[None, :])
     quarter_mask = pair_need_quarter.astype(np.uint8)
 
+    # Bounded mode setup: the C engine receives, for each rotation, the remaining expected counts per bin
+    # (allowance) and the weighted excess already accumulated by previous rotations (offset)
+    bounded = reject_worst_above is not None or reject_sum_above is not None
+    if bounded and not hist:
+        raise ValueError('Bounded mode (reject_worst_above/reject_sum_above) requires hist=True.')
+    if reject_sum_above is not None and not np.isfinite(reject_sum_above):
+        reject_sum_above = None
+    bound_kwargs = {}
+    hdim = max(max((a.size for a in A_list), default=0), 1) + 1  # histogram length used by the C engine
+    if bounded:
+        # bounds that can never be reached are dropped, as checking them only slows the C engine down: no pair can
+        # match more entries than either of its arrays holds, and every offset adds at most the weight of that count
+        max_count = min(max((np.count_nonzero(a) for a in A_list), default=0),
+                        max((np.count_nonzero(b) for b in B_list), default=0))
+        if reject_worst_above is not None and reject_worst_above >= max_count:
+            reject_worst_above = None
+        if reject_sum_above is not None:
+            A_heights = np.array([a.shape[0] for a in A_list], dtype=np.int64)
+            A_widths = np.array([a.shape[1] for a in A_list], dtype=np.int64)
+            offset_count = 0
+            for angle in angles:
+                B_heights = np.array([b.shape[0] for b in B_rot[angle]], dtype=np.int64)
+                B_widths = np.array([b.shape[1] for b in B_rot[angle]], dtype=np.int64)
+                offsets = (A_heights[:, None] + B_heights[None, :] - 1) * (A_widths[:, None] + B_widths[None, :] - 1)
+                offset_count += int(offsets[(ones_mask if angle in (0, 180) or not do_smart else quarter_mask) != 0].sum())
+            with np.errstate(over='ignore'):
+                if offset_count * np.exp(fudge_dg * max_count) <= reject_sum_above:
+                    reject_sum_above = None
+        bounded = reject_worst_above is not None or reject_sum_above is not None
+    if bounded:
+        expected = np.zeros(hdim, dtype=np.int64)
+        if expected_histogram is not None:
+            expected_histogram = np.asarray(expected_histogram, dtype=np.int64)[:hdim]
+            expected[:len(expected_histogram)] = expected_histogram
+        reject_above = -1 if reject_worst_above is None else int(reject_worst_above)
+        if reject_sum_above is not None:
+            with np.errstate(over='ignore'):
+                bin_weights = np.exp(fudge_dg * np.arange(hdim, dtype=np.float64))
+            # a single excess count in a bin heavier than the cutoff rejects on its own, so capping the weights
+            # just above the cutoff keeps them finite without changing the outcome
+            bin_weights = np.minimum(bin_weights, np.nextafter(reject_sum_above, np.inf))
+            bound_kwargs['bin_weights'] = bin_weights
+            bound_kwargs['score_cutoff'] = float(reject_sum_above)
+        bound_kwargs['reject_above'] = int(reject_above)
+
+    # Symmetric mode: decides how each rotation is computed (in the upper triangle only, or in full but counted twice
+    # to cover its opposite rotation).  Rotations on the triangular grid are only mirrored exactly for 0°, and for 180°
+    # when all arrays are 1D (as the rotated arrays are otherwise cropped to their non-zero footprint).
+    symmetric_angles, doubled_angles, covered_angles = set(), set(), set()
+    if symmetric:
+        for angle in angles:
+            inverse = (360 - angle) % 360
+            if mode != 'triangle_grid' or angle == 0 or (angle == 180 and all(a.shape[0] == 1 for a in A_list)):
+                if inverse == angle:
+                    symmetric_angles.add(angle)
+                elif inverse in angles and angle not in covered_angles:
+                    doubled_angles.add(angle)
+                    covered_angles.add(inverse)
+
+    # Worst tracking: the C engine summarises each pair by its highest match count and only lists the pairs at the
+    # highest count (plus the full histograms of the tracked pairs), which are merged over rotations here
+    worst_kwargs = {}
+    if worst_tracking:
+        handle_index = {key: index for index, key in enumerate(handle_keys)}
+        anti_index = {key: index for index, key in enumerate(antihandle_keys)}
+        tracked_keys = np.unique(np.array([handle_index[h] * nB + anti_index[a] for h, a in (tracked_pairs or [])
+                                           if h in handle_index and a in anti_index], dtype=np.int64))
+        tracked_i, tracked_j = np.divmod(tracked_keys, max(nB, 1))
+        worst_kwargs['tracked_pairs'] = np.stack([tracked_i, tracked_j], axis=1)
+        agg_pair_max = np.zeros((nA, nB), dtype=np.uint8 if hdim <= 256 else np.uint32)
+        agg_tracked_hist = np.zeros((len(tracked_keys), hdim), dtype=np.uint32)
+        worst_value, worst_lists = -1, []
+
+    # Value prefilter: pairs that can match at most one entry per offset have a histogram fully determined by their
+    # total match count (see get_value_count_overlaps), so they are removed from the masks and added in directly
+    prefilter_pairs = None
+    if value_prefilter and not report_full and not symmetric and nA > 0 and nB > 0:
+        single_match_pairs, match_incidence = get_value_count_overlaps(A_list, B_list)
+        if worst_tracking:
+            single_match_pairs[tracked_i, tracked_j] = False  # tracked pairs always get their histogram from the C engine
+        if single_match_pairs.any():
+            prefilter_pairs = single_match_pairs
+            A_heights = np.array([a.shape[0] for a in A_list], dtype=np.int64)
+            A_widths = np.array([a.shape[1] for a in A_list], dtype=np.int64)
+
     # Perform calls per selected rotation
     per_rotation = {}
     agg_loc_hist= None
     agg_glob_hist = None
+    rejected = False
+    computed_angles = []
+    pairs_per_rotation = {}
     for angle in angles:
+        if angle in covered_angles:
+            # already counted through its opposite rotation
+            computed_angles.append(angle)
+            pairs_per_rotation[angle] = 0
+            continue
         if angle in (0, 180):
             mask = ones_mask
         else:
             # 90/270: if do_smart enabled, use selective mask; else full ones
             mask = quarter_mask if do_smart else ones_mask
+        resolved = None
+        if prefilter_pairs is not None:
+            resolved = prefilter_pairs & (mask != 0)
+            if resolved.any():
+                mask = ((mask != 0) & ~resolved).astype(np.uint8)
+                B_heights = np.array([b.shape[0] for b in B_rot[angle]], dtype=np.int64)
+                B_widths = np.array([b.shape[1] for b in B_rot[angle]], dtype=np.int64)
+                offsets = (A_heights[:, None] + B_heights[None, :] - 1) * (A_widths[:, None] + B_widths[None, :] - 1)
+                resolved_singles = np.where(resolved, match_incidence, 0)
+                resolved_zeros = np.where(resolved, offsets, 0) - resolved_singles
+                resolved_hist = np.zeros(hdim, dtype=np.uint64)
+                resolved_hist[0] = resolved_zeros.sum()
+                resolved_hist[1] = resolved_singles.sum()
+            else:
+                resolved = None
+
         # Call engine with backward-compatibility: prefer 7 args (with local_histogram), fallback to 6 args
 
-        res = eqcorr2d_engine.compute(A_list, B_rot[angle], mask, int(hist), int(report_full), int(False), int(local_histogram))
+        prefilter_rejected = False
+        if bounded:
+            so_far = np.zeros(hdim, dtype=np.int64) if agg_glob_hist is None else agg_glob_hist.astype(np.int64)
+            if resolved is not None:
+                so_far = so_far + resolved_hist.astype(np.int64)
+            bound_kwargs['hist_allowance'] = expected - so_far
+            excess = np.maximum(so_far - expected, 0)
+            if bound_kwargs['reject_above'] >= 0 and np.any(excess[bound_kwargs['reject_above'] + 1:] > 0):
+                prefilter_rejected = True
+            if 'bin_weights' in bound_kwargs:
+                bound_kwargs['score_offset'] = float(np.sum(excess * bound_kwargs['bin_weights']))
+                if bound_kwargs['score_offset'] > bound_kwargs['score_cutoff']:
+                    prefilter_rejected = True
+
+        if worst_tracking:
+            worst_kwargs['worst_floor'] = int(worst_value)
+
+        if prefilter_rejected:
+            # the directly resolved pairs are already enough to reject, so the C engine is not needed
+            res = (np.zeros(hdim, dtype=np.uint64), None, None,
+                   np.zeros((nA, nB, hdim), dtype=np.uint32) if local_histogram else None, True)
+            pairs_per_rotation[angle] = 0
+        elif angle in symmetric_angles:
+            res = eqcorr2d_engine.compute(A_list, B_rot[angle], mask, int(hist), int(report_full), int(False), int(local_histogram),
+                                          symmetric=True, exclude_self_alignment=(angle == 0))
+            pairs_per_rotation[angle] = int(np.count_nonzero(np.triu(mask)))
+        else:
+            res = eqcorr2d_engine.compute(A_list, B_rot[angle], mask, int(hist), int(report_full), int(worst_tracking),
+                                          int(local_histogram), **bound_kwargs, **worst_kwargs)
+            pairs_per_rotation[angle] = int(np.count_nonzero(mask))
+            if angle in doubled_angles:
+                res = (res[0] * 2,) + tuple(res[1:])
+        if resolved is not None:
+            res = (res[0] + resolved_hist if hist else res[0],) + tuple(res[1:])
+            if local_histogram:
+                ii, jj = np.nonzero(resolved)
+                res[3][ii, jj, 0] += resolved_zeros[ii, jj].astype(np.uint32)
+                res[3][ii, jj, 1] += resolved_singles[ii, jj].astype(np.uint32)
+        computed_angles.append(angle)
+
+        if worst_tracking:
+            # candidate lists of this rotation: (value, handle indices, antihandle indices, counts at value)
+            candidates = []
+            if res[2] is not None:
+                np.maximum(agg_pair_max, res[2]['pair_max'], out=agg_pair_max)
+                agg_tracked_hist += res[2]['tracked_hist']
+                candidates.append((res[2]['worst_value'], res[2]['worst_pairs'][:, 0], res[2]['worst_pairs'][:, 1],
+                                   res[2]['worst_counts']))
+            if resolved is not None:
+                # directly resolved pairs peak at 1, or at 0 if they share no values at all
+                matched = resolved_singles > 0
+                agg_pair_max[matched] = np.maximum(agg_pair_max[matched], 1)
+                if worst_value <= 1:
+                    ii, jj = np.nonzero(matched) if matched.any() else np.nonzero(resolved)
+                    counts = (resolved_singles if matched.any() else resolved_zeros)[ii, jj].astype(np.uint64)
+                    candidates.append((int(matched.any()), ii, jj, counts))
+            for value, ii, jj, counts in candidates:
+                if value > worst_value:
+                    worst_value, worst_lists = value, []
+                if value == worst_value:
+                    worst_lists.append((np.asarray(ii, dtype=np.int64) * nB + jj, counts))
 
         # build aggregated histograms over rotations if needed
         if hist:
@@ -352,14 +753,32 @@ def wrap_eqcorr2d(handle_dict, antihandle_dict,
                 'local_hist': loc_hist,
             }
 
-    return {
-        'angles': angles,
+        if res[4]:
+            rejected = True
+            break
+
+    results = {
+        'angles': computed_angles,
         'hist_total': agg_glob_hist,
         'rotations': per_rotation,
         'handle_keys': handle_keys,
         'anti_handle_keys': antihandle_keys,
         'local_hist_total': agg_loc_hist,
+        'rejected': rejected,
+        'pairs_per_rotation': pairs_per_rotation,
     }
+    if worst_tracking:
+        # a pair can reach the worst value at several rotations, so its counts are summed
+        keys = np.concatenate([keys for keys, _ in worst_lists]) if worst_lists else np.zeros(0, dtype=np.int64)
+        counts = np.concatenate([counts for _, counts in worst_lists]) if worst_lists else np.zeros(0, dtype=np.uint64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        summed_counts = np.zeros(len(unique_keys), dtype=np.uint64)
+        np.add.at(summed_counts, inverse, counts.astype(np.uint64))
+        worst_i, worst_j = np.divmod(unique_keys, max(nB, 1))
+        results.update({'pair_max': agg_pair_max, 'worst_value': int(worst_value),
+                        'worst_pairs': (worst_i, worst_j, summed_counts),
+                        'tracked_pairs': (tracked_i, tracked_j), 'tracked_hist': agg_tracked_hist})
+    return results
 
 def get_worst_match(c_results):
     """
@@ -372,14 +791,11 @@ def get_worst_match(c_results):
     """
 
     hist = c_results.get('hist_total')
-    worst = None
-
-    for matchtype, count in enumerate(hist):
-        if count != 0:
-            worst = matchtype
-    if worst is None:
+    nonzero_bins = np.flatnonzero(np.asarray(hist))
+    if len(nonzero_bins) == 0:
         print('Warning: no histogram found, returning worst=None')
-    return worst
+        return None
+    return int(nonzero_bins[-1])
 
 def get_sum_score(c_results, fudge_dg=10):
     """
@@ -399,12 +815,50 @@ def get_sum_score(c_results, fudge_dg=10):
         hist = c_results.get('hist_total')
     else:
         hist = c_results[0]
-    if hist is None:
+    if hist is None or len(hist) == 0:
         return 0.0
-    summe = 0.0
-    for matchtype, count in enumerate(hist):
-        summe = summe + count * np.exp(fudge_dg * matchtype)
-    return summe
+    weighted_counts = np.asarray(hist) * np.exp(fudge_dg * np.arange(len(hist)))
+    # summed strictly in bin order (a running sum rather than a pairwise/BLAS reduction), so that the score never
+    # depends on the summation order used by numpy
+    return np.cumsum(weighted_counts)[-1]
+
+def _worst_bin_pairs(c_results, worst):
+    """
+    Return the pairs with a non-zero count in a histogram bin, from either the local histograms or the compact
+    output of ``worst_tracking``.
+
+    :param c_results: Result dictionary from :func:`wrap_eqcorr2d`.
+    :type c_results: dict
+    :param worst: Histogram bin (match count) to extract.
+    :type worst: int
+    :returns: (handle indices, antihandle indices, counts) in row-major order, or None if neither output is available.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray] or None
+    :raises ValueError: If only the compact output is available and the bin is below the highest untracked count
+        (the counts of the untracked pairs are then unknown).
+    """
+    local_hist_total = c_results.get('local_hist_total')
+    if local_hist_total is not None:
+        local_hist_total = np.asarray(local_hist_total)
+        ii, jj = np.nonzero(local_hist_total[:, :, worst])
+        return ii, jj, local_hist_total[ii, jj, worst].astype(np.int64)
+    if c_results.get('worst_pairs') is None:
+        return None
+
+    if worst < c_results['worst_value']:
+        raise ValueError(f'Match count {worst} is below the worst untracked match ({c_results["worst_value"]}), '
+                         f'so the local histogram is needed to list its pairs.')
+    nB = len(c_results['anti_handle_keys'])
+    tracked_i, tracked_j = c_results['tracked_pairs']
+    tracked_counts = c_results['tracked_hist'][:, worst] if worst < c_results['tracked_hist'].shape[1] else np.zeros(len(tracked_i))
+    keys = tracked_i[tracked_counts > 0] * nB + tracked_j[tracked_counts > 0]
+    counts = tracked_counts[tracked_counts > 0].astype(np.int64)
+    if worst == c_results['worst_value']:
+        worst_i, worst_j, worst_counts = c_results['worst_pairs']
+        keys = np.concatenate([keys, worst_i * nB + worst_j])
+        counts = np.concatenate([counts, worst_counts.astype(np.int64)])
+    order = np.argsort(keys, kind='stable')  # tracked and untracked pairs are disjoint
+    ii, jj = np.divmod(keys[order], max(nB, 1))
+    return ii, jj, counts[order]
 
 def get_seperate_worst_lists(c_results):
     """
@@ -414,7 +868,8 @@ def get_seperate_worst_lists(c_results):
     match count bin.
 
     :param c_results: Result dictionary from :func:`wrap_eqcorr2d` containing
-        ``'hist_total'``, ``'handle_keys'``, ``'anti_handle_keys'``, and ``'local_hist_total'``.
+        ``'hist_total'``, ``'handle_keys'``, ``'anti_handle_keys'``, and ``'local_hist_total'`` (or the outputs of
+        ``worst_tracking``).
     :type c_results: dict
     :returns: Tuple of (handle_list, antihandle_list) where each list contains the keys
         that contributed to the worst match bin. Returns (None, None) if required data is missing.
@@ -423,17 +878,16 @@ def get_seperate_worst_lists(c_results):
     worst = get_worst_match(c_results)
     handle_keys = c_results.get('handle_keys')
     antihandle_keys = c_results.get('anti_handle_keys')
-    local_hist_total = c_results.get('local_hist_total')
     if worst is None:
         print("Warning: global histogram needed to compute worst list, returning (None,None)")
         return None, None
 
-    if local_hist_total is None:
+    worst_pairs = _worst_bin_pairs(c_results, worst)
+    if worst_pairs is None:
         print ("Warning: local histogram needet to compute worst list , returning (None,None)")
         return None, None
 
-    worst_slice = local_hist_total[:, :, worst]
-    ii, jj = np.where(worst_slice > 0)
+    ii, jj, _ = worst_pairs
     handle_list = [handle_keys[i] for i in ii]
     antihandle_list = [antihandle_keys[j] for j in jj]
     return (handle_list, antihandle_list)
@@ -442,7 +896,8 @@ def get_worst_keys_combos(c_results):
     """
     Return a list of key pairs that contributed to the global worst histogram bin.
 
-    Relies on the ``'local_hist_total'`` 3D array of shape (nA, nB, L) and the key lists.
+    Relies on the ``'local_hist_total'`` 3D array of shape (nA, nB, L) (or the outputs of ``worst_tracking``) and
+    the key lists.
 
     :param c_results: Result dictionary from :func:`wrap_eqcorr2d` containing
         ``'hist_total'``, ``'handle_keys'``, ``'anti_handle_keys'``, and ``'local_hist_total'``.
@@ -454,17 +909,16 @@ def get_worst_keys_combos(c_results):
     worst = get_worst_match(c_results)
     handle_keys = c_results.get('handle_keys')
     antihandle_keys = c_results.get('anti_handle_keys')
-    local_hist_total = c_results.get('local_hist_total')
 
     if worst is None:
         print("Warning: global histogram needed to compute worst list, returning None")
         return None
-    if local_hist_total is None:
+    worst_pairs = _worst_bin_pairs(c_results, worst)
+    if worst_pairs is None:
         print("Warning: local histogram needed to compute worst list, returning None")
         return None
 
-    worst_slice = np.asarray(local_hist_total)[:, :, worst]
-    ii, jj = np.where(worst_slice > 0)
+    ii, jj, _ = worst_pairs
 
     combos = [(handle_keys[i], antihandle_keys[j],1) for i, j in zip(ii, jj)]
     return combos
@@ -477,7 +931,8 @@ def get_compensated_worst_keys_combos(c_results, connection_graph):
     connection graph to identify truly problematic pairs.
 
     :param c_results: Result dictionary from :func:`wrap_eqcorr2d` containing
-        ``'hist_total'``, ``'handle_keys'``, ``'anti_handle_keys'``, and ``'local_hist_total'``.
+        ``'hist_total'``, ``'handle_keys'``, ``'anti_handle_keys'``, and ``'local_hist_total'`` (or the outputs of
+        ``worst_tracking``, with the connected pairs tracked).
     :type c_results: dict
     :param connection_graph: Dictionary mapping match types to lists of expected
         (handle_key, antihandle_key) connection pairs.
@@ -491,56 +946,64 @@ def get_compensated_worst_keys_combos(c_results, connection_graph):
     worst = get_worst_match(c_results)
     handle_keys = c_results['handle_keys']
     anti_keys   = c_results['anti_handle_keys']
-    loc = np.asarray(c_results['local_hist_total'])# ja ja chat gpt ensure that data types are always correct
-
-    worst_slice = loc[:, :, worst]  # counts per (i,j) in the worst bin
+    ii, jj, counts_hist = _worst_bin_pairs(c_results, worst)  # non-zero counts per (i,j) in the worst bin
 
     # we won't skip anything if it's about matches of 1 or less since they are somehow convoluted in the do smart scheme.
     if worst <=1:
         expected_skips = []
     else:
         expected_skips = connection_graph.get(worst, []) # if it's not in there skip nothing
-    skip_counts = Counter(expected_skips)  # multiplicities to skip in this bin. There could be duplicates (more than 1) due to phantom slats.
 
     # IN THIS CONTEXT, A SKIP REFERS TO A MATCH WHICH IS 'SKIPPED' BECAUSE IT IS A TRUE CONNECTION IN THE DESIGN THAT CANNOT BE OPTIMIZED AWAY
-    combos = []
-    skipped = []
-    for i, j in zip(*np.where(worst_slice > 0)):
-
-        pair = (handle_keys[i], anti_keys[j])
-        count_hist = int(worst_slice[i, j])
-        count_skip = skip_counts.get(pair, 0) # this will be 0 (no matches) or 1 (most cases) but can be more than 1 when phantom slats are involved
-
-        if count_skip > 0:
-            for i in range(count_skip): # need to add duplicate values to match the format of the expected skips
-                skipped.append(pair)
-
-        # Skip only when the skip list covers all occurrences (==), else keep full count
-        if count_skip == count_hist: # if both are 1, skip this pair entirely. count_hist might actually be larger than 1.
-            continue
+    # The skips are converted into a compensation count per worst pair (pairs can be listed more than once due to
+    # phantom slats), which is subtracted from the worst bin in one step.
+    counts_skip = np.zeros_like(counts_hist)
+    unmatched_skips = 0  # skips on pairs that are not part of the worst bin at all
+    if len(expected_skips) > 0:
+        handle_index = {key: index for index, key in enumerate(handle_keys)}
+        anti_index = {key: index for index, key in enumerate(anti_keys)}
+        skip_keys = []
+        for handle_key, anti_key in expected_skips:
+            if handle_key in handle_index and anti_key in anti_index:
+                skip_keys.append(handle_index[handle_key] * len(anti_keys) + anti_index[anti_key])
+            else:
+                unmatched_skips += 1
+        skip_keys, skip_counts = np.unique(np.array(skip_keys, dtype=np.int64), return_counts=True)
+        pair_keys = ii.astype(np.int64) * len(anti_keys) + jj  # sorted, as the pairs are in row-major order
+        positions = np.minimum(np.searchsorted(pair_keys, skip_keys), max(len(pair_keys) - 1, 0))
+        found = (pair_keys[positions] == skip_keys) if len(pair_keys) > 0 else np.zeros(len(skip_keys), dtype=bool)
+        counts_skip[positions[found]] = skip_counts[found]
+        unmatched_skips += int(skip_counts[~found].sum())
+
+    # Skip only when the skip list covers all occurrences (==), else keep full count
+    over_subtracted = np.flatnonzero(counts_skip > counts_hist)
+    if len(over_subtracted) > 0:
+        first = over_subtracted[0]
+        pair = (handle_keys[ii[first]], anti_keys[jj[first]])
+        raise ValueError(f"Over-subtraction detected for pair {pair}: We have a deeply rooted bug if this happens.")
 
-        combos.append((pair[0], pair[1], count_hist-count_skip)) # record the difference for bookkeeping
-        if count_skip > count_hist:
-            raise ValueError(f"Over-subtraction detected for pair {pair}: We have a deeply rooted bug if this happens.")
     # sanity check to verify all expected skips were found
-
-    if len(skipped) != len(expected_skips):
+    if unmatched_skips > 0 or int(counts_skip.sum()) != len(expected_skips):
+        skipped = [(handle_keys[i], anti_keys[j]) for i, j, count in zip(ii, jj, counts_skip) for _ in range(count)]
         raise RuntimeError(
             f"Warning: some expected skips were not found in the worst pairs. There might be a bug.\n"
             f"Skipped pairs: {skipped}\n"
             f"Expected skips from connection graph: {expected_skips}"
         )
 
+    kept = counts_skip != counts_hist  # record the difference for bookkeeping
+    combos = [(handle_keys[i], anti_keys[j], int(count)) for i, j, count in
+              zip(ii[kept], jj[kept], (counts_hist - counts_skip)[kept])]
     return combos
 
 def get_similarity_hist(handle_dict, antihandle_dict, mode='square_grid', do_smart=True):
     """
     Build a library-level similarity histogram (handles+antihandles).
 
-    This helper runs :func:`wrap_eqcorr2d` twice, once within the handle set and once
-    within the antihandle set, then sums the resulting histograms. Finally it
-    subtracts a simple self-match correction so that exact self-pairs do not
-    inflate the counts.
+    This helper runs :func:`wrap_eqcorr2d` twice in symmetric mode, once within the handle
+    set and once within the antihandle set, then sums the resulting histograms. Symmetric
+    mode only computes each unordered pair of arrays once (counting it twice) and skips the
+    trivial alignment of each array with itself, so exact self-pairs do not inflate the counts.
 
     :param handle_dict: Dictionary mapping keys to handle arrays.
     :type handle_dict: dict[Any, numpy.ndarray]
@@ -554,26 +1017,22 @@ def get_similarity_hist(handle_dict, antihandle_dict, mode='square_grid', do_sma
     :type do_smart: bool
     :returns: Dictionary containing:
 
-        - ``hist_total`` (numpy.ndarray): Combined similarity histogram with self-match correction.
+        - ``hist_total`` (numpy.ndarray): Combined similarity histogram (excluding self-matches).
         - ``angles`` (list): Empty list (no per-rotation info for this helper).
         - ``rotations`` (dict): Empty dict.
         - ``worst_keys_combos`` (None): Not computed for similarity analysis.
     :rtype: dict
-
-    .. note::
-        The self-match correction subtracts one count at matchtype = number of
-        nonzeros for each individual array.
     """
     # Compute pairwise stats within the handle set
     res_hh = wrap_eqcorr2d(handle_dict, handle_dict,
                            mode=mode, do_smart=do_smart,
-                           hist=True, report_full=False)
+                           hist=True, report_full=False, symmetric=True)
     hist_hh = res_hh['hist_total']
 
     # Compute pairwise stats within the antihandle set
     res_ahah = wrap_eqcorr2d(antihandle_dict, antihandle_dict,
                              mode=mode, do_smart=do_smart,
-                             hist=True, report_full=False)
+                             hist=True, report_full=False, symmetric=True)
     hist_ahah = res_ahah['hist_total']
 
     # Sum with safe length alignment
@@ -582,22 +1041,262 @@ def get_similarity_hist(handle_dict, antihandle_dict, mode='square_grid', do_sma
     hist_combined[:len(hist_hh)] += np.asarray(hist_hh, dtype=np.int64)
     hist_combined[:len(hist_ahah)] += np.asarray(hist_ahah, dtype=np.int64)
 
-    # Build self-match correction vector and subtract
-    correction = np.zeros(length, dtype=np.int64)
-    for handle in list(handle_dict.values()):
-        # A self pair contributes to the bin equal to its number of non-zeros
-        self_match = np.count_nonzero(handle)
-        correction[self_match] = correction[self_match] + 1
-
-    for antihandle in list(antihandle_dict.values()):
-        self_match = np.count_nonzero(antihandle)
-        correction[self_match] = correction[self_match] + 1
-
-    corrected_result = hist_combined - correction
-
     return {
         'angles': [],                # no per-rotation info for this helper
-        'hist_total': corrected_result,
+        'hist_total': hist_combined,
         'rotations': {},
         'worst_keys_combos': None,
     }
+
+
+def _as_batch_dict(batch):
+    """
+    Converts a (P, n, L) handle tensor into a dictionary of stacked (P, L) arrays (dictionaries are returned as-is).
+    """
+    if isinstance(batch, np.ndarray):
+        if batch.ndim != 3:
+            raise ValueError(f"Handle tensors must have shape (P, n, L), got shape {batch.shape}")
+        return {index: batch[:, index, :] for index in range(batch.shape[1])}
+    return batch
+
+def wrap_eqcorr2d_population(handle_batch, antihandle_batch, mode='classic', hist=True, local_histogram=False,
+                             do_smart=False, num_threads=None, worst_tracking=False, tracked_pairs=None):
+    """
+    Run eqcorr2d on all handle/antihandle pairs of a whole population of candidates in one native call per rotation.
+
+    All candidates must share the same slat geometry (array shapes and occupied positions) and only differ in their
+    handle values, as is the case for the candidates of an evolution run. Rotations, masks and input validation are
+    then only prepared once for the whole population, and the candidates are scored in parallel by the C engine
+    (using OpenMP threads, when the engine was compiled with OpenMP support).
+
+    :param handle_batch: Either a dictionary mapping keys to stacked handle arrays of shape (P, L) or (P, H, W)
+        (one row per candidate), or a single (P, nA, L) array of 1D handles (keys are then 0..nA-1).
+    :type handle_batch: dict[Any, numpy.ndarray] or numpy.ndarray
+    :param antihandle_batch: Same rules as handle_batch, for the antihandles.
+    :type antihandle_batch: dict[Any, numpy.ndarray] or numpy.ndarray
+    :param mode: Rotation mode (``'classic'``, ``'square_grid'`` or ``'triangle_grid'``), as for
+        :func:`wrap_eqcorr2d`. Defaults to ``'classic'``.
+    :type mode: str
+    :param hist: If True, compute a global histogram per candidate. Defaults to True.
+    :type hist: bool
+    :param local_histogram: If True, also compute per-pair histograms per candidate. Defaults to False.
+    :type local_histogram: bool
+    :param do_smart: Heuristic compute saver, as for :func:`wrap_eqcorr2d`. Defaults to False.
+    :type do_smart: bool
+    :param num_threads: Number of threads used by the C engine. Defaults to None (all available cores).
+    :type num_threads: int or None
+    :param worst_tracking: If True, also report the compact worst tracking output of each candidate, as for
+        :func:`wrap_eqcorr2d`. Defaults to False.
+    :type worst_tracking: bool
+    :param tracked_pairs: (handle_key, antihandle_key) pairs whose full histograms are kept when ``worst_tracking``
+        is enabled, shared by all candidates. Defaults to None.
+    :type tracked_pairs: list[tuple] or None
+    :returns: Dictionary containing:
+
+        - ``angles`` (list[int]): Angles computed.
+        - ``hist_total`` (numpy.ndarray or None): (P, hdim) histograms summed over all rotations.
+        - ``local_hist_total`` (numpy.ndarray or None): (P, nA, nB, hdim) per-pair histograms.
+        - ``pair_max`` (numpy.ndarray, if worst_tracking=True): (P, nA, nB) highest match count of each pair.
+        - ``worst_value`` (numpy.ndarray, if worst_tracking=True): (P,) highest match count among the untracked pairs.
+        - ``worst_pairs`` (list, if worst_tracking=True): Per candidate, the (handle indices, antihandle indices,
+          counts) of the untracked pairs reaching its ``worst_value``.
+        - ``tracked_pairs`` (tuple, if worst_tracking=True): (handle indices, antihandle indices) of the tracked pairs.
+        - ``tracked_hist`` (numpy.ndarray, if worst_tracking=True): (P, T, hdim) histograms of the tracked pairs.
+        - ``worst_match`` (numpy.ndarray or None): Highest non-zero histogram bin of each candidate (uncompensated,
+          -1 for an empty histogram).
+        - ``handle_keys`` (list): Handle keys in order.
+        - ``anti_handle_keys`` (list): Antihandle keys in order.
+    :rtype: dict
+
+    .. note::
+        Candidate ``c`` produces exactly the same histograms as ``wrap_eqcorr2d`` run on the arrays of that candidate
+        alone. Bounded, symmetric and full-output modes are not available for populations.
+    """
+
+    def ensure_3d_uint8(arr):
+        arr = np.asarray(arr, dtype=np.uint8)
+        if arr.ndim == 2:
+            arr = arr[:, np.newaxis, :]  # (P, L) -> (P, 1, L)
+        elif arr.ndim != 3:
+            raise ValueError(f"Stacked arrays must have shape (P, L) or (P, H, W), got shape {arr.shape}")
+        return np.ascontiguousarray(arr)
+
+    def rot60_stack(b, k60):
+        # same rotation as wrap_eqcorr2d (rot60_py), applied to all candidates at once
+        if k60 == 0:
+            return b
+        if (b.shape[1] == 1 or b.shape[2] == 1) and k60 == 3:
+            return _rotate_tri60_cached(b, k60)
+        return _rotate_tri60_cached(b, k60, np.any(b != 0, axis=0))
+
+    handle_batch = _as_batch_dict(handle_batch)
+    antihandle_batch = _as_batch_dict(antihandle_batch)
+    handle_keys = list(handle_batch.keys())
+    antihandle_keys = list(antihandle_batch.keys())
+
+    A_list = [ensure_3d_uint8(handle_batch[k]) for k in handle_keys]
+    B_list = [ensure_3d_uint8(antihandle_batch[k]) for k in antihandle_keys]
+
+    A_is2D = np.array([(a.shape[1] >= 2 and a.shape[2] >= 2) for a in A_list], dtype=bool)
+    B_is2D = np.array([(b.shape[1] >= 2 and b.shape[2] >= 2) for b in B_list], dtype=bool)
+
+    mode = (mode or 'square_grid').lower()
+    angles = _rotation_angles(mode, do_smart, bool(A_is2D.any() or B_is2D.any()))
+
+    ones_mask = np.ones((len(A_list), len(B_list)), dtype=np.uint8)
+    quarter_mask = np.logical_or(A_is2D[:, None], B_is2D[None, :]).astype(np.uint8)
+
+    nA, nB = len(A_list), len(B_list)
+    worst_kwargs = {}
+    if worst_tracking:
+        # same merging over rotations as wrap_eqcorr2d, done separately for each candidate
+        P = A_list[0].shape[0] if A_list else 0
+        hdim = max([a.shape[1] * a.shape[2] for a in A_list] + [1]) + 1
+        handle_index = {key: index for index, key in enumerate(handle_keys)}
+        anti_index = {key: index for index, key in enumerate(antihandle_keys)}
+        tracked_keys = np.unique(np.array([handle_index[h] * nB + anti_index[a] for h, a in (tracked_pairs or [])
+                                           if h in handle_index and a in anti_index], dtype=np.int64))
+        tracked_i, tracked_j = np.divmod(tracked_keys, max(nB, 1))
+        worst_kwargs['tracked_pairs'] = np.stack([tracked_i, tracked_j], axis=1)
+        agg_pair_max = np.zeros((P, nA, nB), dtype=np.uint8 if hdim <= 256 else np.uint32)
+        agg_tracked_hist = np.zeros((P, len(tracked_keys), hdim), dtype=np.uint32)
+        worst_values = np.full(P, -1, dtype=np.int64)
+        worst_lists = [[] for _ in range(P)]
+
+    agg_glob_hist = None
+    agg_loc_hist = None
+    for angle in angles:
+        if mode in ('classic', 'square_grid'):
+            k = {0: 0, 90: 1, 180: 2, 270: 3}[angle]
+            B_rot = [b if k == 0 else np.ascontiguousarray(np.rot90(b, k=k, axes=(1, 2))) for b in B_list]
+        else:
+            B_rot = [rot60_stack(b, angle // 60) for b in B_list]
+        mask = ones_mask if angle in (0, 180) or not do_smart else quarter_mask
+
+        glob_hist, loc_hist, worst = eqcorr2d_engine.compute_batch(A_list, B_rot, mask, int(hist), int(local_histogram),
+                                                                   int(worst_tracking), num_threads=int(num_threads or 0),
+                                                                   **worst_kwargs)
+        if worst_tracking:
+            np.maximum(agg_pair_max, worst['pair_max'], out=agg_pair_max)
+            agg_tracked_hist += worst['tracked_hist']
+            offsets = worst['worst_offsets']
+            for candidate in range(P):
+                value = worst['worst_value'][candidate]
+                if value > worst_values[candidate]:
+                    worst_values[candidate], worst_lists[candidate] = value, []
+                if value == worst_values[candidate]:
+                    rows = slice(offsets[candidate], offsets[candidate + 1])
+                    worst_lists[candidate].append((worst['worst_pairs'][rows, 0] * nB + worst['worst_pairs'][rows, 1],
+                                                   worst['worst_counts'][rows]))
+        if hist:
+            agg_glob_hist = glob_hist if agg_glob_hist is None else agg_glob_hist + glob_hist
+        if local_histogram:
+            agg_loc_hist = loc_hist if agg_loc_hist is None else agg_loc_hist + loc_hist
+
+    worst_match = None
+    if agg_glob_hist is not None:
+        occupied = agg_glob_hist > 0
+        worst_match = np.where(occupied.any(axis=1), agg_glob_hist.shape[1] - 1 - np.argmax(occupied[:, ::-1], axis=1), -1)
+
+    results = {
+        'angles': angles,
+        'hist_total': agg_glob_hist,
+        'local_hist_total': agg_loc_hist,
+        'worst_match': worst_match,
+        'handle_keys': handle_keys,
+        'anti_handle_keys': antihandle_keys,
+    }
+    if worst_tracking:
+        worst_pairs = []
+        for lists in worst_lists:
+            # a pair can reach the worst value at several rotations, so its counts are summed
+            keys = np.concatenate([keys for keys, _ in lists]) if lists else np.zeros(0, dtype=np.int64)
+            counts = np.concatenate([counts for _, counts in lists]) if lists else np.zeros(0, dtype=np.uint64)
+            unique_keys, inverse = np.unique(keys, return_inverse=True)
+            summed_counts = np.zeros(len(unique_keys), dtype=np.uint64)
+            np.add.at(summed_counts, inverse, counts.astype(np.uint64))
+            worst_pairs.append(np.divmod(unique_keys, max(nB, 1)) + (summed_counts,))
+        results.update({'pair_max': agg_pair_max, 'worst_value': worst_values, 'worst_pairs': worst_pairs,
+                        'tracked_pairs': (tracked_i, tracked_j), 'tracked_hist': agg_tracked_hist})
+    return results
+
+def population_score_analysis(handle_batch, antihandle_batch, match_counts, connection_graph, connection_angle,
+                              do_worst=False, fudge_dg=10, request_similarity_score=False, num_threads=None):
+    """
+    Batched version of :func:`comprehensive_score_analysis` for a population of candidates sharing the same slat
+    geometry (see :func:`wrap_eqcorr2d_population`). The match histograms of all candidates are computed together,
+    after which each candidate is scored individually.
+
+    :param handle_batch: Dictionary mapping slat identifiers to stacked (P, L) or (P, H, W) handle arrays, or a
+        (P, nA, L) array (see :func:`wrap_eqcorr2d_population`).
+    :type handle_batch: dict[Any, numpy.ndarray] or numpy.ndarray
+    :param antihandle_batch: Same as handle_batch, for the antihandles.
+    :type antihandle_batch: dict[Any, numpy.ndarray] or numpy.ndarray
+    :param match_counts: Dictionary with counts of expected matches due to connections between slats.
+    :type match_counts: dict[int, int]
+    :param connection_graph: Dictionary mapping match types to lists of expected (handle_key, antihandle_key) pairs.
+    :type connection_graph: dict[int, list[tuple]]
+    :param connection_angle: Either '60' or '90' indicating the connection geometry (triangular or square grid).
+    :type connection_angle: str
+    :param do_worst: If True, also return which slat pairs contributed to each candidate's worst match score.
+        Defaults to False.
+    :type do_worst: bool
+    :param fudge_dg: Fudge factor for mean log score computation. Defaults to 10.
+    :type fudge_dg: float
+    :param request_similarity_score: If True, also computes the similarity score of each candidate (this part is
+        not batched). Defaults to False.
+    :type request_similarity_score: bool
+    :param num_threads: Number of threads used by the C engine. Defaults to None (all available cores).
+    :type num_threads: int or None
+    :returns: List with one dictionary per candidate, holding the same entries as
+        :func:`comprehensive_score_analysis` (without any cutoffs applied).
+    :rtype: list[dict]
+    """
+    mode = 'triangle_grid' if connection_angle == '60' else 'square_grid'
+    handle_batch = _as_batch_dict(handle_batch)
+    antihandle_batch = _as_batch_dict(antihandle_batch)
+    # the worst pairs come from the compact worst tracking output, with the connected slat pairs tracked in full
+    tracked_pairs = [pair for match, pairs in connection_graph.items() if match > 1 for pair in pairs] if do_worst else None
+    results = wrap_eqcorr2d_population(handle_batch, antihandle_batch, mode=mode, hist=True, do_smart=True,
+                                       num_threads=num_threads, worst_tracking=do_worst, tracked_pairs=tracked_pairs)
+    hists = results['hist_total']
+    handle_keys, antihandle_keys = results['handle_keys'], results['anti_handle_keys']
+    pair_count = len(handle_keys) * len(antihandle_keys)
+
+    # the expected matches in the design (based on slat connections), as in comprehensive_score_analysis
+    match_counts_histogram = np.zeros(max([hists.shape[1]] + [m + 1 for m in match_counts.keys()]), dtype=np.int64)
+    for match, count in match_counts.items():
+        if match > 1:
+            match_counts_histogram[match] += count
+
+    candidate_scores = []
+    for candidate in range(hists.shape[0]):
+        comp_hist = compensate_histogram(hists[candidate], match_counts_histogram)
+        candidate_results = {'hist_total': comp_hist, 'handle_keys': handle_keys, 'anti_handle_keys': antihandle_keys}
+        if do_worst:
+            candidate_results.update({'worst_value': int(results['worst_value'][candidate]),
+                                      'worst_pairs': results['worst_pairs'][candidate],
+                                      'tracked_pairs': results['tracked_pairs'],
+                                      'tracked_hist': results['tracked_hist'][candidate]})
+        worst_match = get_worst_match(candidate_results)
+        candidate_results['hist_total'] = comp_hist[:worst_match + 1]
+        mean_log_score = np.log(get_sum_score(candidate_results, fudge_dg=fudge_dg) / pair_count) / fudge_dg
+
+        data_dict = {'worst_match_score': worst_match, 'mean_log_score': mean_log_score,
+                     'match_histogram': candidate_results['hist_total'],
+                     'uncompensated_match_histogram': hists[candidate],
+                     'rejected': False}
+        if request_similarity_score or (do_worst and worst_match < candidate_results['worst_value']):
+            handle_dict = {key: np.asarray(handle_batch[key])[candidate] for key in handle_keys}
+            antihandle_dict = {key: np.asarray(antihandle_batch[key])[candidate] for key in antihandle_keys}
+        if request_similarity_score:
+            data_dict['similarity_score'] = get_worst_match(get_similarity_hist(handle_dict, antihandle_dict, mode=mode))
+        if do_worst:
+            if worst_match < candidate_results['worst_value']:
+                # as in comprehensive_score_analysis, only possible if the connection graph does not match the handles
+                candidate_results['local_hist_total'] = wrap_eqcorr2d(handle_dict, antihandle_dict, mode=mode, do_smart=True,
+                                                                      hist=False, local_histogram=True)['local_hist_total']
+            data_dict['worst_slat_combos'] = get_compensated_worst_keys_combos(candidate_results, connection_graph)
+        candidate_scores.append(data_dict)
+
+    return candidate_scores
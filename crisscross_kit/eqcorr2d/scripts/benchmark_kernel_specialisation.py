@@ -0,0 +1,95 @@
+"""
+Benchmarks the specialised eqcorr2d histogram kernels against the generic loop_rot0_mode loop.
+
+Each case is timed twice in a fresh interpreter: once as normal and once with EQCORR2D_GENERIC_KERNEL=1, which makes
+the C engine fall back to the generic loop for every call.  The histograms of both runs are also compared.
+
+Usage: python benchmark_kernel_specialisation.py [--slats 200] [--repeats 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+CASES = ['1x32 hist', '1x32 hist+local', '1x64 hist', 'double-barrel hist', 'double-barrel triangle_grid hist',
+         'mixed 1x32/double-barrel hist+local']
+
+
+def make_arrays(rng, slat_count, shape, library_size=32, density=1.0):
+    arrays = {}
+    for i in range(slat_count):
+        array = rng.integers(1, library_size + 1, shape).astype(np.uint8)
+        arrays[i] = array * (rng.random(shape) < density)
+    return arrays
+
+
+def double_barrel_arrays(rng, slat_count, library_size=32):
+    from eqcorr2d.slat_standardized_mapping import standardized_slat_mappings
+    slat_types = list(standardized_slat_mappings.keys())
+    arrays = {}
+    for i in range(slat_count):
+        footprint = standardized_slat_mappings[slat_types[i % len(slat_types)]] > 0
+        arrays[i] = (rng.integers(1, library_size + 1, footprint.shape) * footprint).astype(np.uint8)
+    return arrays
+
+
+def run_case(case, slat_count, repeats):
+    import time
+    from eqcorr2d.eqcorr2d_interface import wrap_eqcorr2d
+
+    rng = np.random.default_rng(42)
+    mode, local = 'classic', 'local' in case
+    if case.startswith('1x32'):
+        handles, antihandles = make_arrays(rng, slat_count, (32,)), make_arrays(rng, slat_count, (32,))
+    elif case.startswith('1x64'):
+        handles, antihandles = make_arrays(rng, slat_count, (64,), 64), make_arrays(rng, slat_count, (64,), 64)
+    elif case.startswith('double-barrel'):
+        handles, antihandles = double_barrel_arrays(rng, slat_count), double_barrel_arrays(rng, slat_count)
+        mode = 'triangle_grid' if 'triangle_grid' in case else 'square_grid'
+    else:
+        handles = {**make_arrays(rng, slat_count // 2, (32,)),
+                   **{k + slat_count: v for k, v in double_barrel_arrays(rng, slat_count // 2).items()}}
+        antihandles = {**make_arrays(rng, slat_count // 2, (32,)),
+                       **{k + slat_count: v for k, v in double_barrel_arrays(rng, slat_count // 2).items()}}
+        mode = 'triangle_grid'
+
+    kwargs = dict(mode=mode, hist=True, local_histogram=local, value_prefilter=False)
+    result = wrap_eqcorr2d(handles, antihandles, **kwargs)  # warm-up (also fills the rotation caches)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        wrap_eqcorr2d(handles, antihandles, **kwargs)
+        timings.append(time.perf_counter() - start)
+    return {'time': float(np.median(timings)), 'hist': result['hist_total'].tolist()}
+
+
+def run_all(generic, slat_count, repeats):
+    env = dict(os.environ)
+    env['EQCORR2D_GENERIC_KERNEL'] = '1' if generic else '0'
+    output = subprocess.check_output([sys.executable, __file__, '--worker', '--slats', str(slat_count),
+                                      '--repeats', str(repeats)], env=env)
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--slats', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--worker', action='store_true')
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps({case: run_case(case, args.slats, args.repeats) for case in CASES}))
+        sys.exit(0)
+
+    generic = run_all(True, args.slats, args.repeats)
+    specialised = run_all(False, args.slats, args.repeats)
+
+    print(f'{args.slats} handle and {args.slats} antihandle slats, median of {args.repeats} runs')
+    print(f'{"case":<40}{"generic (s)":>14}{"specialised (s)":>18}{"speedup":>10}  identical')
+    for case in CASES:
+        g, s = generic[case], specialised[case]
+        print(f'{case:<40}{g["time"]:>14.4f}{s["time"]:>18.4f}{g["time"] / s["time"]:>9.2f}x  {g["hist"] == s["hist"]}')
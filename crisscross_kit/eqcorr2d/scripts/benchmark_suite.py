@@ -0,0 +1,296 @@
+"""
+Benchmark suite for the eqcorr2d engine and the scoring/evolution code built on top of it.
+
+Three groups of cases are timed:
+- wrap: wrap_eqcorr2d on synthetic handle/antihandle sets, for square and triangle grids, tube (1x32), double-barrel
+  and mixed slats, 32/64 handle libraries and the hist/local/full output modes.
+- score: comprehensive_score_analysis (with do_worst) on tiled square megastructures with random handles, also in
+  bounded mode with cutoffs that the design passes ('bounded') or fails ('rejected').
+- evolve: one EvolveManager.single_evolution_step on the same megastructures.
+
+Each case records the median and minimum of its timed runs and a checksum of its output.  Results can be saved to
+a JSON baseline and later compared against it: cases slower than the baseline by more than the threshold, or whose
+outputs changed, are flagged and the script exits with status 1 (so it can be used as a regression gate).
+
+Usage:
+    python benchmark_suite.py --preset quick --save baseline.json
+    python benchmark_suite.py --preset quick --compare baseline.json [--threshold 0.15]
+    python benchmark_suite.py --list --preset full
+    python benchmark_suite.py --filter wrap/triangle_grid --compare baseline.json
+
+Baselines are only comparable when recorded on the same machine and build (see the metadata stored in each file).
+"""
+import argparse
+import copy
+import datetime
+import hashlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# slat counts (handles + antihandles) for each preset
+PRESETS = {'quick': (100, 500), 'standard': (100, 500, 1000, 2000), 'full': (100, 500, 1000, 2000, 5000)}
+# the local and full outputs grow with the number of slat pairs, so these modes are capped to keep memory reasonable
+MODE_SLAT_LIMITS = {'hist': None, 'local': 2000, 'full': 500}
+# the design-level cases are slower, so only a subset of the sizes is used (64 slats per 32x32 tile)
+DESIGN_TILES = {100: 1, 500: 3, 1000: 4, 2000: 6, 5000: 9}
+
+
+def make_slat_arrays(rng, slat_count, slat_mix='tube', library_size=32, prefix='slat'):
+    """
+    Generates a synthetic set of slat handle arrays.
+    :param rng: numpy random generator
+    :param slat_count: Number of slats to generate
+    :param slat_mix: 'tube' (1x32 slats), 'double_barrel' (standardized double-barrel footprints) or 'mixed' (half each)
+    :param library_size: Number of unique handle sequences
+    :param prefix: Prefix for the slat keys
+    :return: Dictionary of slat key to uint8 handle array
+    """
+    from eqcorr2d.slat_standardized_mapping import standardized_slat_mappings
+
+    footprints = [standardized_slat_mappings[slat_type] > 0 for slat_type in standardized_slat_mappings]
+    slats = {}
+    for i in range(slat_count):
+        if slat_mix == 'tube' or (slat_mix == 'mixed' and i % 2 == 0):
+            footprint = np.ones(32, dtype=bool)
+        elif slat_mix in ('double_barrel', 'mixed'):
+            footprint = footprints[i % len(footprints)]
+        else:
+            raise ValueError(f'Unknown slat mix {slat_mix}.')
+        slats[f'{prefix}{i + 1}'] = (rng.integers(1, library_size + 1, footprint.shape) * footprint).astype(np.uint8)
+    return slats
+
+
+def make_tiled_square_design(tiles, library_size=32, seed=8):
+    """
+    Generates a two-layer square megastructure made of tiles x tiles standard 32x32 crisscross squares (64 slats each),
+    with random assembly handles.
+    :param tiles: Number of tiles along each side of the design
+    :param library_size: Number of unique handle sequences
+    :param seed: Random seed for the handles
+    :return: Megastructure object
+    """
+    from crisscross.core_functions.megastructures import Megastructure
+    from crisscross.slat_handle_match_evolver import generate_random_slat_handles
+
+    slat_array = np.zeros((32 * tiles, 32 * tiles, 2))
+    for tile in range(tiles * tiles):
+        row, col = divmod(tile, tiles)
+        for i in range(32):
+            slat_array[row * 32 + i, col * 32:(col + 1) * 32, 0] = tile * 32 + i + 1
+            slat_array[row * 32:(row + 1) * 32, col * 32 + i, 1] = tile * 32 + i + 1
+
+    np.random.seed(seed)
+    megastructure = Megastructure(slat_array)
+    megastructure.assign_assembly_handles(generate_random_slat_handles(slat_array, library_size))
+    return megastructure
+
+
+def build_cases(preset):
+    """
+    Lists the benchmark cases of a preset, as dictionaries with a unique 'name' and the case parameters.
+    """
+    cases = []
+    for slat_count in PRESETS[preset]:
+        for grid in ('square_grid', 'triangle_grid'):
+            for slat_mix in ('tube', 'double_barrel', 'mixed'):
+                for library_size in (32, 64):
+                    for mode, limit in MODE_SLAT_LIMITS.items():
+                        if (limit is not None and slat_count > limit) or (mode != 'hist' and library_size != 32):
+                            continue
+                        cases.append({'name': f'wrap/{grid}/{slat_mix}/lib{library_size}/{mode}/n{slat_count}',
+                                      'group': 'wrap', 'grid': grid, 'slat_mix': slat_mix,
+                                      'library_size': library_size, 'mode': mode, 'slats': slat_count})
+        tiles = DESIGN_TILES[slat_count]
+        for library_size in (32, 64):
+            cases.append({'name': f'score/square_grid/lib{library_size}/n{64 * tiles * tiles}', 'group': 'score',
+                          'tiles': tiles, 'library_size': library_size, 'bound': None})
+        for bound in ('bounded', 'rejected'):
+            cases.append({'name': f'score/square_grid/lib32/{bound}/n{64 * tiles * tiles}', 'group': 'score',
+                          'tiles': tiles, 'library_size': 32, 'bound': bound})
+        cases.append({'name': f'evolve/square_grid/lib32/n{64 * tiles * tiles}', 'group': 'evolve', 'tiles': tiles,
+                      'library_size': 32})
+    return cases
+
+
+def _checksum(*arrays):
+    hasher = hashlib.sha1()
+    for array in arrays:
+        hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()[:16]
+
+
+def prepare_case(case):
+    """
+    Builds the inputs of a case and returns a (run function, checksum function) tuple.  Only the run function is
+    timed; the checksum function summarises its output.
+    """
+    if case['group'] == 'wrap':
+        from eqcorr2d.eqcorr2d_interface import wrap_eqcorr2d
+
+        rng = np.random.default_rng(42)
+        handles = make_slat_arrays(rng, case['slats'] // 2, case['slat_mix'], case['library_size'], 'handle')
+        antihandles = make_slat_arrays(rng, case['slats'] // 2, case['slat_mix'], case['library_size'], 'antihandle')
+        kwargs = dict(mode=case['grid'], do_smart=True, hist=True, local_histogram=case['mode'] == 'local',
+                      report_full=case['mode'] == 'full')
+
+        def run():
+            return wrap_eqcorr2d(handles, antihandles, **kwargs)
+
+        def checksum(result):
+            if case['mode'] == 'local':
+                return _checksum(result['hist_total'], result['local_hist_total'].sum(axis=2))
+            return _checksum(result['hist_total'])
+        return run, checksum
+
+    megastructure = make_tiled_square_design(case['tiles'], case['library_size'])
+    if case['group'] == 'score':
+        from eqcorr2d.eqcorr2d_interface import comprehensive_score_analysis
+
+        handles, antihandles = megastructure.get_bag_of_slat_handles(remove_blank_slats=True)
+        match_counts, connection_graph = megastructure.get_slat_match_counts()
+        cutoffs = {}
+        if case['bound'] is not None:
+            # cutoffs just above the design's own scores (never reached) or just below its worst match (rejected)
+            scores = comprehensive_score_analysis(handles, antihandles, match_counts, connection_graph,
+                                                  megastructure.connection_angle, request_similarity_score=False)
+            if case['bound'] == 'bounded':
+                cutoffs = {'worst_match_cutoff': scores['worst_match_score'],
+                           'mean_log_score_cutoff': scores['mean_log_score'] + 0.1}
+            else:
+                cutoffs = {'worst_match_cutoff': scores['worst_match_score'] - 1}
+
+        def run():
+            return comprehensive_score_analysis(handles, antihandles, match_counts, connection_graph,
+                                                megastructure.connection_angle, do_worst=True, **cutoffs)
+
+        def checksum(result):
+            return _checksum(result['match_histogram'], np.array([result.get('similarity_score', -1),
+                                                                  len(result['worst_slat_combos']),
+                                                                  result['rejected']]))
+        return run, checksum
+
+    from crisscross.slat_handle_match_evolver.handle_evolution import EvolveManager
+
+    def run():
+        # a fresh manager (and design, which the manager edits in place) per run, so every timed step starts from the
+        # same population
+        manager = EvolveManager(copy.deepcopy(megastructure), unique_handle_sequences=case['library_size'], evolution_population=8,
+                                generational_survivors=2, mutation_rate=2, process_count=1, random_seed=8,
+                                similarity_score_calculation_frequency=1)
+        try:
+            start = time.perf_counter()
+            manager.single_evolution_step()
+            return manager, time.perf_counter() - start
+        finally:
+            manager.terminate_pool()
+
+    def checksum(result):
+        manager, _ = result
+        return _checksum(np.array(manager.metrics['Corresponding Max Parasitic Valency']),
+                         np.array(manager.metrics['Best Effective Parasitic Valency']))
+    return run, checksum
+
+
+def time_case(case, repeats, max_time):
+    """
+    Times a case: one warm-up run, then up to `repeats` timed runs (stopping early once `max_time` seconds have been
+    spent, after at least one run).
+    """
+    run, checksum = prepare_case(case)
+    output_checksum = checksum(run())  # outputs are dropped straight away, as the full mode ones can be large
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < repeats and (len(timings) == 0 or time.perf_counter() - start < max_time):
+        run_start = time.perf_counter()
+        output = run()
+        if case['group'] == 'evolve':
+            timings.append(output[1])  # only the evolution step itself (the manager set-up is excluded)
+        else:
+            timings.append(time.perf_counter() - run_start)
+        del output
+    return {'median': float(np.median(timings)), 'min': float(np.min(timings)), 'runs': len(timings),
+            'checksum': output_checksum}
+
+
+def collect_metadata(preset):
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                         cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'date': datetime.datetime.now().isoformat(timespec='seconds'), 'preset': preset, 'git_commit': commit,
+            'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(), 'cpu_count': os.cpu_count(),
+            'generic_kernel': os.environ.get('EQCORR2D_GENERIC_KERNEL', '0')}
+
+
+def compare_results(baseline, current, threshold):
+    """
+    Prints a comparison report of the current results against a baseline.
+    :return: Number of regressions (slower than the threshold allows, or changed outputs)
+    """
+    print(f'\nBaseline: {baseline["metadata"].get("date")} (commit {baseline["metadata"].get("git_commit")}, '
+          f'{baseline["metadata"].get("processor")})')
+    print(f'{"case":<52}{"baseline (s)":>14}{"current (s)":>14}{"ratio":>8}  status')
+    regressions = 0
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            print(f'{name:<52}{"-":>14}{result["median"]:>14.4f}{"-":>8}  new')
+            continue
+        reference = baseline['results'][name]
+        ratio = result['median'] / reference['median'] if reference['median'] > 0 else float('inf')
+        if result['checksum'] != reference['checksum']:
+            status, regressions = 'OUTPUT CHANGED', regressions + 1
+        elif ratio > 1 + threshold:
+            status, regressions = 'REGRESSION', regressions + 1
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        else:
+            status = 'ok'
+        print(f'{name:<52}{reference["median"]:>14.4f}{result["median"]:>14.4f}{ratio:>7.2f}x  {status}')
+    missing = [name for name in baseline['results'] if name not in current['results']]
+    if missing:
+        print(f'{len(missing)} baseline cases were not run.')
+    print(f'\n{regressions} regression(s) at a {threshold:.0%} threshold.')
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--filter', default=None, help='Only run cases whose name contains this string.')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--max_time', type=float, default=10.0, help='Time budget (s) for the timed runs of a case.')
+    parser.add_argument('--save', default=None, help='Save the results to this JSON file.')
+    parser.add_argument('--compare', default=None, help='Compare the results against this JSON baseline.')
+    parser.add_argument('--threshold', type=float, default=0.15, help='Allowed slowdown before flagging a regression.')
+    parser.add_argument('--list', action='store_true', help='Only list the selected cases.')
+    args = parser.parse_args()
+
+    cases = [case for case in build_cases(args.preset) if args.filter is None or args.filter in case['name']]
+    if args.list:
+        print('\n'.join(case['name'] for case in cases))
+        sys.exit(0)
+
+    results = {'metadata': collect_metadata(args.preset), 'results': {}}
+    for case in cases:
+        results['results'][case['name']] = time_case(case, args.repeats, args.max_time)
+        result = results['results'][case['name']]
+        print(f'{case["name"]:<52}{result["median"]:>10.4f} s  (min {result["min"]:.4f} s, {result["runs"]} runs)',
+              flush=True)
+
+    if args.save is not None:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'Results saved to {args.save}.')
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare_results(baseline, results, args.threshold) > 0 else 0)
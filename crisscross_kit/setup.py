@@ -130,6 +130,24 @@ else:
     extra_compile_args = ["-O3", "-mtune=generic", "-funroll-loops", "-ffast-math"]
     extra_link_args = []
 
+# Optional machine-specific build (EQCORR2D_NATIVE_BUILD=1 pip install -e .) for local installs only: lets the
+# compiler use every instruction set of the build machine.  The resulting binary may not run on other CPUs, so
+# this must never be enabled for wheels.  Default builds still get AVX2 versions of the hot eqcorr2d kernels on
+# x86-64 Linux, selected at runtime (see EQ_CPU_DISPATCH in eqcorr2d.h).
+if os.environ.get("EQCORR2D_NATIVE_BUILD", "0") not in ("", "0"):
+    if platform.system() == "Windows" and "/O2" in extra_compile_args:
+        extra_compile_args = [arg for arg in extra_compile_args if not arg.startswith("/arch:")] + ["/arch:AVX2"]
+    elif "-march=native" not in extra_compile_args:
+        extra_compile_args = [arg for arg in extra_compile_args if arg != "-mtune=generic"] + ["-march=native"]
+
+# OpenMP (multithreaded population scoring in compute_batch).  Apple clang ships without OpenMP, so macOS builds
+# stay single-threaded (the C code only uses OpenMP when _OPENMP is defined).
+if sys.platform.startswith("linux"):
+    extra_compile_args += ["-fopenmp"]
+    extra_link_args += ["-fopenmp"]
+elif platform.system() == "Windows" and "/O2" in extra_compile_args:
+    extra_compile_args += ["/openmp"]
+
 
 # -----------------------------------------------------------------------------
 # Extension module definition
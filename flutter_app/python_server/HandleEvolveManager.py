@@ -3,8 +3,15 @@ from crisscross.slat_handle_match_evolver.handle_evolution import EvolveManager
 from server_architecture import hamming_evolve_communication_pb2_grpc, hamming_evolve_communication_pb2
 from crisscross.core_functions.megastructures import Megastructure, HandleLinkManager
 from crisscross.core_functions.slats import Slat
+from evolution_jobs import EvolutionJob, CoreBudgetScheduler, DEFAULT_JOB_ID
+import grpc
 import threading
 import time
+import zlib
+import os
+
+# evolved handle arrays are archived here (per design geometry) to warm-start repeat evolutions of the same design
+DEFAULT_ELITE_ARCHIVE_DIRECTORY = os.path.join(os.path.expanduser('~'), '.hashcad', 'evolution_archive')
 
 
 def proto_to_numpy(proto_layers):
@@ -20,6 +27,40 @@ def proto_to_numpy(proto_layers):
     return np.array(array_3d, dtype=np.int32)  # Convert to NumPy array
 
 
+def packed_to_numpy(packed_array):
+    """
+    Convert a PackedArray message into a NumPy array.
+    Uncompressed buffers are wrapped without copying, so the output is read-only.
+    """
+    data = packed_array.data
+    if packed_array.compression == 'zlib':
+        data = zlib.decompress(data)
+    elif packed_array.compression:
+        raise ValueError(f'Unsupported PackedArray compression: {packed_array.compression}')
+    return np.frombuffer(data, dtype=np.dtype(packed_array.dtype)).reshape(tuple(packed_array.shape))
+
+
+def numpy_to_packed(array, compress=False):
+    """Convert a NumPy array into a PackedArray message (optionally zlib-compressed)"""
+    array = np.ascontiguousarray(array)
+    data = array.tobytes()
+    if compress:
+        data = zlib.compress(data, 1)  # handle arrays are mostly zeros, so even the fastest level compresses well
+    return hamming_evolve_communication_pb2.PackedArray(dtype=array.dtype.str, shape=array.shape, data=data,
+                                                        compression='zlib' if compress else '')
+
+
+def numpy_to_proto(array):
+    """Convert a 3D NumPy array into the nested Layer3D format"""
+    return [
+        hamming_evolve_communication_pb2.Layer3D(layers=[
+            hamming_evolve_communication_pb2.Layer2D(rows=[
+                hamming_evolve_communication_pb2.Layer1D(values=row.tolist()) for row in layer
+            ])
+        ]) for layer in array
+    ]
+
+
 def convert_string_to_float_if_numeric(value):
     try:
         return float(value) if value.replace(".", "", 1).isdigit() else value
@@ -97,131 +138,282 @@ def add_phantom_slats_to_megastructure(megastructure, phantom_slats):
     # update original phantom slat array TODO: this is a bit janky, probs best to introduce a real function...
     megastructure.original_phantom_array =  megastructure.generate_slat_occupancy_grid(category='phantom_slats')
 
+def request_to_evolve_manager(request, process_count):
+    """
+    Builds the megastructure described in an EvolveRequest and prepares its EvolveManager.
+    """
+    # packed arrays are preferred if provided, as they are much faster to decode
+    if request.HasField('slatArrayPacked'):
+        slat_array = packed_to_numpy(request.slatArrayPacked).astype(np.int32)
+    else:
+        slat_array = proto_to_numpy(request.slatArray)
+    if request.HasField('handleArrayPacked'):
+        initial_handle_array = packed_to_numpy(request.handleArrayPacked).astype(np.int32)
+    else:
+        initial_handle_array = proto_to_numpy(request.handleArray)
+
+    # since Dart system has a flipped x/y representation, need to flip them here first
+    slat_array = np.transpose(slat_array, (1, 0, 2))
+    if initial_handle_array.size == 0 or np.sum(initial_handle_array) == 0:
+        initial_handle_array = None
+    else:
+        initial_handle_array = np.transpose(initial_handle_array, (1, 0, 2))
+
+    converted_dict = {key: convert_string_to_float_if_numeric(value) for key, value in dict(request.parameters).items()}
+    converted_dict['process_count'] = process_count  # the job's core budget always overrides the client's setting
+    converted_dict.setdefault('elite_archive_directory', DEFAULT_ELITE_ARCHIVE_DIRECTORY)
+
+    # I probably should have used a consistent naming scheme everywhere....
+    slat_types_dart = dict(request.slatTypes)
+    slat_coordinates_dart = coordinate_map_to_tuples(request.coordinateMap)
+
+    slat_types_python = {}
+    slat_coordinates_python = {}
+    for s_key, s_value in slat_types_dart.items():
+        layer, slat_int_id = s_key.split('-I')
+        slat_types_python[(int(layer), int(slat_int_id))] = s_value
+
+    for s_key, s_value in slat_coordinates_dart.items():
+        layer, slat_int_id = s_key.split('-I')
+        slat_coordinates_python[(int(layer), int(slat_int_id))] = s_value
+
+    main_megastructure = Megastructure(slat_array=slat_array,
+                                       slat_coordinate_dict=slat_coordinates_python,
+                                       slat_type_dict=slat_types_python,
+                                       connection_angle=request.connectionAngle)
+
+    # Extract link manager and phantom slats from proto
+    link_manager, phantom_slats = proto_handle_links_to_structures(request.handleLinks)
+
+    # Add phantom slats AFTER megastructure creation
+    add_phantom_slats_to_megastructure(main_megastructure, phantom_slats)
+
+    # Apply link manager
+    main_megastructure.link_manager = link_manager
+
+    if initial_handle_array is not None:
+        main_megastructure.enforce_phantom_links_on_assembly_handle_array(initial_handle_array)
+        main_megastructure.assign_assembly_handles(initial_handle_array)
+
+    return EvolveManager(main_megastructure, **converted_dict)
+
+
 class HandleEvolveService(hamming_evolve_communication_pb2_grpc.HandleEvolveServicer):
-    def __init__(self):
-        self.pause_signal = False
-        self.evolve_manager = None
-        self._pause_deadline = None
-        self._pause_timer = None
+    def __init__(self, total_cores=None, pause_timeout=120.0, queue_update_interval=2.0):
+        """
+        Evolution service managing several concurrent evolution jobs (keyed by the job ID sent by each client).
+        :param total_cores: Number of cores to share between all jobs (defaults to 67% of the machine's cores)
+        :param pause_timeout: Time (in seconds) after which a paused (or disconnected) job's worker pool is shut down and its cores are released
+        :param queue_update_interval: Time (in seconds) between progress updates sent to clients waiting in the queue
+        """
+        self.jobs = {}
+        self._jobs_lock = threading.Lock()
+        self.scheduler = CoreBudgetScheduler(total_cores)
+        self.pause_timeout = pause_timeout
+        self.queue_update_interval = queue_update_interval
+
+    def _get_job(self, job_id, create=False):
+        job_id = job_id or DEFAULT_JOB_ID
+        with self._jobs_lock:
+            if job_id not in self.jobs and create:
+                self.jobs[job_id] = EvolutionJob(job_id)
+            return self.jobs.get(job_id)
+
+    def _remove_job(self, job):
+        job.stop_signal = True
+        job.cancel_pause_timer()
+        if job.streaming:
+            # the attached stream is still computing with the job's cores, so it shuts down the pool, hands back the
+            # cores and removes the job itself once its current generation (or queue wait) completes
+            return
+        if job.evolve_manager is not None:
+            job.evolve_manager.terminate_pool()
+        self.scheduler.release(job.job_id)
+        self._forget_job(job)
+
+    def _forget_job(self, job):
+        with self._jobs_lock:
+            if self.jobs.get(job.job_id) is job:
+                del self.jobs[job.job_id]
+
+    def _job_state(self, job):
+        if job.job_id in self.scheduler.queue:
+            return 'queued'
+        if job.streaming:
+            return 'running'
+        if job.completed:
+            return 'complete'
+        if job.evolve_manager is not None:
+            return 'paused'
+        return 'idle'
+
+    @staticmethod
+    def _best_array_delta(job):
+        """
+        Prepares the changes to the best handle array since the last update sent to the client.
+        Returns None if nothing changed.
+        """
+        # since Dart system has a flipped x/y representation, need to flip handle array back here before sending
+        current_array = np.transpose(job.evolve_manager.handle_array, (1, 0, 2)).astype(np.int32)
+        if job.last_streamed_array is None or job.last_streamed_array.shape != current_array.shape:
+            job.last_streamed_array = current_array
+            return hamming_evolve_communication_pb2.HandleArrayDelta(isFullSnapshot=True,
+                                                                     fullArray=numpy_to_packed(current_array, compress=True))
+        changed_positions = np.argwhere(current_array != job.last_streamed_array)
+        if len(changed_positions) == 0:
+            return None
+        job.last_streamed_array = current_array
+        return hamming_evolve_communication_pb2.HandleArrayDelta(isFullSnapshot=False,
+                                                                 positions=numpy_to_packed(changed_positions.astype(np.int32)),
+                                                                 values=numpy_to_packed(current_array[tuple(changed_positions.T)]))
 
     def evolveQuery(self, request, context):
-        print('INITIATING ASSEMBLY HANDLE EVOLUTION')
-        self.pause_signal = False
+        job = self._get_job(request.jobId, create=True)
+        if job.streaming:
+            context.abort(grpc.StatusCode.FAILED_PRECONDITION, f'Evolution job {job.job_id} is already running.')
+
+        print(f'INITIATING ASSEMBLY HANDLE EVOLUTION (JOB {job.job_id})')
+        job.streaming = True
+        job.pause_signal = False
+        job.stop_signal = False
+        job.cancel_pause_timer()
+        job.last_streamed_array = None  # a new stream always starts with a full snapshot
         is_complete = False
-        if self.evolve_manager is None:
-            # since Dart system has a flipped x/y representation, need to flip them here first
-            slat_array = np.transpose(proto_to_numpy(request.slatArray), (1, 0, 2))
-            initial_handle_array = np.transpose(proto_to_numpy(request.handleArray), (1, 0, 2))
-            if np.sum(initial_handle_array) == 0:
-                initial_handle_array = None
-
-            converted_dict = {key: convert_string_to_float_if_numeric(value) for key, value in dict(request.parameters).items()}
-
-            # I probably should have used a consistent naming scheme everywhere....
-            slat_types_dart = dict(request.slatTypes)
-            slat_coordinates_dart = coordinate_map_to_tuples(request.coordinateMap)
-
-            slat_types_python = {}
-            slat_coordinates_python = {}
-            for s_key, s_value in slat_types_dart.items():
-                layer, slat_int_id = s_key.split('-I')
-                slat_types_python[(int(layer), int(slat_int_id))] = s_value
-
-            for s_key, s_value in slat_coordinates_dart.items():
-                layer, slat_int_id = s_key.split('-I')
-                slat_coordinates_python[(int(layer), int(slat_int_id))] = s_value
 
-            main_megastructure = Megastructure(slat_array=slat_array,
-                                               slat_coordinate_dict=slat_coordinates_python,
-                                               slat_type_dict=slat_types_python,
-                                               connection_angle=request.connectionAngle)
-
-            # Extract link manager and phantom slats from proto
-            link_manager, phantom_slats = proto_handle_links_to_structures(request.handleLinks)
-
-            # Add phantom slats AFTER megastructure creation
-            add_phantom_slats_to_megastructure(main_megastructure, phantom_slats)
-
-            # Apply link manager
-            main_megastructure.link_manager = link_manager
-
-            if initial_handle_array is not None:
-                main_megastructure.enforce_phantom_links_on_assembly_handle_array(initial_handle_array)
-                main_megastructure.assign_assembly_handles(initial_handle_array)
-
-            self.evolve_manager = EvolveManager(main_megastructure, **converted_dict)
+        try:
+            # waits for a core budget, letting the client know its position in the queue in the meantime
+            requested_cores = request.parameters.get('process_count')
+            requested_cores = int(float(requested_cores)) if requested_cores else None
+            if job.evolve_manager is not None and job.job_id in self.scheduler.allocations:
+                core_budget = self.scheduler.allocations[job.job_id]
+            else:
+                while True:
+                    core_budget = self.scheduler.acquire(job.job_id, requested_cores, timeout=self.queue_update_interval)
+                    if core_budget > 0:
+                        break
+                    if job.pause_signal or job.stop_signal or not context.is_active():
+                        self.scheduler.release(job.job_id)
+                        return
+                    yield hamming_evolve_communication_pb2.ProgressUpdate(jobId=job.job_id, isQueued=True,
+                                                                          queuePosition=self.scheduler.queue_position(job.job_id))
+
+            print(f'JOB {job.job_id} ALLOCATED {core_budget} CORES')
+            if job.evolve_manager is None:
+                job.evolve_manager = request_to_evolve_manager(request, core_budget)
+            elif job.evolve_manager.num_processes != core_budget:
+                # the job's pool was shut down during a long pause, so it can restart with its new budget
+                job.evolve_manager.terminate_pool()
+                job.evolve_manager.num_processes = core_budget
+
+            evolve_manager = job.evolve_manager
+            for generation in range(evolve_manager.current_generation, evolve_manager.max_evolution_generations):
+                if job.pause_signal or job.stop_signal:
+                    break
+                evolve_manager.single_evolution_step()
 
-        for generation in range(self.evolve_manager.current_generation, self.evolve_manager.max_evolution_generations):
-            if self.pause_signal:
-                break
-            self.evolve_manager.single_evolution_step()
+                print(f"Yielding generation {generation} (job {job.job_id}) - Max Valency: {evolve_manager.metrics['Corresponding Max Parasitic Valency'][-1]}")
 
-            print(f"Yielding generation {generation} - Max Valency: {self.evolve_manager.metrics['Corresponding Max Parasitic Valency'][-1]}")
+                if len(evolve_manager.metrics) > 0:
+                    if min(evolve_manager.metrics['Corresponding Max Parasitic Valency']) <= evolve_manager.early_max_valency_stop:
+                        is_complete = True
 
-            if len(self.evolve_manager.metrics) > 0:
-                if min(self.evolve_manager.metrics['Corresponding Max Parasitic Valency']) <= self.evolve_manager.early_max_valency_stop:
+                if generation == evolve_manager.max_evolution_generations-1:
                     is_complete = True
 
-            if generation == self.evolve_manager.max_evolution_generations-1:
-                is_complete = True
-
-            yield hamming_evolve_communication_pb2.ProgressUpdate(hamming=self.evolve_manager.metrics['Corresponding Max Parasitic Valency'][-1],
-                                                                  physics=self.evolve_manager.metrics['Best Effective Parasitic Valency'][-1],
-                                                                  isComplete=is_complete)
-
-
-            if len(self.evolve_manager.metrics) > 0:
-                if min(self.evolve_manager.metrics['Corresponding Max Parasitic Valency']) <= self.evolve_manager.early_max_valency_stop:
-                    break
-
-    def _schedule_pause_timeout(self, seconds = 120.0):
+                best_array_delta = self._best_array_delta(job) if request.streamBestArray else None
+
+                yield hamming_evolve_communication_pb2.ProgressUpdate(hamming=evolve_manager.metrics['Corresponding Max Parasitic Valency'][-1],
+                                                                      physics=evolve_manager.metrics['Best Effective Parasitic Valency'][-1],
+                                                                      isComplete=is_complete,
+                                                                      bestArrayDelta=best_array_delta,
+                                                                      jobId=job.job_id,
+                                                                      coreBudget=core_budget,
+                                                                      stageTimings=evolve_manager.latest_stage_timings())
+
+                if len(evolve_manager.metrics) > 0:
+                    if min(evolve_manager.metrics['Corresponding Max Parasitic Valency']) <= evolve_manager.early_max_valency_stop:
+                        break
+        finally:
+            job.streaming = False
+            if job.evolve_manager is None or job.stop_signal or is_complete:
+                # jobs that never started (e.g. invalid request), were stopped or are finished hand their cores to
+                # queued jobs right away (finished jobs keep their results for export/stop requests)
+                if job.evolve_manager is not None:
+                    job.completed = is_complete
+                    job.evolve_manager.terminate_pool()
+                self.scheduler.release(job.job_id)
+                if job.stop_signal:
+                    # a stop request arrived while this stream was running
+                    self._forget_job(job)
+            else:
+                # paused, disconnected or failed mid-run: the pool is kept for a quick resume, but the cores are
+                # handed back if the job is not resumed within the pause timeout
+                self._schedule_pause_timeout(job)
+
+    def _schedule_pause_timeout(self, job):
         # Cancel any previous timer
-        if self._pause_timer is not None:
-            try:
-                self._pause_timer.cancel()
-            except Exception:
-                pass
-            self._pause_timer = None
-
-        self._pause_deadline = time.monotonic() + seconds
+        job.cancel_pause_timer()
 
         def _on_timeout():
-            # Only kill the pool if we are still paused at the deadline
-            if self.pause_signal and self.evolve_manager is not None:
+            # Only kill the pool (and free up the job's cores for others) if no stream has resumed the job by the deadline
+            if not job.streaming and job.evolve_manager is not None:
                 try:
-                    self.evolve_manager.terminate_pool()
-                    print('TERMINATED SPAWN POOL DUE TO LONG PAUSE')
+                    job.evolve_manager.terminate_pool()
+                    self.scheduler.release(job.job_id)
+                    print(f'TERMINATED SPAWN POOL OF JOB {job.job_id} DUE TO LONG PAUSE OR DISCONNECT')
                 except Exception:
                     pass
 
-        t = threading.Timer(seconds, _on_timeout)
+        t = threading.Timer(self.pause_timeout, _on_timeout)
         t.daemon = True
         t.start()
-        self._pause_timer = t
+        job.pause_timer = t
 
     def PauseProcessing(self, request, context):
-        self.pause_signal = True
-        print('PAUSE TOGGLED')
-        self._schedule_pause_timeout(120.0)
-        return hamming_evolve_communication_pb2.PauseRequest()
+        job = self._get_job(request.jobId)
+        if job is not None:
+            job.pause_signal = True
+            print(f'PAUSE TOGGLED (JOB {job.job_id})')
+            self._schedule_pause_timeout(job)
+        return hamming_evolve_communication_pb2.PauseRequest(jobId=request.jobId)
 
     def StopProcessing(self, request, context):
-        self.pause_signal = True
-        print('RECEIVED STOP REQUEST')
+        job = self._get_job(request.jobId)
+        print(f'RECEIVED STOP REQUEST (JOB {request.jobId or DEFAULT_JOB_ID})')
+        if job is None or job.evolve_manager is None:
+            if job is not None:  # still queued
+                self._remove_job(job)
+            context.abort(grpc.StatusCode.NOT_FOUND, f'No evolution results available for job {request.jobId or DEFAULT_JOB_ID}.')
         # Convert NumPy array to protobuf format
         # since Dart system has a flipped x/y representation, need to flip handle array back here before sending
-        handleArray = [
-            hamming_evolve_communication_pb2.Layer3D(layers=[
-                hamming_evolve_communication_pb2.Layer2D(rows=[
-                    hamming_evolve_communication_pb2.Layer1D(values=row.tolist()) for row in layer
-                ])
-            ]) for layer in np.transpose(self.evolve_manager.handle_array, (1, 0, 2))
-        ]
-        self.evolve_manager.terminate_pool()
-        self.evolve_manager = None
-        return hamming_evolve_communication_pb2.FinalResponse(handleArray=handleArray)
+        final_array = np.transpose(job.evolve_manager.handle_array, (1, 0, 2))
+        if request.packedResponse:
+            response = hamming_evolve_communication_pb2.FinalResponse(handleArrayPacked=numpy_to_packed(final_array.astype(np.int32), compress=True))
+        else:
+            response = hamming_evolve_communication_pb2.FinalResponse(handleArray=numpy_to_proto(final_array))
+        try:
+            job.evolve_manager.save_to_elite_archive()
+        except Exception as e:  # archiving should never prevent the client from receiving its results
+            print(f'Could not update the elite archive: {e}')
+        self._remove_job(job)
+        return response
 
     def requestExport(self, request, context):
-        print('RECEIVED EXPORT REQUEST')
-        self.evolve_manager.export_results(request.folderPath, parameter_export=True)
+        job = self._get_job(request.jobId)
+        print(f'RECEIVED EXPORT REQUEST (JOB {request.jobId or DEFAULT_JOB_ID})')
+        if job is None or job.evolve_manager is None:
+            context.abort(grpc.StatusCode.NOT_FOUND, f'No evolution results available for job {request.jobId or DEFAULT_JOB_ID}.')
+        job.evolve_manager.export_results(request.folderPath, parameter_export=True)
         return hamming_evolve_communication_pb2.ExportResponse()
+
+    def listJobs(self, request, context):
+        with self._jobs_lock:
+            jobs = list(self.jobs.values())
+        return hamming_evolve_communication_pb2.JobListResponse(
+            jobs=[hamming_evolve_communication_pb2.JobStatus(jobId=job.job_id,
+                                                             state=self._job_state(job),
+                                                             coreBudget=self.scheduler.allocations.get(job.job_id, 0),
+                                                             generation=job.generation,
+                                                             queuePosition=self.scheduler.queue_position(job.job_id))
+                  for job in jobs],
+            totalCores=self.scheduler.total_cores)
@@ -0,0 +1,95 @@
+import multiprocessing
+import threading
+
+DEFAULT_JOB_ID = 'default'  # used by clients that do not provide a job ID
+
+
+class EvolutionJob:
+    """
+    Holds the state of a single evolution session (one per client design).
+    """
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.evolve_manager = None
+        self.pause_signal = False
+        self.stop_signal = False
+        self.streaming = False  # True while an evolveQuery stream is attached to this job
+        self.completed = False
+        self.pause_timer = None
+        self.last_streamed_array = None  # last best handle array sent to the client (Dart orientation)
+
+    @property
+    def generation(self):
+        return 0 if self.evolve_manager is None else self.evolve_manager.current_generation
+
+    def cancel_pause_timer(self):
+        if self.pause_timer is not None:
+            try:
+                self.pause_timer.cancel()
+            except Exception:
+                pass
+            self.pause_timer = None
+
+
+class CoreBudgetScheduler:
+    """
+    Splits the machine's cores between evolution jobs.  Each admitted job receives a core budget
+    (used as its EvolveManager process count), and jobs beyond capacity wait in a first-come-first-served queue.
+    """
+    def __init__(self, total_cores=None):
+        if total_cores is None:
+            # same default load as EvolveManager: 67 percent of the cores available on the computer
+            total_cores = max(1, int(multiprocessing.cpu_count() / 1.5))
+        self.total_cores = int(total_cores)
+        self.allocations = {}  # job_id -> cores
+        self.queue = []  # waiting job IDs, in order of arrival
+        self._condition = threading.Condition()
+
+    def free_cores(self):
+        return self.total_cores - sum(self.allocations.values())
+
+    def queue_position(self, job_id):
+        """
+        Returns the 1-indexed position of a job in the waiting queue (0 if not queued).
+        """
+        with self._condition:
+            return self.queue.index(job_id) + 1 if job_id in self.queue else 0
+
+    def acquire(self, job_id, requested_cores=None, timeout=None):
+        """
+        Waits until the job is at the front of the queue and cores are available, then allocates its budget.
+        :param job_id: Job requesting cores
+        :param requested_cores: Exact number of cores requested (capped by the cores available).
+        If None, the job receives a fair share of the machine given the current number of running and waiting jobs.
+        :param timeout: Maximum time to wait (in seconds).  The job keeps its place in the queue if the timeout expires.
+        :return: The allocated core budget, or 0 if the job is still waiting.
+        """
+        with self._condition:
+            if job_id in self.allocations:
+                return self.allocations[job_id]
+            if job_id not in self.queue:
+                self.queue.append(job_id)
+
+            if not self._condition.wait_for(lambda: len(self.queue) > 0 and self.queue[0] == job_id and self.free_cores() > 0, timeout=timeout):
+                return 0
+
+            if requested_cores is not None:
+                budget = max(1, min(int(requested_cores), self.total_cores))
+            else:
+                budget = max(1, self.total_cores // (len(self.allocations) + len(self.queue)))
+            budget = min(budget, self.free_cores())
+
+            self.queue.pop(0)
+            self.allocations[job_id] = budget
+            self._condition.notify_all()  # the next job in the queue might fit in the remaining cores
+            return budget
+
+    def release(self, job_id):
+        """
+        Returns a job's cores to the pool and removes it from the queue if still waiting.
+        """
+        with self._condition:
+            self.allocations.pop(job_id, None)
+            if job_id in self.queue:
+                self.queue.remove(job_id)
+            self._condition.notify_all()
@@ -8,11 +8,14 @@ def serve():
     port = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT
     HOST = f'localhost:{port}'
 
-    # prepare the gRPC server
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
+    # Optional second parameter: number of cores to share between all evolution jobs
+    total_cores = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    # prepare the gRPC server (each running or queued evolution job holds a worker thread for its progress stream)
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=32))
 
     # add custom class code to the server
-    hamming_evolve_communication_pb2_grpc.add_HandleEvolveServicer_to_server(HandleEvolveService(), server)
+    hamming_evolve_communication_pb2_grpc.add_HandleEvolveServicer_to_server(HandleEvolveService(total_cores=total_cores), server)
 
     # add a health checker system to the server
     health_pb2_grpc.add_HealthServicer_to_server(health.HealthServicer(), server)
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\"hamming_evolve_communication.proto\x12\nevoService\"\xa3\x04\n\rEvolveRequest\x12&\n\tslatArray\x18\x01 \x03(\x0b\x32\x13.evoService.Layer3D\x12(\n\x0bhandleArray\x18\x02 \x03(\x0b\x32\x13.evoService.Layer3D\x12=\n\nparameters\x18\x03 \x03(\x0b\x32).evoService.EvolveRequest.ParametersEntry\x12;\n\tslatTypes\x18\x04 \x03(\x0b\x32(.evoService.EvolveRequest.SlatTypesEntry\x12\x17\n\x0f\x63onnectionAngle\x18\x05 \x01(\t\x12\x43\n\rcoordinateMap\x18\x06 \x03(\x0b\x32,.evoService.EvolveRequest.CoordinateMapEntry\x12/\n\x0bhandleLinks\x18\x07 \x01(\x0b\x32\x1a.evoService.HandleLinkData\x1a\x31\n\x0fParametersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x30\n\x0eSlatTypesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1aP\n\x12\x43oordinateMapEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12)\n\x05value\x18\x02 \x01(\x0b\x32\x1a.evoService.CoordinateList:\x02\x38\x01\".\n\x07Layer3D\x12#\n\x06layers\x18\x01 \x03(\x0b\x32\x13.evoService.Layer2D\",\n\x07Layer2D\x12!\n\x04rows\x18\x01 \x03(\x0b\x32\x13.evoService.Layer1D\"\x19\n\x07Layer1D\x12\x0e\n\x06values\x18\x01 \x03(\x05\"F\n\x0eProgressUpdate\x12\x0f\n\x07hamming\x18\x01 \x01(\x01\x12\x0f\n\x07physics\x18\x02 \x01(\x01\x12\x12\n\nisComplete\x18\x03 \x01(\x08\"\r\n\x0bStopRequest\"\x0e\n\x0cPauseRequest\"\x10\n\x0e\x45xportResponse\"#\n\rExportRequest\x12\x12\n\nfolderPath\x18\x01 \x01(\t\"9\n\rFinalResponse\x12(\n\x0bhandleArray\x18\x01 \x03(\x0b\x32\x13.evoService.Layer3D\"8\n\x0e\x43oordinateList\x12&\n\x06\x63oords\x18\x01 \x03(\x0b\x32\x16.evoService.Coordinate\"\"\n\nCoordinate\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\";\n\tHandleKey\x12\x0e\n\x06slatId\x18\x01 \x01(\t\x12\x10\n\x08position\x18\x02 \x01(\x05\x12\x0c\n\x04side\x18\x03 \x01(\x05\"p\n\x10PhantomSlatEntry\x12\x15\n\rphantomSlatId\x18\x01 \x01(\t\x12\x14\n\x0cparentSlatId\x18\x02 \x01(\t\x12/\n\x0b\x63oordinates\x18\x03 \x01(\x0b\x32\x1a.evoService.CoordinateList\"{\n\x0fHandleLinkGroup\x12\x0f\n\x07groupId\x18\x01 \x01(\t\x12&\n\x07handles\x18\x02 \x03(\x0b\x32\x15.evoService.HandleKey\x12\x18\n\x10hasEnforcedValue\x18\x03 \x01(\x08\x12\x15\n\renforcedValue\x18\x04 \x01(\x05\"\xa4\x01\n\x0eHandleLinkData\x12/\n\nlinkGroups\x18\x01 \x03(\x0b\x32\x1b.evoService.HandleLinkGroup\x12-\n\x0e\x62lockedHandles\x18\x02 \x03(\x0b\x32\x15.evoService.HandleKey\x12\x32\n\x0cphantomSlats\x18\x03 \x03(\x0b\x32\x1c.evoService.PhantomSlatEntry2\xab\x02\n\x0cHandleEvolve\x12\x46\n\x0b\x65volveQuery\x12\x19.evoService.EvolveRequest\x1a\x1a.evoService.ProgressUpdate0\x01\x12\x45\n\x0fPauseProcessing\x12\x18.evoService.PauseRequest\x1a\x18.evoService.PauseRequest\x12\x44\n\x0eStopProcessing\x12\x17.evoService.StopRequest\x1a\x19.evoService.FinalResponse\x12\x46\n\rrequestExport\x12\x19.evoService.ExportRequest\x1a\x1a.evoService.ExportResponseb\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\"hamming_evolve_communication.proto\x12\nevoService\"\xb1\x05\n\rEvolveRequest\x12&\n\tslatArray\x18\x01 \x03(\x0b\x32\x13.evoService.Layer3D\x12(\n\x0bhandleArray\x18\x02 \x03(\x0b\x32\x13.evoService.Layer3D\x12=\n\nparameters\x18\x03 \x03(\x0b\x32).evoService.EvolveRequest.ParametersEntry\x12;\n\tslatTypes\x18\x04 \x03(\x0b\x32(.evoService.EvolveRequest.SlatTypesEntry\x12\x17\n\x0f\x63onnectionAngle\x18\x05 \x01(\t\x12\x43\n\rcoordinateMap\x18\x06 \x03(\x0b\x32,.evoService.EvolveRequest.CoordinateMapEntry\x12/\n\x0bhandleLinks\x18\x07 \x01(\x0b\x32\x1a.evoService.HandleLinkData\x12\x30\n\x0fslatArrayPacked\x18\x08 \x01(\x0b\x32\x17.evoService.PackedArray\x12\x32\n\x11handleArrayPacked\x18\t \x01(\x0b\x32\x17.evoService.PackedArray\x12\x17\n\x0fstreamBestArray\x18\n \x01(\x08\x12\r\n\x05jobId\x18\x0b \x01(\t\x1a\x31\n\x0fParametersEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1a\x30\n\x0eSlatTypesEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\t:\x02\x38\x01\x1aP\n\x12\x43oordinateMapEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12)\n\x05value\x18\x02 \x01(\x0b\x32\x1a.evoService.CoordinateList:\x02\x38\x01\"N\n\x0bPackedArray\x12\r\n\x05\x64type\x18\x01 \x01(\t\x12\r\n\x05shape\x18\x02 \x03(\x03\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\x12\x13\n\x0b\x63ompression\x18\x04 \x01(\t\"\xab\x01\n\x10HandleArrayDelta\x12\x16\n\x0eisFullSnapshot\x18\x01 \x01(\x08\x12*\n\tfullArray\x18\x02 \x01(\x0b\x32\x17.evoService.PackedArray\x12*\n\tpositions\x18\x03 \x01(\x0b\x32\x17.evoService.PackedArray\x12\'\n\x06values\x18\x04 \x01(\x0b\x32\x17.evoService.PackedArray\".\n\x07Layer3D\x12#\n\x06layers\x18\x01 \x03(\x0b\x32\x13.evoService.Layer2D\",\n\x07Layer2D\x12!\n\x04rows\x18\x01 \x03(\x0b\x32\x13.evoService.Layer1D\"\x19\n\x07Layer1D\x12\x0e\n\x06values\x18\x01 \x03(\x05\"\xc1\x02\n\x0eProgressUpdate\x12\x0f\n\x07hamming\x18\x01 \x01(\x01\x12\x0f\n\x07physics\x18\x02 \x01(\x01\x12\x12\n\nisComplete\x18\x03 \x01(\x08\x12\x34\n\x0e\x62\x65stArrayDelta\x18\x04 \x01(\x0b\x32\x1c.evoService.HandleArrayDelta\x12\r\n\x05jobId\x18\x05 \x01(\t\x12\x10\n\x08isQueued\x18\x06 \x01(\x08\x12\x15\n\rqueuePosition\x18\x07 \x01(\x05\x12\x12\n\ncoreBudget\x18\x08 \x01(\x05\x12\x42\n\x0cstageTimings\x18\t \x03(\x0b\x32,.evoService.ProgressUpdate.StageTimingsEntry\x1a\x33\n\x11StageTimingsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01\"4\n\x0bStopRequest\x12\x16\n\x0epackedResponse\x18\x01 \x01(\x08\x12\r\n\x05jobId\x18\x02 \x01(\t\"\x1d\n\x0cPauseRequest\x12\r\n\x05jobId\x18\x01 \x01(\t\"\x10\n\x0e\x45xportResponse\"2\n\rExportRequest\x12\x12\n\nfolderPath\x18\x01 \x01(\t\x12\r\n\x05jobId\x18\x02 \x01(\t\"\x10\n\x0eJobListRequest\"h\n\tJobStatus\x12\r\n\x05jobId\x18\x01 \x01(\t\x12\r\n\x05state\x18\x02 \x01(\t\x12\x12\n\ncoreBudget\x18\x03 \x01(\x05\x12\x12\n\ngeneration\x18\x04 \x01(\x05\x12\x15\n\rqueuePosition\x18\x05 \x01(\x05\"J\n\x0fJobListResponse\x12#\n\x04jobs\x18\x01 \x03(\x0b\x32\x15.evoService.JobStatus\x12\x12\n\ntotalCores\x18\x02 \x01(\x05\"m\n\rFinalResponse\x12(\n\x0bhandleArray\x18\x01 \x03(\x0b\x32\x13.evoService.Layer3D\x12\x32\n\x11handleArrayPacked\x18\x02 \x01(\x0b\x32\x17.evoService.PackedArray\"8\n\x0e\x43oordinateList\x12&\n\x06\x63oords\x18\x01 \x03(\x0b\x32\x16.evoService.Coordinate\"\"\n\nCoordinate\x12\t\n\x01x\x18\x01 \x01(\x05\x12\t\n\x01y\x18\x02 \x01(\x05\";\n\tHandleKey\x12\x0e\n\x06slatId\x18\x01 \x01(\t\x12\x10\n\x08position\x18\x02 \x01(\x05\x12\x0c\n\x04side\x18\x03 \x01(\x05\"p\n\x10PhantomSlatEntry\x12\x15\n\rphantomSlatId\x18\x01 \x01(\t\x12\x14\n\x0cparentSlatId\x18\x02 \x01(\t\x12/\n\x0b\x63oordinates\x18\x03 \x01(\x0b\x32\x1a.evoService.CoordinateList\"{\n\x0fHandleLinkGroup\x12\x0f\n\x07groupId\x18\x01 \x01(\t\x12&\n\x07handles\x18\x02 \x03(\x0b\x32\x15.evoService.HandleKey\x12\x18\n\x10hasEnforcedValue\x18\x03 \x01(\x08\x12\x15\n\renforcedValue\x18\x04 \x01(\x05\"\xa4\x01\n\x0eHandleLinkData\x12/\n\nlinkGroups\x18\x01 \x03(\x0b\x32\x1b.evoService.HandleLinkGroup\x12-\n\x0e\x62lockedHandles\x18\x02 \x03(\x0b\x32\x15.evoService.HandleKey\x12\x32\n\x0cphantomSlats\x18\x03 \x03(\x0b\x32\x1c.evoService.PhantomSlatEntry2\xf0\x02\n\x0cHandleEvolve\x12\x46\n\x0b\x65volveQuery\x12\x19.evoService.EvolveRequest\x1a\x1a.evoService.ProgressUpdate0\x01\x12\x45\n\x0fPauseProcessing\x12\x18.evoService.PauseRequest\x1a\x18.evoService.PauseRequest\x12\x44\n\x0eStopProcessing\x12\x17.evoService.StopRequest\x1a\x19.evoService.FinalResponse\x12\x46\n\rrequestExport\x12\x19.evoService.ExportRequest\x1a\x1a.evoService.ExportResponse\x12\x43\n\x08listJobs\x12\x1a.evoService.JobListRequest\x1a\x1b.evoService.JobListResponseb\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -37,44 +37,58 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_EVOLVEREQUEST_SLATTYPESENTRY']._serialized_options = b'8\001'
   _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._loaded_options = None
   _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._serialized_options = b'8\001'
+  _globals['_PROGRESSUPDATE_STAGETIMINGSENTRY']._loaded_options = None
+  _globals['_PROGRESSUPDATE_STAGETIMINGSENTRY']._serialized_options = b'8\001'
   _globals['_EVOLVEREQUEST']._serialized_start=51
-  _globals['_EVOLVEREQUEST']._serialized_end=598
-  _globals['_EVOLVEREQUEST_PARAMETERSENTRY']._serialized_start=417
-  _globals['_EVOLVEREQUEST_PARAMETERSENTRY']._serialized_end=466
-  _globals['_EVOLVEREQUEST_SLATTYPESENTRY']._serialized_start=468
-  _globals['_EVOLVEREQUEST_SLATTYPESENTRY']._serialized_end=516
-  _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._serialized_start=518
-  _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._serialized_end=598
-  _globals['_LAYER3D']._serialized_start=600
-  _globals['_LAYER3D']._serialized_end=646
-  _globals['_LAYER2D']._serialized_start=648
-  _globals['_LAYER2D']._serialized_end=692
-  _globals['_LAYER1D']._serialized_start=694
-  _globals['_LAYER1D']._serialized_end=719
-  _globals['_PROGRESSUPDATE']._serialized_start=721
-  _globals['_PROGRESSUPDATE']._serialized_end=791
-  _globals['_STOPREQUEST']._serialized_start=793
-  _globals['_STOPREQUEST']._serialized_end=806
-  _globals['_PAUSEREQUEST']._serialized_start=808
-  _globals['_PAUSEREQUEST']._serialized_end=822
-  _globals['_EXPORTRESPONSE']._serialized_start=824
-  _globals['_EXPORTRESPONSE']._serialized_end=840
-  _globals['_EXPORTREQUEST']._serialized_start=842
-  _globals['_EXPORTREQUEST']._serialized_end=877
-  _globals['_FINALRESPONSE']._serialized_start=879
-  _globals['_FINALRESPONSE']._serialized_end=936
-  _globals['_COORDINATELIST']._serialized_start=938
-  _globals['_COORDINATELIST']._serialized_end=994
-  _globals['_COORDINATE']._serialized_start=996
-  _globals['_COORDINATE']._serialized_end=1030
-  _globals['_HANDLEKEY']._serialized_start=1032
-  _globals['_HANDLEKEY']._serialized_end=1091
-  _globals['_PHANTOMSLATENTRY']._serialized_start=1093
-  _globals['_PHANTOMSLATENTRY']._serialized_end=1205
-  _globals['_HANDLELINKGROUP']._serialized_start=1207
-  _globals['_HANDLELINKGROUP']._serialized_end=1330
-  _globals['_HANDLELINKDATA']._serialized_start=1333
-  _globals['_HANDLELINKDATA']._serialized_end=1497
-  _globals['_HANDLEEVOLVE']._serialized_start=1500
-  _globals['_HANDLEEVOLVE']._serialized_end=1799
+  _globals['_EVOLVEREQUEST']._serialized_end=740
+  _globals['_EVOLVEREQUEST_PARAMETERSENTRY']._serialized_start=559
+  _globals['_EVOLVEREQUEST_PARAMETERSENTRY']._serialized_end=608
+  _globals['_EVOLVEREQUEST_SLATTYPESENTRY']._serialized_start=610
+  _globals['_EVOLVEREQUEST_SLATTYPESENTRY']._serialized_end=658
+  _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._serialized_start=660
+  _globals['_EVOLVEREQUEST_COORDINATEMAPENTRY']._serialized_end=740
+  _globals['_PACKEDARRAY']._serialized_start=742
+  _globals['_PACKEDARRAY']._serialized_end=820
+  _globals['_HANDLEARRAYDELTA']._serialized_start=823
+  _globals['_HANDLEARRAYDELTA']._serialized_end=994
+  _globals['_LAYER3D']._serialized_start=996
+  _globals['_LAYER3D']._serialized_end=1042
+  _globals['_LAYER2D']._serialized_start=1044
+  _globals['_LAYER2D']._serialized_end=1088
+  _globals['_LAYER1D']._serialized_start=1090
+  _globals['_LAYER1D']._serialized_end=1115
+  _globals['_PROGRESSUPDATE']._serialized_start=1118
+  _globals['_PROGRESSUPDATE']._serialized_end=1439
+  _globals['_PROGRESSUPDATE_STAGETIMINGSENTRY']._serialized_start=1388
+  _globals['_PROGRESSUPDATE_STAGETIMINGSENTRY']._serialized_end=1439
+  _globals['_STOPREQUEST']._serialized_start=1441
+  _globals['_STOPREQUEST']._serialized_end=1493
+  _globals['_PAUSEREQUEST']._serialized_start=1495
+  _globals['_PAUSEREQUEST']._serialized_end=1524
+  _globals['_EXPORTRESPONSE']._serialized_start=1526
+  _globals['_EXPORTRESPONSE']._serialized_end=1542
+  _globals['_EXPORTREQUEST']._serialized_start=1544
+  _globals['_EXPORTREQUEST']._serialized_end=1594
+  _globals['_JOBLISTREQUEST']._serialized_start=1596
+  _globals['_JOBLISTREQUEST']._serialized_end=1612
+  _globals['_JOBSTATUS']._serialized_start=1614
+  _globals['_JOBSTATUS']._serialized_end=1718
+  _globals['_JOBLISTRESPONSE']._serialized_start=1720
+  _globals['_JOBLISTRESPONSE']._serialized_end=1794
+  _globals['_FINALRESPONSE']._serialized_start=1796
+  _globals['_FINALRESPONSE']._serialized_end=1905
+  _globals['_COORDINATELIST']._serialized_start=1907
+  _globals['_COORDINATELIST']._serialized_end=1963
+  _globals['_COORDINATE']._serialized_start=1965
+  _globals['_COORDINATE']._serialized_end=1999
+  _globals['_HANDLEKEY']._serialized_start=2001
+  _globals['_HANDLEKEY']._serialized_end=2060
+  _globals['_PHANTOMSLATENTRY']._serialized_start=2062
+  _globals['_PHANTOMSLATENTRY']._serialized_end=2174
+  _globals['_HANDLELINKGROUP']._serialized_start=2176
+  _globals['_HANDLELINKGROUP']._serialized_end=2299
+  _globals['_HANDLELINKDATA']._serialized_start=2302
+  _globals['_HANDLELINKDATA']._serialized_end=2466
+  _globals['_HANDLEEVOLVE']._serialized_start=2469
+  _globals['_HANDLEEVOLVE']._serialized_end=2837
 # @@protoc_insertion_point(module_scope)
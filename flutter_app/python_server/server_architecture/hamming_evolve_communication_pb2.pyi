@@ -7,7 +7,7 @@ from typing import ClassVar as _ClassVar, Optional as _Optional, Union as _Union
 DESCRIPTOR: _descriptor.FileDescriptor
 
 class EvolveRequest(_message.Message):
-    __slots__ = ("slatArray", "handleArray", "parameters", "slatTypes", "connectionAngle", "coordinateMap", "handleLinks")
+    __slots__ = ("slatArray", "handleArray", "parameters", "slatTypes", "connectionAngle", "coordinateMap", "handleLinks", "slatArrayPacked", "handleArrayPacked", "streamBestArray", "jobId")
     class ParametersEntry(_message.Message):
         __slots__ = ("key", "value")
         KEY_FIELD_NUMBER: _ClassVar[int]
@@ -36,6 +36,10 @@ class EvolveRequest(_message.Message):
     CONNECTIONANGLE_FIELD_NUMBER: _ClassVar[int]
     COORDINATEMAP_FIELD_NUMBER: _ClassVar[int]
     HANDLELINKS_FIELD_NUMBER: _ClassVar[int]
+    SLATARRAYPACKED_FIELD_NUMBER: _ClassVar[int]
+    HANDLEARRAYPACKED_FIELD_NUMBER: _ClassVar[int]
+    STREAMBESTARRAY_FIELD_NUMBER: _ClassVar[int]
+    JOBID_FIELD_NUMBER: _ClassVar[int]
     slatArray: _containers.RepeatedCompositeFieldContainer[Layer3D]
     handleArray: _containers.RepeatedCompositeFieldContainer[Layer3D]
     parameters: _containers.ScalarMap[str, str]
@@ -43,7 +47,35 @@ class EvolveRequest(_message.Message):
     connectionAngle: str
     coordinateMap: _containers.MessageMap[str, CoordinateList]
     handleLinks: HandleLinkData
-    def __init__(self, slatArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ..., handleArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ..., parameters: _Optional[_Mapping[str, str]] = ..., slatTypes: _Optional[_Mapping[str, str]] = ..., connectionAngle: _Optional[str] = ..., coordinateMap: _Optional[_Mapping[str, CoordinateList]] = ..., handleLinks: _Optional[_Union[HandleLinkData, _Mapping]] = ...) -> None: ...
+    slatArrayPacked: PackedArray
+    handleArrayPacked: PackedArray
+    streamBestArray: bool
+    jobId: str
+    def __init__(self, slatArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ..., handleArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ..., parameters: _Optional[_Mapping[str, str]] = ..., slatTypes: _Optional[_Mapping[str, str]] = ..., connectionAngle: _Optional[str] = ..., coordinateMap: _Optional[_Mapping[str, CoordinateList]] = ..., handleLinks: _Optional[_Union[HandleLinkData, _Mapping]] = ..., slatArrayPacked: _Optional[_Union[PackedArray, _Mapping]] = ..., handleArrayPacked: _Optional[_Union[PackedArray, _Mapping]] = ..., streamBestArray: bool = ..., jobId: _Optional[str] = ...) -> None: ...
+
+class PackedArray(_message.Message):
+    __slots__ = ("dtype", "shape", "data", "compression")
+    DTYPE_FIELD_NUMBER: _ClassVar[int]
+    SHAPE_FIELD_NUMBER: _ClassVar[int]
+    DATA_FIELD_NUMBER: _ClassVar[int]
+    COMPRESSION_FIELD_NUMBER: _ClassVar[int]
+    dtype: str
+    shape: _containers.RepeatedScalarFieldContainer[int]
+    data: bytes
+    compression: str
+    def __init__(self, dtype: _Optional[str] = ..., shape: _Optional[_Iterable[int]] = ..., data: _Optional[bytes] = ..., compression: _Optional[str] = ...) -> None: ...
+
+class HandleArrayDelta(_message.Message):
+    __slots__ = ("isFullSnapshot", "fullArray", "positions", "values")
+    ISFULLSNAPSHOT_FIELD_NUMBER: _ClassVar[int]
+    FULLARRAY_FIELD_NUMBER: _ClassVar[int]
+    POSITIONS_FIELD_NUMBER: _ClassVar[int]
+    VALUES_FIELD_NUMBER: _ClassVar[int]
+    isFullSnapshot: bool
+    fullArray: PackedArray
+    positions: PackedArray
+    values: PackedArray
+    def __init__(self, isFullSnapshot: bool = ..., fullArray: _Optional[_Union[PackedArray, _Mapping]] = ..., positions: _Optional[_Union[PackedArray, _Mapping]] = ..., values: _Optional[_Union[PackedArray, _Mapping]] = ...) -> None: ...
 
 class Layer3D(_message.Message):
     __slots__ = ("layers",)
@@ -64,38 +96,93 @@ class Layer1D(_message.Message):
     def __init__(self, values: _Optional[_Iterable[int]] = ...) -> None: ...
 
 class ProgressUpdate(_message.Message):
-    __slots__ = ("hamming", "physics", "isComplete")
+    __slots__ = ("hamming", "physics", "isComplete", "bestArrayDelta", "jobId", "isQueued", "queuePosition", "coreBudget", "stageTimings")
+    class StageTimingsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: str
+        value: float
+        def __init__(self, key: _Optional[str] = ..., value: _Optional[float] = ...) -> None: ...
     HAMMING_FIELD_NUMBER: _ClassVar[int]
     PHYSICS_FIELD_NUMBER: _ClassVar[int]
     ISCOMPLETE_FIELD_NUMBER: _ClassVar[int]
+    BESTARRAYDELTA_FIELD_NUMBER: _ClassVar[int]
+    JOBID_FIELD_NUMBER: _ClassVar[int]
+    ISQUEUED_FIELD_NUMBER: _ClassVar[int]
+    QUEUEPOSITION_FIELD_NUMBER: _ClassVar[int]
+    COREBUDGET_FIELD_NUMBER: _ClassVar[int]
+    STAGETIMINGS_FIELD_NUMBER: _ClassVar[int]
     hamming: float
     physics: float
     isComplete: bool
-    def __init__(self, hamming: _Optional[float] = ..., physics: _Optional[float] = ..., isComplete: bool = ...) -> None: ...
+    bestArrayDelta: HandleArrayDelta
+    jobId: str
+    isQueued: bool
+    queuePosition: int
+    coreBudget: int
+    stageTimings: _containers.ScalarMap[str, float]
+    def __init__(self, hamming: _Optional[float] = ..., physics: _Optional[float] = ..., isComplete: bool = ..., bestArrayDelta: _Optional[_Union[HandleArrayDelta, _Mapping]] = ..., jobId: _Optional[str] = ..., isQueued: bool = ..., queuePosition: _Optional[int] = ..., coreBudget: _Optional[int] = ..., stageTimings: _Optional[_Mapping[str, float]] = ...) -> None: ...
 
 class StopRequest(_message.Message):
-    __slots__ = ()
-    def __init__(self) -> None: ...
+    __slots__ = ("packedResponse", "jobId")
+    PACKEDRESPONSE_FIELD_NUMBER: _ClassVar[int]
+    JOBID_FIELD_NUMBER: _ClassVar[int]
+    packedResponse: bool
+    jobId: str
+    def __init__(self, packedResponse: bool = ..., jobId: _Optional[str] = ...) -> None: ...
 
 class PauseRequest(_message.Message):
-    __slots__ = ()
-    def __init__(self) -> None: ...
+    __slots__ = ("jobId",)
+    JOBID_FIELD_NUMBER: _ClassVar[int]
+    jobId: str
+    def __init__(self, jobId: _Optional[str] = ...) -> None: ...
 
 class ExportResponse(_message.Message):
     __slots__ = ()
     def __init__(self) -> None: ...
 
 class ExportRequest(_message.Message):
-    __slots__ = ("folderPath",)
+    __slots__ = ("folderPath", "jobId")
     FOLDERPATH_FIELD_NUMBER: _ClassVar[int]
+    JOBID_FIELD_NUMBER: _ClassVar[int]
     folderPath: str
-    def __init__(self, folderPath: _Optional[str] = ...) -> None: ...
+    jobId: str
+    def __init__(self, folderPath: _Optional[str] = ..., jobId: _Optional[str] = ...) -> None: ...
+
+class JobListRequest(_message.Message):
+    __slots__ = ()
+    def __init__(self) -> None: ...
+
+class JobStatus(_message.Message):
+    __slots__ = ("jobId", "state", "coreBudget", "generation", "queuePosition")
+    JOBID_FIELD_NUMBER: _ClassVar[int]
+    STATE_FIELD_NUMBER: _ClassVar[int]
+    COREBUDGET_FIELD_NUMBER: _ClassVar[int]
+    GENERATION_FIELD_NUMBER: _ClassVar[int]
+    QUEUEPOSITION_FIELD_NUMBER: _ClassVar[int]
+    jobId: str
+    state: str
+    coreBudget: int
+    generation: int
+    queuePosition: int
+    def __init__(self, jobId: _Optional[str] = ..., state: _Optional[str] = ..., coreBudget: _Optional[int] = ..., generation: _Optional[int] = ..., queuePosition: _Optional[int] = ...) -> None: ...
+
+class JobListResponse(_message.Message):
+    __slots__ = ("jobs", "totalCores")
+    JOBS_FIELD_NUMBER: _ClassVar[int]
+    TOTALCORES_FIELD_NUMBER: _ClassVar[int]
+    jobs: _containers.RepeatedCompositeFieldContainer[JobStatus]
+    totalCores: int
+    def __init__(self, jobs: _Optional[_Iterable[_Union[JobStatus, _Mapping]]] = ..., totalCores: _Optional[int] = ...) -> None: ...
 
 class FinalResponse(_message.Message):
-    __slots__ = ("handleArray",)
+    __slots__ = ("handleArray", "handleArrayPacked")
     HANDLEARRAY_FIELD_NUMBER: _ClassVar[int]
+    HANDLEARRAYPACKED_FIELD_NUMBER: _ClassVar[int]
     handleArray: _containers.RepeatedCompositeFieldContainer[Layer3D]
-    def __init__(self, handleArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ...) -> None: ...
+    handleArrayPacked: PackedArray
+    def __init__(self, handleArray: _Optional[_Iterable[_Union[Layer3D, _Mapping]]] = ..., handleArrayPacked: _Optional[_Union[PackedArray, _Mapping]] = ...) -> None: ...
 
 class CoordinateList(_message.Message):
     __slots__ = ("coords",)
@@ -54,6 +54,11 @@ class HandleEvolveStub(object):
                 request_serializer=hamming__evolve__communication__pb2.ExportRequest.SerializeToString,
                 response_deserializer=hamming__evolve__communication__pb2.ExportResponse.FromString,
                 _registered_method=True)
+        self.listJobs = channel.unary_unary(
+                '/evoService.HandleEvolve/listJobs',
+                request_serializer=hamming__evolve__communication__pb2.JobListRequest.SerializeToString,
+                response_deserializer=hamming__evolve__communication__pb2.JobListResponse.FromString,
+                _registered_method=True)
 
 
 class HandleEvolveServicer(object):
@@ -87,6 +92,13 @@ class HandleEvolveServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def listJobs(self, request, context):
+        """Lists all evolution jobs on the server, with their state and core budget
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_HandleEvolveServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -110,6 +122,11 @@ def add_HandleEvolveServicer_to_server(servicer, server):
                     request_deserializer=hamming__evolve__communication__pb2.ExportRequest.FromString,
                     response_serializer=hamming__evolve__communication__pb2.ExportResponse.SerializeToString,
             ),
+            'listJobs': grpc.unary_unary_rpc_method_handler(
+                    servicer.listJobs,
+                    request_deserializer=hamming__evolve__communication__pb2.JobListRequest.FromString,
+                    response_serializer=hamming__evolve__communication__pb2.JobListResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'evoService.HandleEvolve', rpc_method_handlers)
@@ -228,3 +245,30 @@ class HandleEvolve(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def listJobs(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/evoService.HandleEvolve/listJobs',
+            hamming__evolve__communication__pb2.JobListRequest.SerializeToString,
+            hamming__evolve__communication__pb2.JobListResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)